@@ -1,12 +1,117 @@
+from dataclasses import dataclass
+
 from wagtail.api.v2.views import PagesAPIViewSet
 from wagtail.api.v2.router import WagtailAPIRouter
 from wagtail.images.api.v2.views import ImagesAPIViewSet
 from wagtail.documents.api.v2.views import DocumentsAPIViewSet
 
+from django.db.models import QuerySet, Subquery
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_safe
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+
+from .cache import cache_stats, cached_api_view, cached_count
+from . import fulltext
+from .conditional import conditional_on
+from .counters import view_counter
+from .export import EXPORT_FORMATS, export_lines
+from .languages import LANGUAGES, TRANSLATED_FIELDS, InvalidLanguage, request_language, translated, vary_on_language
+from .models import (
+    Notification,
+    GalleryCategory,
+    GalleryImage,
+    NewsCategory,
+    PressRelease,
+    RelatedPressRelease,
+    tag_names_by_press_release,
+)
+from .pagination import InvalidCursor, paginate
+from .prerender import RELATED_NEWS_KEYS, absolute_payload, load_payloads, payload_field, site_origin
+from .renditions import RENDITION_IMAGE_FIELDS, prefetch_renditions, serialize_renditions
+
+
+# Keyset order for the gallery, served by cms_galleryimg_*_idx
+GALLERY_ORDERING = ('-date', 'id')
+GALLERY_PAGE_SIZE = 48
+
+# Keyset order for news listings; id breaks ties between equal dates
+NEWS_ORDERING = ('-published_date', '-id')
+NEWS_PAGE_SIZE = 20
+
+# Fields available to ?fields= on the news list: the columns each one reads
+# and how it is serialized. Columns of unrequested fields are deferred.
+NEWS_LIST_FIELDS = {
+    "id": ((), lambda pr, request, tags: pr.id),
+    "title": (("title",), lambda pr, request, tags: pr.title),
+    "title_te": (("title_te",), lambda pr, request, tags: pr.title_te),
+    "slug": (("slug",), lambda pr, request, tags: pr.slug),
+    "excerpt": (("excerpt",), lambda pr, request, tags: pr.excerpt),
+    "excerpt_te": (("excerpt_te",), lambda pr, request, tags: pr.excerpt_te),
+    "body": (("body",), lambda pr, request, tags: pr.body),
+    "body_te": (("body_te",), lambda pr, request, tags: pr.body_te),
+    "featured_image": (
+        # ImageField reads its width/height fields whenever the file is accessed
+        ("featured_image", "featured_image__file", "featured_image__width", "featured_image__height"),
+        lambda pr, request, tags: request.build_absolute_uri(pr.featured_image.file.url) if pr.featured_image else None,
+    ),
+    "featured_image_renditions": (
+        ("featured_image",) + tuple(f"featured_image__{name}" for name in RENDITION_IMAGE_FIELDS),
+        lambda pr, request, tags: serialize_renditions(pr.featured_image, request),
+    ),
+    "category": (("category",), lambda pr, request, tags: pr.category_id),
+    "category_name": (
+        ("category", "category__name"),
+        lambda pr, request, tags: pr.category.name if pr.category else None,
+    ),
+    "category_slug": (
+        ("category", "category__slug"),
+        lambda pr, request, tags: pr.category.slug if pr.category else None,
+    ),
+    "author": (("author",), lambda pr, request, tags: pr.author),
+    "tags": ((), lambda pr, request, tags: tags[pr.id]),
+    "is_featured": (("is_featured",), lambda pr, request, tags: pr.is_featured),
+    "is_published": (("is_published",), lambda pr, request, tags: pr.is_published),
+    "published_date": ((), lambda pr, request, tags: pr.published_date.isoformat()),
+    "views": (("views",), lambda pr, request, tags: pr.views),
+}
+
+
+def _language_fields(lang):
+    """NEWS_LIST_FIELDS for ?lang=: translated fields read just that language's columns."""
+    def translated_field(name, columns):
+        return (columns, lambda pr, request, tags: translated(pr, name, lang))
 
-from .models import Notification, GalleryCategory, GalleryImage, NewsCategory, PressRelease
+    fields = {}
+    for name, spec in NEWS_LIST_FIELDS.items():
+        if name.endswith("_te"):
+            continue
+        if name in TRANSLATED_FIELDS:
+            spec = translated_field(name, (name,) if lang == "en" else (name, f"{name}_te"))
+        elif name == "category_name":
+            spec = (
+                ("category", "category__name", "category__name_te"),
+                lambda pr, request, tags: translated(pr.category, "name", lang) if pr.category else None,
+            )
+        fields[name] = spec
+    return fields
+
+
+# ?fields= for each ?lang= (None: both languages)
+NEWS_LIST_FIELDS_BY_LANGUAGE = {None: NEWS_LIST_FIELDS, **{lang: _language_fields(lang) for lang in LANGUAGES}}
+
+# Listing cards don't show the article body; ask for it with ?fields=body
+NEWS_LIST_DEFAULT_FIELDS = {
+    lang: [name for name in fields if name not in ("body", "body_te")]
+    for lang, fields in NEWS_LIST_FIELDS_BY_LANGUAGE.items()
+}
+
+# The default fields, and any subset of them, are read from the articles'
+# pre-rendered list payloads (see cms.prerender)
+PRERENDERED_LIST_FIELDS = {lang: frozenset(fields) for lang, fields in NEWS_LIST_DEFAULT_FIELDS.items()}
 
 
 # Wagtail's built-in API router (for pages, images, docs)
@@ -17,10 +122,18 @@ api_router.register_endpoint('documents', DocumentsAPIViewSet)
 
 
 # Custom API for our Snippets
+@conditional_on(Notification)
 @api_view(['GET'])
+@cached_api_view('notifications', Notification)
 def notifications_list(request):
-    notifications = Notification.objects.filter(is_active=True)
-    data = {
+    return Response(notifications_data())
+
+
+def notifications_data(notifications=None):
+    """The active notifications, as served by the list and the event stream."""
+    if notifications is None:
+        notifications = Notification.objects.filter(is_active=True)
+    return {
         "notifications": [
             {
                 "id": n.id,
@@ -30,45 +143,132 @@ def notifications_list(request):
             for n in notifications
         ]
     }
-    return Response(data)
 
 
+@conditional_on(GalleryCategory)
 @api_view(['GET'])
+@cached_api_view('gallery-categories', GalleryCategory)
 def gallery_categories_list(request):
-    categories = GalleryCategory.objects.all()
-    data = {
+    return Response(gallery_categories_data(GalleryCategory.objects.all()))
+
+
+def gallery_categories_data(categories):
+    return {
         "categories": [
             {"id": cat.slug, "label": cat.name}
             for cat in categories
         ]
     }
-    return Response(data)
 
 
+@conditional_on(GalleryImage, GalleryCategory)
 @api_view(['GET'])
+@cached_api_view(
+    'gallery-images', GalleryImage, GalleryCategory,
+    params=('category', 'date_from', 'date_to', 'limit', 'cursor'),
+)
 def gallery_images_list(request):
-    images = GalleryImage.objects.select_related('image', 'category').all()
-    data = {
+    try:
+        images = gallery_images_queryset(request)
+    except InvalidParameter as exc:
+        return Response({"error": str(exc)}, status=400)
+
+    total_count = cached_count(
+        request, 'gallery-images', images, (GalleryImage, GalleryCategory), params=GALLERY_FILTERS,
+    )
+
+    try:
+        page = paginate(
+            images, GALLERY_ORDERING, request.GET.get('cursor', None), page_size(request, GALLERY_PAGE_SIZE),
+        )
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=400)
+
+    return Response(gallery_images_data(page, total_count, request))
+
+
+class InvalidParameter(ValueError):
+    """A query parameter the endpoint can't serve; the message is the 400 error."""
+
+
+# Parameters that filter the gallery, and so its total
+GALLERY_FILTERS = ('category', 'date_from', 'date_to')
+
+
+def page_size(request, default):
+    """Page size: ?limit=N, or ``default`` when walking with a cursor (None: everything)."""
+    limit = request.GET.get('limit', None)
+    size = None
+    if limit:
+        try:
+            size = int(limit) if int(limit) > 0 else None
+        except ValueError:
+            pass
+    if request.GET.get('cursor', None) and size is None:
+        size = default
+    return size
+
+
+def gallery_images_queryset(request):
+    """The gallery images matching the request's filters."""
+    category = request.GET.get('category', None)
+
+    images = GalleryImage.objects.select_related('image', 'category').prefetch_related(
+        prefetch_renditions('image__renditions')
+    )
+
+    # Apply filters
+    if category:
+        # As for the news list: a category id, not a join on the slug, lets
+        # the composite index return the page in order
+        images = images.filter(
+            category=Subquery(GalleryCategory.objects.filter(slug=category).order_by().values('id')),
+        )
+
+    # ?date_from= / ?date_to=: inclusive ISO dates
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        value = request.GET.get(param, None)
+        if value:
+            try:
+                parsed = parse_date(value)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                raise InvalidParameter(f"Invalid {param}, expected YYYY-MM-DD")
+            images = images.filter(**{lookup: parsed})
+    return images
+
+
+def gallery_images_data(page, total_count, request):
+    return {
         "gallery": [
             {
                 "id": img.id,
                 "image": request.build_absolute_uri(img.image.file.url) if img.image else None,
+                "renditions": serialize_renditions(img.image, request),
                 "title": img.title,
                 "date": img.date.isoformat(),
                 "category": img.category.slug if img.category else None,
             }
-            for img in images
-        ]
+            for img in page.items
+        ],
+        "total": total_count,
+        "next": page.next_cursor,
+        "prev": page.prev_cursor,
     }
-    return Response(data)
 
 
 # News & Press Releases API
 
+@conditional_on(NewsCategory)
 @api_view(['GET'])
+@cached_api_view('news-categories', NewsCategory)
 def news_categories_list(request):
-    categories = NewsCategory.objects.all()
-    data = {
+    return Response(news_categories_data(NewsCategory.objects.all()))
+
+
+def news_categories_data(categories):
+    return {
         "categories": [
             {
                 "id": cat.id,
@@ -79,130 +279,275 @@ def news_categories_list(request):
             for cat in categories
         ]
     }
-    return Response(data)
 
 
+@vary_on_language
+@conditional_on(PressRelease, NewsCategory)
 @api_view(['GET'])
+@cached_api_view(
+    'news', PressRelease, NewsCategory,
+    params=('category', 'featured', 'search', 'limit', 'cursor', 'fields', 'lang'),
+)
 def press_releases_list(request):
-    # Get query parameters
+    try:
+        query = news_list_query(request)
+    except InvalidParameter as exc:
+        return Response({"error": str(exc)}, status=400)
+
+    # Total is shared by every page of the same filters
+    total_count = cached_count(request, 'news', query.queryset, (PressRelease, NewsCategory), params=NEWS_FILTERS)
+
+    try:
+        page = paginate(query.queryset, query.ordering, query.cursor, query.page_size)
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=400)
+
+    payloads = load_payloads(page.items, query.list_field) if query.prerendered else None
+    # Tags for the whole page in one query instead of one per article
+    tags = tag_names_by_press_release([pr.id for pr in page.items]) if query.needs_tags else {}
+    return Response(news_list_data(query, page, total_count, request, payloads, tags))
+
+
+# Parameters that filter the news list, and so its total
+NEWS_FILTERS = ('category', 'featured', 'search')
+
+
+@dataclass
+class NewsListQuery:
+    """A news list request: the articles it selects and how they're served."""
+    queryset: QuerySet
+    ordering: tuple
+    lang: str | None
+    fields: list
+    # Served from the pre-rendered list payloads (see cms.prerender)
+    prerendered: bool
+    cursor: str | None
+    page_size: int | None
+
+    @property
+    def list_field(self):
+        return payload_field('list', self.lang)
+
+    @property
+    def needs_tags(self):
+        return not self.prerendered and "tags" in self.fields
+
+
+def news_list_query(request):
+    """Parse the parameters of a news list request into a ``NewsListQuery``."""
     category = request.GET.get('category', None)
     is_featured = request.GET.get('featured', None)
     search = request.GET.get('search', None)
-    limit = request.GET.get('limit', None)
+    fields = request.GET.get('fields', None)
+
+    # ?lang=en|te|auto: one language under the English field names
+    try:
+        lang = request_language(request)
+    except InvalidLanguage:
+        raise InvalidParameter("Invalid lang, expected en, te or auto")
+    available_fields = NEWS_LIST_FIELDS_BY_LANGUAGE[lang]
+
+    # Sparse fieldsets: ?fields=id,title,... (defaults to the listing shape)
+    if fields:
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in available_fields]
+        if unknown:
+            raise InvalidParameter(f"Unknown fields: {', '.join(unknown)}")
+    else:
+        fields = NEWS_LIST_DEFAULT_FIELDS[lang]
+
+    # Only read the columns the requested fields need; id and published_date
+    # are always loaded for the keyset cursor.
+    prerendered = PRERENDERED_LIST_FIELDS[lang].issuperset(fields)
+    columns = {"id", "published_date"}
+    if prerendered:
+        columns.update(("views", payload_field('list', lang)))
+    else:
+        for name in fields:
+            columns.update(available_fields[name][0])
+    related = [name for name in ("category", "featured_image") if name in columns]
 
     # Base queryset - only published articles
-    press_releases = PressRelease.objects.filter(is_published=True).select_related('category', 'featured_image')
+    press_releases = PressRelease.objects.filter(is_published=True).select_related(*related).only(*columns)
+    if not prerendered and "featured_image_renditions" in fields:
+        press_releases = press_releases.prefetch_related(prefetch_renditions('featured_image__renditions'))
 
     # Apply filters
     if category:
-        press_releases = press_releases.filter(category__slug=category)
+        # A join on the slug can't take its order from the category index;
+        # a subquery is run first and leaves a plain category_id condition
+        press_releases = press_releases.filter(
+            category=Subquery(NewsCategory.objects.filter(slug=category).order_by().values('id')),
+        )
 
     if is_featured == 'true':
         press_releases = press_releases.filter(is_featured=True)
 
+    ordering = NEWS_ORDERING
     if search:
-        from django.db.models import Q
-        press_releases = press_releases.filter(
-            Q(title__icontains=search) | Q(excerpt__icontains=search)
-        )
+        press_releases = fulltext.search_press_releases(press_releases, search)
+        if fulltext.is_supported():
+            ordering = ('-search_rank',) + NEWS_ORDERING
 
-    # Get total count before limiting
-    total_count = press_releases.count()
+    return NewsListQuery(
+        press_releases, ordering, lang, fields, prerendered,
+        request.GET.get('cursor', None), page_size(request, NEWS_PAGE_SIZE),
+    )
 
-    # Apply limit
-    if limit:
-        try:
-            press_releases = press_releases[:int(limit)]
-        except ValueError:
-            pass
+
+def news_list_data(query, page, total_count, request, payloads=None, tags=None):
+    """
+    The news list response for ``page`` of ``query``.
+
+    ``payloads`` are the decoded list payloads of the page's articles when
+    the query is pre-rendered, ``tags`` their tag names when it needs them.
+    """
+    if query.prerendered:
+        origin = site_origin(request)
+        default_fields = query.fields is NEWS_LIST_DEFAULT_FIELDS[query.lang]
+        news = []
+        for pr, item in zip(page.items, payloads):
+            item["views"] = pr.views
+            absolute_payload(item, origin)
+            news.append(item if default_fields else {name: item[name] for name in query.fields})
+    else:
+        available_fields = NEWS_LIST_FIELDS_BY_LANGUAGE[query.lang]
+        serializers = [(name, available_fields[name][1]) for name in query.fields]
+        news = [
+            {name: serialize(pr, request, tags) for name, serialize in serializers}
+            for pr in page.items
+        ]
 
     data = {
-        "news": [
-            {
-                "id": pr.id,
-                "title": pr.title,
-                "title_te": pr.title_te,
-                "slug": pr.slug,
-                "excerpt": pr.excerpt,
-                "excerpt_te": pr.excerpt_te,
-                "body": pr.body,
-                "body_te": pr.body_te,
-                "featured_image": request.build_absolute_uri(pr.featured_image.file.url) if pr.featured_image else None,
-                "category": pr.category.id if pr.category else None,
-                "category_name": pr.category.name if pr.category else None,
-                "category_slug": pr.category.slug if pr.category else None,
-                "author": pr.author,
-                "tags": [tag.name for tag in pr.tags.all()],
-                "is_featured": pr.is_featured,
-                "is_published": pr.is_published,
-                "published_date": pr.published_date.isoformat(),
-                "views": pr.views,
-            }
-            for pr in press_releases
-        ],
+        "news": news,
         "total": total_count,
+        "next": page.next_cursor,
+        "prev": page.prev_cursor,
     }
-    return Response(data)
+    if query.lang:
+        data["lang"] = query.lang
+    return data
 
 
+@vary_on_language
 @api_view(['GET'])
 def press_release_detail(request, slug):
     try:
-        pr = PressRelease.objects.select_related('category', 'featured_image').get(
+        lang = request_language(request)
+    except InvalidLanguage:
+        return Response({"error": "Invalid lang, expected en, te or auto"}, status=400)
+
+    try:
+        pr = PressRelease.objects.only('id', 'views', payload_field('detail', lang)).get(
             slug=slug,
             is_published=True
         )
-
-        # Increment view count
-        pr.increment_views()
-
-        # Get related news (same category, excluding current article)
-        related_news = []
-        if pr.category:
-            related_qs = PressRelease.objects.filter(
-                is_published=True,
-                category=pr.category
-            ).exclude(id=pr.id).select_related('category', 'featured_image')[:3]
-
-            related_news = [
-                {
-                    "id": r.id,
-                    "title": r.title,
-                    "slug": r.slug,
-                    "excerpt": r.excerpt,
-                    "featured_image": request.build_absolute_uri(r.featured_image.file.url) if r.featured_image else None,
-                    "published_date": r.published_date.isoformat(),
-                    "category_name": r.category.name if r.category else None,
-                    "category_slug": r.category.slug if r.category else None,
-                }
-                for r in related_qs
-            ]
-
-        data = {
-            "id": pr.id,
-            "title": pr.title,
-            "title_te": pr.title_te,
-            "slug": pr.slug,
-            "excerpt": pr.excerpt,
-            "excerpt_te": pr.excerpt_te,
-            "body": pr.body,
-            "body_te": pr.body_te,
-            "featured_image": request.build_absolute_uri(pr.featured_image.file.url) if pr.featured_image else None,
-            "category": {
-                "id": pr.category.id,
-                "name": pr.category.name,
-                "name_te": pr.category.name_te,
-                "slug": pr.category.slug,
-            } if pr.category else None,
-            "author": pr.author,
-            "tags": [tag.name for tag in pr.tags.all()],
-            "is_featured": pr.is_featured,
-            "published_date": pr.published_date.isoformat(),
-            "created_at": pr.created_at.isoformat(),
-            "updated_at": pr.updated_at.isoformat(),
-            "views": pr.views,
-            "related_news": related_news,
-        }
-        return Response(data)
     except PressRelease.DoesNotExist:
-        return Response({"error": "Press release not found"}, status=404)
\ No newline at end of file
+        return Response({"error": "Press release not found"}, status=404)
+
+    # Reads are counted by press_release_view: the page may be served from
+    # the API snapshot without reaching Django (see cms.snapshot)
+    return press_release_detail_response(request, pr, lang)
+
+
+@api_view(['POST'])
+def press_release_view(request, slug):
+    """Count a read of an article, sent by the site once the page is shown."""
+    pk = PressRelease.objects.filter(slug=slug, is_published=True).values_list('pk', flat=True).first()
+    if pk is None:
+        return Response({"error": "Press release not found"}, status=404)
+    view_counter.increment(pk)
+    return Response(status=204)
+
+
+@conditional_on(PressRelease, NewsCategory)
+def press_release_detail_response(request, pr, lang):
+    return Response(press_release_detail_data(pr, lang, site_origin(request)))
+
+
+def press_release_detail_data(pr, lang, origin):
+    """
+    The detail response of ``pr`` in ``lang``, with URLs under ``origin``.
+
+    ``pr`` needs ``id``, ``views`` and its detail payload column loaded.
+    """
+    related = [link.target for link in related_news_links(pr, lang)]
+    return detail_data_from_payloads(
+        pr, lang, origin,
+        load_payloads([pr], payload_field('detail', lang))[0],
+        load_payloads(related, payload_field('list', lang)),
+    )
+
+
+def related_news_links(pr, lang):
+    """Related news of ``pr``, precomputed by content similarity (see cms.related)."""
+    return RelatedPressRelease.objects.filter(
+        source=pr,
+        target__is_published=True,
+    ).select_related('target').only('target__id', f'target__{payload_field("list", lang)}').order_by('rank')
+
+
+def detail_data_from_payloads(pr, lang, origin, payload, related_payloads):
+    """The detail response from the decoded payloads of ``pr`` and of its related news."""
+    # Pre-rendered payloads (see cms.prerender) plus the live view count
+    data = absolute_payload(payload, origin)
+    data["views"] = pr.views
+    data["related_news"] = [
+        {key: item[key] for key in RELATED_NEWS_KEYS}
+        for item in (absolute_payload(item, origin) for item in related_payloads)
+    ]
+    if lang:
+        data["lang"] = lang
+    return data
+
+
+# Streamed rather than rendered by DRF, which would build the whole body in memory
+@conditional_on(PressRelease, NewsCategory)
+@require_safe
+def press_releases_export(request):
+    try:
+        export_format, press_releases = export_query(request)
+    except InvalidParameter as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return export_response(export_lines(press_releases, request, export_format), export_format)
+
+
+def export_query(request):
+    """``(format, queryset)`` of an export request."""
+    export_format = request.GET.get('format', 'ndjson')
+    category = request.GET.get('category', None)
+    since = request.GET.get('since', None)
+
+    if export_format not in EXPORT_FORMATS:
+        raise InvalidParameter(f"Unknown format: {export_format}")
+
+    press_releases = PressRelease.objects.filter(is_published=True)
+
+    if category:
+        press_releases = press_releases.filter(category__slug=category)
+
+    # ?since=<ISO date or datetime>: only articles changed since then
+    if since:
+        try:
+            since_date = parse_datetime(since)
+        except ValueError:
+            since_date = None
+        if since_date is None:
+            raise InvalidParameter("Invalid since, expected an ISO 8601 date or datetime")
+        if timezone.is_naive(since_date):
+            since_date = timezone.make_aware(since_date)
+        press_releases = press_releases.filter(updated_at__gte=since_date)
+
+    return export_format, press_releases
+
+
+def export_response(lines, export_format):
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="news.{export_format}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def api_cache_stats(request):
+    return Response({"endpoints": cache_stats()})
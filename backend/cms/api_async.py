@@ -0,0 +1,175 @@
+"""
+Async versions of the cms API views, routed when CMS_ASYNC_VIEWS is set
+(``config.asgi`` sets it).
+
+Under ASGI a sync view runs on a thread from start to finish, so every
+request waiting on the database holds one. These views await the async
+ORM instead and share everything else with ``cms.api``: parameter parsing,
+serialization, cached responses, ETags and error messages, so both answer
+with the same bytes. Django's async ORM still runs each query on a thread,
+since the database drivers are synchronous; what is saved is holding one
+between queries and while the response is rendered and sent.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_safe
+
+from .api import (
+    GALLERY_FILTERS,
+    GALLERY_ORDERING,
+    GALLERY_PAGE_SIZE,
+    NEWS_FILTERS,
+    InvalidParameter,
+    detail_data_from_payloads,
+    export_query,
+    export_response,
+    gallery_categories_data,
+    gallery_images_data,
+    gallery_images_queryset,
+    news_categories_data,
+    news_list_data,
+    news_list_query,
+    notifications_data,
+    page_size,
+    related_news_links,
+)
+from .cache import acached_count, cached_api_view
+from .conditional import conditional_on
+from .counters import view_counter
+from .export import aexport_lines
+from .languages import InvalidLanguage, request_language, vary_on_language
+from .models import (
+    Notification,
+    GalleryCategory,
+    GalleryImage,
+    NewsCategory,
+    PressRelease,
+    tag_names_by_press_release,
+)
+from .pagination import InvalidCursor, apaginate
+from .prerender import aload_payloads, payload_field, site_origin
+from .renderers import JSONResponse
+
+
+@conditional_on(Notification)
+@require_safe
+@cached_api_view('notifications', Notification)
+async def notifications_list(request):
+    notifications = [n async for n in Notification.objects.filter(is_active=True)]
+    return JSONResponse(notifications_data(notifications))
+
+
+@conditional_on(GalleryCategory)
+@require_safe
+@cached_api_view('gallery-categories', GalleryCategory)
+async def gallery_categories_list(request):
+    return JSONResponse(gallery_categories_data([cat async for cat in GalleryCategory.objects.all()]))
+
+
+@conditional_on(GalleryImage, GalleryCategory)
+@require_safe
+@cached_api_view(
+    'gallery-images', GalleryImage, GalleryCategory,
+    params=('category', 'date_from', 'date_to', 'limit', 'cursor'),
+)
+async def gallery_images_list(request):
+    try:
+        images = gallery_images_queryset(request)
+    except InvalidParameter as exc:
+        return JSONResponse({"error": str(exc)}, status=400)
+
+    total_count = await acached_count(
+        request, 'gallery-images', images, (GalleryImage, GalleryCategory), params=GALLERY_FILTERS,
+    )
+
+    try:
+        page = await apaginate(
+            images, GALLERY_ORDERING, request.GET.get('cursor', None), page_size(request, GALLERY_PAGE_SIZE),
+        )
+    except InvalidCursor:
+        return JSONResponse({"error": "Invalid cursor"}, status=400)
+
+    return JSONResponse(gallery_images_data(page, total_count, request))
+
+
+@conditional_on(NewsCategory)
+@require_safe
+@cached_api_view('news-categories', NewsCategory)
+async def news_categories_list(request):
+    return JSONResponse(news_categories_data([cat async for cat in NewsCategory.objects.all()]))
+
+
+@vary_on_language
+@conditional_on(PressRelease, NewsCategory)
+@require_safe
+@cached_api_view(
+    'news', PressRelease, NewsCategory,
+    params=('category', 'featured', 'search', 'limit', 'cursor', 'fields', 'lang'),
+)
+async def press_releases_list(request):
+    try:
+        query = news_list_query(request)
+    except InvalidParameter as exc:
+        return JSONResponse({"error": str(exc)}, status=400)
+
+    total_count = await acached_count(
+        request, 'news', query.queryset, (PressRelease, NewsCategory), params=NEWS_FILTERS,
+    )
+
+    try:
+        page = await apaginate(query.queryset, query.ordering, query.cursor, query.page_size)
+    except InvalidCursor:
+        return JSONResponse({"error": "Invalid cursor"}, status=400)
+
+    payloads = await aload_payloads(page.items, query.list_field) if query.prerendered else None
+    tags = await sync_to_async(tag_names_by_press_release)([pr.id for pr in page.items]) if query.needs_tags else {}
+    return JSONResponse(news_list_data(query, page, total_count, request, payloads, tags))
+
+
+@vary_on_language
+@require_safe
+async def press_release_detail(request, slug):
+    try:
+        lang = request_language(request)
+    except InvalidLanguage:
+        return JSONResponse({"error": "Invalid lang, expected en, te or auto"}, status=400)
+
+    try:
+        pr = await PressRelease.objects.only('id', 'views', payload_field('detail', lang)).aget(
+            slug=slug,
+            is_published=True
+        )
+    except PressRelease.DoesNotExist:
+        return JSONResponse({"error": "Press release not found"}, status=404)
+
+    return await press_release_detail_response(request, pr, lang)
+
+
+@csrf_exempt
+@require_POST
+async def press_release_view(request, slug):
+    pk = await PressRelease.objects.filter(slug=slug, is_published=True).values_list('pk', flat=True).afirst()
+    if pk is None:
+        return JSONResponse({"error": "Press release not found"}, status=404)
+    # Flushes to the database on the spot when CMS_VIEW_COUNT_FLUSH_INTERVAL is 0
+    await sync_to_async(view_counter.increment)(pk)
+    return HttpResponse(status=204)
+
+
+@conditional_on(PressRelease, NewsCategory)
+async def press_release_detail_response(request, pr, lang):
+    related = [link.target async for link in related_news_links(pr, lang)]
+    [payload] = await aload_payloads([pr], payload_field('detail', lang))
+    related_payloads = await aload_payloads(related, payload_field('list', lang))
+    return JSONResponse(detail_data_from_payloads(pr, lang, site_origin(request), payload, related_payloads))
+
+
+@conditional_on(PressRelease, NewsCategory)
+@require_safe
+async def press_releases_export(request):
+    try:
+        export_format, press_releases = export_query(request)
+    except InvalidParameter as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return export_response(aexport_lines(press_releases, request, export_format), export_format)
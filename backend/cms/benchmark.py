@@ -0,0 +1,320 @@
+"""
+Synthetic dataset and endpoint measurements for the cms API benchmarks.
+
+Used by the ``benchmark_api`` management command, which runs everything in
+a throwaway test database so it never touches real content.
+"""
+import json
+import os
+import random
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from importlib.util import find_spec
+
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from taggit.models import Tag
+from wagtail.images.models import Image
+
+from .fulltext import update_search_vectors
+from .models import (
+    GalleryCategory,
+    GalleryImage,
+    NewsCategory,
+    PressRelease,
+    PressReleaseTag,
+)
+from .pagination import encode_cursor
+from .prerender import refresh_payloads
+from .renderers import ORJSONRenderer
+from .related import rebuild_all as rebuild_related_news
+
+
+# Renderers compared on a large news page, against DRF's default first
+RENDERERS = (JSONRenderer, ORJSONRenderer)
+RENDERER_REQUEST = ('/api/v2/news/', {'limit': 100})
+
+# A cheap endpoint, where connection setup dominates the request
+CONNECTION_REQUEST = ('/api/v2/notifications/', {})
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_budgets.json')
+
+# Dataset sizes per scale preset
+SCALES = {
+    'small': {'articles': 1_000, 'gallery_images': 1_000, 'categories': 8, 'tags': 100},
+    'medium': {'articles': 10_000, 'gallery_images': 10_000, 'categories': 12, 'tags': 500},
+    'large': {'articles': 100_000, 'gallery_images': 50_000, 'categories': 20, 'tags': 2_000},
+}
+
+WORDS = (
+    'minority welfare scheme scholarship distribution training telangana district '
+    'empowerment education women youth loan subsidy certificate programme launch '
+    'hyderabad warangal ceremony beneficiaries development community skill'
+).split()
+
+BATCH_SIZE = 2_000
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed_dataset(articles, gallery_images, categories, tags, seed=0):
+    """Bulk insert a synthetic archive of the given size."""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    news_categories = NewsCategory.objects.bulk_create([
+        NewsCategory(name=f'Category {i}', name_te=f'వర్గం {i}', slug=f'category-{i}')
+        for i in range(categories)
+    ])
+    gallery_categories = GalleryCategory.objects.bulk_create([
+        GalleryCategory(name=f'Gallery {i}', slug=f'gallery-{i}')
+        for i in range(categories)
+    ])
+    tag_objects = Tag.objects.bulk_create([
+        Tag(name=f'Tag {i}', slug=f'tag-{i}') for i in range(tags)
+    ])
+
+    # Image rows only; files are never read by the API, only their URLs.
+    images = Image.objects.bulk_create([
+        Image(title=f'Image {i}', file=f'original_images/bench-{i}.jpg', width=1600, height=1200)
+        for i in range(max(articles, gallery_images))
+    ], batch_size=BATCH_SIZE)
+
+    body = ''.join(f'<p>{_sentence(rng, 40)}</p>' for _ in range(6))
+    press_releases = PressRelease.objects.bulk_create([
+        PressRelease(
+            title=_sentence(rng, 10),
+            title_te=f'వార్త {i}',
+            slug=f'article-{i}',
+            excerpt=_sentence(rng, 25),
+            excerpt_te=f'సారాంశం {i}',
+            body=body,
+            body_te=body,
+            featured_image=images[i],
+            category=rng.choice(news_categories),
+            is_published=rng.random() < 0.95,
+            is_featured=rng.random() < 0.05,
+            published_date=now - timedelta(minutes=i * 37),
+        )
+        for i in range(articles)
+    ], batch_size=BATCH_SIZE)
+    PressReleaseTag.objects.bulk_create([
+        PressReleaseTag(content_object=press_release, tag=tag)
+        for press_release in press_releases
+        for tag in rng.sample(tag_objects, min(3, len(tag_objects)))
+    ], batch_size=BATCH_SIZE)
+    update_search_vectors(PressRelease.objects.all())
+    refresh_payloads(PressRelease.objects.values_list('pk', flat=True))
+    rebuild_related_news()
+
+    GalleryImage.objects.bulk_create([
+        GalleryImage(
+            image=images[i],
+            title=_sentence(rng, 6),
+            date=date.today() - timedelta(days=i // 10),
+            category=rng.choice(gallery_categories),
+        )
+        for i in range(gallery_images)
+    ], batch_size=BATCH_SIZE)
+
+
+def benchmark_requests():
+    """Return ``(name, path, params)`` for every measured endpoint."""
+    published = PressRelease.objects.filter(is_published=True).order_by('-published_date', '-id')
+    middle = published[published.count() // 2]
+    article = published.first()
+    category = NewsCategory.objects.first()
+    gallery_category = GalleryCategory.objects.first()
+    return [
+        ('notifications', '/api/v2/notifications/', {}),
+        ('gallery-categories', '/api/v2/gallery/categories/', {}),
+        ('gallery-images', '/api/v2/gallery/images/', {'limit': 48}),
+        ('gallery-images-category', '/api/v2/gallery/images/', {'limit': 48, 'category': gallery_category.slug}),
+        ('news-categories', '/api/v2/news/categories/', {}),
+        ('news-list', '/api/v2/news/', {'limit': 20}),
+        ('news-list-category', '/api/v2/news/', {'limit': 20, 'category': category.slug}),
+        ('news-list-featured', '/api/v2/news/', {'limit': 3, 'featured': 'true'}),
+        ('news-list-search', '/api/v2/news/', {'limit': 20, 'search': 'scholarship education'}),
+        ('news-list-deep-page', '/api/v2/news/', {
+            'limit': 20,
+            'cursor': encode_cursor([middle.published_date.isoformat(), middle.id]),
+        }),
+        ('news-detail', f'/api/v2/news/{article.slug}/', {}),
+        ('news-list-te', '/api/v2/news/', {'limit': 20, 'lang': 'te'}),
+        ('news-detail-te', f'/api/v2/news/{article.slug}/', {'lang': 'te'}),
+    ]
+
+
+@dataclass
+class Measurement:
+    name: str
+    p50_ms: float
+    p95_ms: float
+    queries: int
+    bytes: int
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(fraction * (len(values) - 1)))]
+
+
+def measure(name, path, params, iterations, warm=False):
+    client = Client()
+    timings, queries, size = [], 0, 0
+    for _ in range(iterations):
+        if not warm:
+            cache.clear()
+        # Keep the debug query log below its cap so every query is captured.
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(path, params)
+            timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{name}: {path} returned {response.status_code}')
+        queries = max(queries, len(captured))
+        size = len(response.content)
+    return Measurement(
+        name=name,
+        p50_ms=round(statistics.median(timings), 2),
+        p95_ms=round(_percentile(timings, 0.95), 2),
+        queries=queries,
+        bytes=size,
+    )
+
+
+@dataclass
+class RendererMeasurement:
+    name: str
+    mean_ms: float
+    bytes: int
+    matches_default: bool
+
+
+def compare_renderers(iterations):
+    """Time every renderer on the same news page and check its output matches JSONRenderer's."""
+    path, params = RENDERER_REQUEST
+    response = Client().get(path, params)
+    if response.status_code != 200:
+        raise RuntimeError(f'{path} returned {response.status_code}')
+    expected = RENDERERS[0]().render(response.data)
+    measurements = []
+    for renderer_class in RENDERERS:
+        renderer = renderer_class()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            output = renderer.render(response.data)
+        measurements.append(RendererMeasurement(
+            name=renderer_class.__name__,
+            mean_ms=round((time.perf_counter() - start) * 1000 / iterations, 3),
+            bytes=len(output),
+            matches_default=output == expected,
+        ))
+    return measurements
+
+
+@dataclass
+class ConnectionMeasurement:
+    name: str
+    mean_ms: float
+    p95_ms: float
+    # Database connections opened over all the requests
+    connections: int
+
+
+def connection_modes():
+    """``(name, CONN_MAX_AGE, pool options)`` for every connection setup to compare."""
+    # SQLite's in-memory test database is never closed, so the first two match there
+    modes = [('per-request', 0, None), ('persistent', 600, None)]
+    if connection.vendor == 'postgresql' and find_spec('psycopg_pool') is not None:
+        modes.append(('pool', 0, {'min_size': 1, 'max_size': 2}))
+    return modes
+
+
+def compare_connections(iterations):
+    """
+    Time ``CONNECTION_REQUEST`` with each connection setup.
+
+    Requests go through the WSGI handler, which closes or recycles the
+    connection when a request ends as it does under gunicorn (the test
+    client keeps it open). The response cache is cleared before every
+    request so each one queries the database.
+    """
+    path, params = CONNECTION_REQUEST
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    settings_dict = connection.settings_dict
+    saved = (settings_dict['CONN_MAX_AGE'], settings_dict['CONN_HEALTH_CHECKS'], settings_dict['OPTIONS'])
+    opened = []
+
+    def count_connection(sender, **kwargs):
+        opened.append(sender)
+
+    measurements = []
+    connection_created.connect(count_connection)
+    try:
+        for name, max_age, pool in connection_modes():
+            connection.close()
+            settings_dict['CONN_MAX_AGE'] = max_age
+            settings_dict['CONN_HEALTH_CHECKS'] = True
+            settings_dict['OPTIONS'] = {**saved[2], 'pool': pool} if pool else saved[2]
+            opened.clear()
+            timings = []
+            for _ in range(iterations):
+                cache.clear()
+                start = time.perf_counter()
+                response = handler(factory.get(path, params).environ, lambda status, headers: None)
+                b''.join(response)
+                response.close()
+                timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{path} returned {response.status_code}')
+            if pool:
+                # Every checkout from the pool counts as a created connection
+                connections = connection.pool.get_stats()['connections_num']
+                connection.close()
+                connection.close_pool()
+            else:
+                connections = len(opened)
+            measurements.append(ConnectionMeasurement(
+                name=name,
+                mean_ms=round(statistics.mean(timings), 3),
+                p95_ms=round(_percentile(timings, 0.95), 3),
+                connections=connections,
+            ))
+    finally:
+        connection_created.disconnect(count_connection)
+        connection.close()
+        settings_dict['CONN_MAX_AGE'], settings_dict['CONN_HEALTH_CHECKS'], settings_dict['OPTIONS'] = saved
+    return measurements
+
+
+def load_budgets(path, scale):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get(scale, {})
+
+
+def check_budget(measurement, budget):
+    """Return a description of every budget ``measurement`` exceeds."""
+    failures = []
+    for metric, limit_key in (('queries', 'max_queries'), ('p95_ms', 'p95_ms'), ('bytes', 'max_bytes')):
+        limit = budget.get(limit_key)
+        value = getattr(measurement, metric)
+        if limit is not None and value > limit:
+            failures.append(f'{measurement.name}: {metric} {value} > {limit}')
+    return failures
+
+
+def as_dict(measurement):
+    return asdict(measurement)
@@ -0,0 +1,264 @@
+"""
+Versioned response cache for the cms API.
+
+Cached payloads are keyed by endpoint, the normalized query parameters and
+the current version of every model the payload is built from. Versions are
+rows in the database (``ContentVersion``), moved once a transaction that
+changed the model commits (see ``cms.signals``), so a write makes the old
+entries unreachable in every worker instead of waiting for a TTL to expire,
+and the ETags of ``cms.conditional`` always match the cached body. They are
+read in one query per request.
+"""
+import hashlib
+import threading
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .compression import body_key, cached_response
+from .languages import negotiate_language
+from .models import ContentVersion
+from .renderers import JSONResponse
+
+
+# Endpoint names registered through cached_api_view, reported by cache_stats()
+CACHED_ENDPOINTS = []
+
+
+def _stats_key(endpoint, outcome):
+    return f'cms:stats:{endpoint}:{outcome}'
+
+
+def _versions_query():
+    return ContentVersion.objects.values_list('model', 'version', 'updated_at')
+
+
+def content_versions(request=None):
+    """
+    ``{model label: (version, updated_at)}`` of every versioned model.
+
+    Read once per ``request``, so its ETag, Last-Modified and cache keys
+    agree even if a write commits while it is being answered.
+    """
+    # The HttpRequest behind a DRF request
+    request = getattr(request, '_request', request)
+    versions = getattr(request, '_cms_versions', None)
+    if versions is None:
+        versions = {label: (version, updated_at) for label, version, updated_at in _versions_query()}
+        if request is not None:
+            request._cms_versions = versions
+    return versions
+
+
+async def acontent_versions(request=None):
+    """``content_versions`` for async views."""
+    request = getattr(request, '_request', request)
+    versions = getattr(request, '_cms_versions', None)
+    if versions is None:
+        versions = {label: (version, updated_at) async for label, version, updated_at in _versions_query()}
+        if request is not None:
+            request._cms_versions = versions
+    return versions
+
+
+def get_versions(models, request=None):
+    versions = content_versions(request)
+    return [versions.get(model._meta.label_lower, (0, None))[0] for model in models]
+
+
+_scheduled = threading.local()
+
+
+def bump_version(*models):
+    """
+    Move the version of ``models`` when the transaction commits.
+
+    Moved earlier, a concurrent request could cache the rows it still sees
+    from before the commit under the new version. Models bumped in the same
+    transaction are moved together.
+    """
+    pending = getattr(_scheduled, 'labels', None)
+    if pending is None:
+        pending = _scheduled.labels = set()
+    # Labels left over from a rolled back transaction are moved with these;
+    # a callback is registered every time since theirs never ran.
+    pending.update(model._meta.label_lower for model in models)
+
+    def run():
+        labels = sorted(pending)
+        pending.clear()
+        if labels:
+            _bump(labels)
+
+    transaction.on_commit(run)
+
+
+def _bump(labels):
+    now = timezone.now()
+    with transaction.atomic():
+        for label in labels:
+            moved = ContentVersion.objects.filter(model=label).update(version=F('version') + 1, updated_at=now)
+            if not moved:
+                ContentVersion.objects.get_or_create(model=label, defaults={'version': 1, 'updated_at': now})
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def normalize_params(request, names):
+    """Reduce the query string to the parameters that shape the payload."""
+    params = []
+    for name in sorted(names):
+        value = request.GET.get(name, '').strip()
+        if not value:
+            continue
+        if name == 'featured':
+            if value != 'true':
+                continue
+        elif name == 'limit':
+            try:
+                value = str(int(value))
+            except ValueError:
+                continue
+        elif name == 'search':
+            value = value.casefold()
+        elif name == 'fields':
+            value = ','.join(sorted({field.strip() for field in value.split(',')}))
+        elif name == 'lang' and value == 'auto':
+            # Keyed by the negotiated language, not the raw header
+            value = negotiate_language(request.headers.get('Accept-Language'))
+        params.append(f'{name}={value}')
+    return '&'.join(params)
+
+
+def response_cache_key(request, endpoint, models, params=(), view_kwargs=None):
+    versions = '.'.join(str(v) for v in get_versions(models, request))
+    # Payloads embed absolute URLs, so the scheme and host are part of the key.
+    parts = [
+        request.build_absolute_uri('/'),
+        normalize_params(request, params),
+        '&'.join(f'{k}={v}' for k, v in sorted((view_kwargs or {}).items())),
+    ]
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return f'cms:api:{endpoint}:{versions}:{digest}'
+
+
+def _lookup(request, endpoint, models, params, view_kwargs):
+    """``(key, response, data)``: a cached compressed response or else the cached payload."""
+    key = response_cache_key(request, endpoint, models, params, view_kwargs)
+    response = cached_response(request, key)
+    data = cache.get(key) if response is None else None
+    _incr(_stats_key(endpoint, 'hits' if response is not None or data is not None else 'misses'))
+    return key, response, data
+
+
+def cached_api_view(endpoint, *models, params=()):
+    """
+    Cache the ``data`` of successful responses from a DRF function view.
+
+    Apply it below ``@api_view`` so the wrapped view receives the DRF request.
+    Async views (see ``cms.api_async``) return a ``JSONResponse`` instead and
+    share the sync view's entries. Only ``params`` take part in the key;
+    other query parameters are ignored. A compressed body the client
+    accepts is returned as cached (see ``cms.compression``).
+    """
+    # The sync and async views of an endpoint share its entries and counters
+    if endpoint not in CACHED_ENDPOINTS:
+        CACHED_ENDPOINTS.append(endpoint)
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapped(request, *args, **kwargs):
+                key, response, data = await sync_to_async(_lookup)(request, endpoint, models, params, kwargs)
+                if response is not None:
+                    return response
+                if data is not None:
+                    response = JSONResponse(data)
+                else:
+                    response = await view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    await cache.aset(key, response.data)
+                # Compressed bodies are cached next to the entry (see cms.compression)
+                response.cms_body_key = body_key(request, key)
+                return response
+            return async_wrapped
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            key, response, data = _lookup(request, endpoint, models, params, kwargs)
+            if response is not None:
+                return response
+            if data is not None:
+                response = Response(data)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.data)
+            response.cms_body_key = body_key(request, key)
+            return response
+        return wrapped
+    return decorator
+
+
+def cached_count(request, endpoint, queryset, models, params=()):
+    """
+    Return ``queryset.count()`` cached under the same versions as the payload.
+
+    Pass only the filtering ``params`` so every page of a listing shares one
+    count instead of running COUNT(*) per page.
+    """
+    key = _count_key(request, endpoint, models, params)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count)
+    return count
+
+
+async def acached_count(request, endpoint, queryset, models, params=()):
+    """``cached_count`` for async views."""
+    key = await sync_to_async(_count_key)(request, endpoint, models, params)
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count)
+    return count
+
+
+def _count_key(request, endpoint, models, params):
+    versions = '.'.join(str(v) for v in get_versions(models, request))
+    digest = hashlib.md5(normalize_params(request, params).encode()).hexdigest()
+    return f'cms:count:{endpoint}:{versions}:{digest}'
+
+
+def cache_stats():
+    keys = [
+        _stats_key(endpoint, outcome)
+        for endpoint in CACHED_ENDPOINTS
+        for outcome in ('hits', 'misses')
+    ]
+    counters = cache.get_many(keys)
+    stats = {}
+    for endpoint in CACHED_ENDPOINTS:
+        hits = counters.get(_stats_key(endpoint, 'hits'), 0)
+        misses = counters.get(_stats_key(endpoint, 'misses'), 0)
+        total = hits + misses
+        stats[endpoint] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+        }
+    return stats
@@ -0,0 +1,155 @@
+"""
+Compressed responses for the cms API.
+
+Responses under /api/v2/ are compressed with brotli (when the ``brotli``
+package is installed) or gzip, whichever the client accepts and prefers.
+For JSON responses served through ``cached_api_view`` the compressed bytes
+are cached next to the payload entry, at a higher compression level, and
+keyed like it by the content versions: once cached, ``cached_api_view``
+returns them before the payload is read, rendered or compressed, so a hot
+response is compressed once and served many times. Compressed responses
+carry a weak ETag, as Django's ``GZipMiddleware`` does, since the bytes no
+longer match the representation the ETag was computed for.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+API_PREFIX = '/api/v2/'
+
+# Smaller bodies aren't worth the header overhead and CPU
+MIN_LENGTH = 200
+
+# Encodings in order of preference for equal q-values
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _compress(content, encoding, cached):
+    # Cached bodies are compressed once, so they get the slow, small setting
+    if encoding == 'br':
+        return brotli.compress(content, quality=11 if cached else 4)
+    return gzip.compress(content, compresslevel=9 if cached else 6, mtime=0)
+
+
+def negotiate_encoding(accept_encoding):
+    """The preferred encoding in an Accept-Encoding header, or None."""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        try:
+            q = float(params.strip()[2:]) if params.strip().startswith('q=') else 1.0
+        except ValueError:
+            continue
+        weights[coding] = q
+    best = None
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get('*', 0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def body_key(request, key):
+    """
+    Cache key of the body rendered from the ``cached_api_view`` entry ``key``,
+    or None if it isn't JSON.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is None:
+        # The async views render JSONResponse
+        return f'{key}:application/json'
+    if renderer.format != 'json':
+        # The browsable API page shows the user and a CSRF token
+        return None
+    # Covers the indent a client can ask for
+    return f'{key}:{request.accepted_media_type}'
+
+
+def cached_response(request, key):
+    """
+    A response with the cached compressed body of the ``cached_api_view``
+    entry ``key``, or None if the client accepts none that is cached.
+    """
+    body = body_key(request, key)
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if body is None or encoding is None:
+        return None
+    content = cache.get(f'{body}:{encoding}')
+    if content is None:
+        return None
+
+    response = HttpResponse(content, content_type=body.rsplit(':', 1)[1])
+    response.headers['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    # Its ETag is set further out and weakened by compress_response
+    response.cms_compressed = True
+    return response
+
+
+def compressed_content(response, encoding):
+    """
+    The compressed body of ``response``, cached when it is smaller and came
+    from ``cached_api_view``.
+    """
+    body = getattr(response, 'cms_body_key', None)
+    content = _compress(response.content, encoding, cached=body is not None)
+    if body is not None and len(content) < len(response.content):
+        cache.set(f'{body}:{encoding}', content)
+    return content
+
+
+def _weaken_etag(response):
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+
+
+def compress_response(request, response):
+    """Compress ``response`` in place if it is an API response worth compressing."""
+    if not request.path.startswith(API_PREFIX):
+        return response
+
+    if getattr(response, 'cms_compressed', False):
+        _weaken_etag(response)
+        return response
+
+    if response.streaming or response.has_header('Content-Encoding') or len(response.content) < MIN_LENGTH:
+        return response
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    content = compressed_content(response, encoding)
+    if len(content) >= len(response.content):
+        return response
+
+    response.content = content
+    response.headers['Content-Length'] = str(len(content))
+    response.headers['Content-Encoding'] = encoding
+    _weaken_etag(response)
+    return response
+
+
+@sync_and_async_middleware
+def CompressionMiddleware(get_response):
+    # Async under ASGI, so streamed responses don't pass through a thread
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            return compress_response(request, await get_response(request))
+    else:
+        def middleware(request):
+            return compress_response(request, get_response(request))
+    return middleware
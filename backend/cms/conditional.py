@@ -0,0 +1,58 @@
+"""
+Conditional GET support for the cms API.
+
+Every endpoint is validated against the content versions of the models its
+payload is built from (see ``cms.cache``): one primary key read for all of
+them, shared with the response cache, so an unchanged re-read is answered
+with a 304 before the real query and serialization run.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.views.decorators.http import condition
+
+from .cache import acontent_versions, content_versions
+from .languages import negotiate_language
+
+
+def _content_versions(request, models):
+    # Read once per request, by the ETag and Last-Modified callbacks alike
+    versions = content_versions(request)
+    return [versions.get(model._meta.label_lower, (0, None)) for model in models]
+
+
+def conditional_on(*models):
+    """
+    Decorate an API view so it honours If-None-Match / If-Modified-Since.
+
+    The ETag covers the full request path, so each combination of query
+    parameters gets its own validator, and the negotiated language of
+    ``?lang=auto``. Deletions move the versions too, so they change the
+    ETag and Last-Modified like any other write.
+    """
+    def etag(request, *args, **kwargs):
+        parts = [request.get_full_path()]
+        if request.GET.get('lang', '').strip() == 'auto':
+            parts.append(negotiate_language(request.headers.get('Accept-Language')))
+        for version, _ in _content_versions(request, models):
+            parts.append(str(version))
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        stamps = [stamp for _, stamp in _content_versions(request, models) if stamp]
+        return max(stamps) if stamps else None
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+        if not iscoroutinefunction(view):
+            return conditional_view
+
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            # condition() calls the validators synchronously, so load what
+            # they read beforehand
+            await acontent_versions(request)
+            return await conditional_view(request, *args, **kwargs)
+        return wrapped
+    return decorator
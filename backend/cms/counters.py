@@ -0,0 +1,107 @@
+"""
+Write-behind view counter for press releases.
+
+Article reads are accumulated in process and flushed by a background thread
+as one ``UPDATE ... SET views = views + delta`` per article, instead of a
+row-locking read-modify-write on every request. Pending counts are flushed
+at interpreter exit, which covers gunicorn's graceful worker shutdown.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, model_label, field='views'):
+        self.model_label = model_label
+        self.field = field
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'CMS_VIEW_COUNT_FLUSH_INTERVAL', 10)
+
+    def increment(self, pk):
+        """Record a view and return the number of views not yet flushed for ``pk``."""
+        with self._lock:
+            self._pending[pk] += 1
+            pending = self._pending[pk]
+
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._ensure_flusher()
+        return pending
+
+    def pending(self, pk):
+        with self._lock:
+            return self._pending.get(pk, 0)
+
+    def flush(self):
+        """Write all pending counts to the database and return how many views were flushed."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        model = apps.get_model(self.model_label)
+        try:
+            with transaction.atomic():
+                # Lock rows in a stable order so concurrent workers can't deadlock.
+                for pk, delta in sorted(pending.items()):
+                    model.objects.filter(pk=pk).update(**{self.field: F(self.field) + delta})
+        except Exception:
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return sum(pending.values())
+
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='cms-view-counter', daemon=True)
+            self._thread.start()
+            atexit.register(self._flush_at_exit)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush view counts, will retry')
+            finally:
+                connection.close()
+
+    def _flush_at_exit(self):
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to flush view counts on shutdown')
+
+    def _reset_after_fork(self):
+        # Counts belong to the parent; the child starts its own flusher lazily.
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+
+view_counter = ViewCounter('cms.PressRelease')
@@ -0,0 +1,125 @@
+"""
+Server-Sent Events stream of the notification ticker.
+
+Instead of polling /api/v2/notifications/, clients open an ``EventSource``
+on /api/v2/notifications/stream/. It sends the active notifications once
+and then again whenever the Notification content version changes (moved
+from model signals, see ``cms.cache``), with a comment line as a
+heartbeat in between. The event id is that version, so a reconnecting
+client that already has the current set is only sent heartbeats.
+
+Streams are async, so under ASGI an idle connection is a parked coroutine
+rather than a worker. Versions are read from the database at most once per
+poll interval and the payload is rendered once per version, however many
+clients are connected. Served over WSGI, where each stream would hold a
+worker, the view answers once and the client reconnects after the retry
+delay, which makes it a conditional poll.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from .api import notifications_data
+from .cache import get_versions
+from .models import Notification
+from .renderers import ORJSONRenderer
+
+
+# Latest version read, and when
+_version = (None, None)
+
+# Latest version's rendered payload, and the render in progress
+_payload = (None, None)
+_rendering = None
+
+
+def _settings():
+    return (
+        getattr(settings, 'CMS_NOTIFICATIONS_POLL_INTERVAL', 2),
+        getattr(settings, 'CMS_NOTIFICATIONS_HEARTBEAT_INTERVAL', 15),
+        getattr(settings, 'CMS_NOTIFICATIONS_STREAM_MAX_AGE', 300),
+    )
+
+
+async def current_version():
+    """The Notification content version, read at most once per poll interval."""
+    global _version
+    checked_at, version = _version
+    poll_interval = _settings()[0]
+    if checked_at is None or time.monotonic() - checked_at >= poll_interval:
+        [version] = await sync_to_async(get_versions)((Notification,))
+        _version = (time.monotonic(), version)
+    return version
+
+
+async def _render(version):
+    global _payload, _rendering
+    try:
+        data = await sync_to_async(notifications_data)()
+        _payload = (version, ORJSONRenderer().render(data).decode())
+        return _payload[1]
+    finally:
+        if _rendering is not None and _rendering[0] == version:
+            _rendering = None
+
+
+async def _render_payload(version):
+    global _rendering
+    rendered_version, payload = _payload
+    if rendered_version == version:
+        return payload
+    # Streams that see a new version together share one query, and one
+    # database connection, instead of each running its own
+    if _rendering is None or _rendering[0] != version:
+        _rendering = (version, asyncio.ensure_future(_render(version)))
+    return await _rendering[1]
+
+
+async def _event(version):
+    return f'id: {version}\nevent: notifications\ndata: {await _render_payload(version)}\n\n'
+
+
+def _retry_line(seconds):
+    # Reconnection delay for EventSource, in milliseconds
+    return f'retry: {int(seconds * 1000)}\n\n'
+
+
+async def _stream(last_event_id):
+    poll_interval, heartbeat_interval, max_age = _settings()
+    yield _retry_line(poll_interval)
+    started = last_sent = time.monotonic()
+    # Closed now and then so clients spread over new workers after deploys;
+    # EventSource reconnects on its own.
+    while time.monotonic() - started < max_age:
+        version = await current_version()
+        if str(version) != last_event_id:
+            yield await _event(version)
+            last_event_id = str(version)
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= heartbeat_interval:
+            yield ': heartbeat\n\n'
+            last_sent = time.monotonic()
+        await asyncio.sleep(poll_interval)
+
+
+@require_safe
+async def notifications_stream(request):
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(_stream(last_event_id), content_type='text/event-stream')
+    else:
+        # One answer per request; the client comes back after the retry delay
+        version = await current_version()
+        body = _retry_line(_settings()[1])
+        if str(version) != last_event_id:
+            body += await _event(version)
+        response = HttpResponse(body, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stops nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,99 @@
+"""
+Query plans of the canonical cms API requests.
+
+Used by the ``explain_api_queries`` management command: each request from
+``cms.benchmark.benchmark_requests`` is served through the test client, the
+SELECTs it runs are captured and explained, and sequential scans over large
+tables are reported.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection
+
+
+SQLITE_TABLE_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+
+
+@dataclass
+class SeqScan:
+    table: str
+    rows: int
+
+
+@dataclass
+class QueryPlan:
+    sql: str
+    plan: str
+    seq_scans: list = field(default_factory=list)
+    execution_ms: float | None = None
+    shared_hit: int | None = None
+    shared_read: int | None = None
+
+
+def _walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _walk(child)
+
+
+def _format_plan(node, depth=0):
+    label = node['Node Type']
+    if 'Index Name' in node:
+        label += f" using {node['Index Name']}"
+    if 'Relation Name' in node:
+        label += f" on {node['Relation Name']}"
+    lines = [f"{'  ' * depth}{label} (rows={node['Actual Rows']} loops={node['Actual Loops']})"]
+    for child in node.get('Plans', ()):
+        lines.extend(_format_plan(child, depth + 1))
+    return lines
+
+
+def _explain_postgresql(sql, cursor):
+    cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}')
+    result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    result = result[0]
+    root = result['Plan']
+    seq_scans = [
+        SeqScan(
+            node['Relation Name'],
+            int((node['Actual Rows'] + node.get('Rows Removed by Filter', 0)) * node['Actual Loops']),
+        )
+        for node in _walk(root) if node['Node Type'] == 'Seq Scan'
+    ]
+    return QueryPlan(
+        sql=sql,
+        plan='\n'.join(_format_plan(root)),
+        seq_scans=seq_scans,
+        execution_ms=result.get('Execution Time'),
+        shared_hit=root.get('Shared Hit Blocks'),
+        shared_read=root.get('Shared Read Blocks'),
+    )
+
+
+def _explain_sqlite(sql, cursor):
+    # SQLite has no ANALYZE/BUFFERS; its plan still shows full table scans.
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+    details = [row[3] for row in cursor.fetchall()]
+    seq_scans = []
+    for detail in details:
+        match = SQLITE_TABLE_SCAN_RE.match(detail)
+        if match:
+            table = match.group(1)
+            cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+            seq_scans.append(SeqScan(table, cursor.fetchone()[0]))
+    return QueryPlan(sql=sql, plan='\n'.join(details), seq_scans=seq_scans)
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            return _explain_postgresql(sql, cursor)
+        return _explain_sqlite(sql, cursor)
+
+
+def is_select(sql):
+    return sql.lstrip().upper().startswith('SELECT')
@@ -0,0 +1,67 @@
+"""
+Full-text search over press releases.
+
+On PostgreSQL each article stores a weighted ``tsvector`` (title > excerpt >
+body) for both languages, refreshed on save and served by a GIN index.
+English uses the stemming ``english`` configuration; Telugu has its own
+``telugu`` configuration (created in migration 0004) since PostgreSQL ships
+no Telugu dictionary. Other databases fall back to substring matching.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, TextField, Value
+from django.db.models.functions import Cast
+
+
+ENGLISH_CONFIG = 'english'
+TELUGU_CONFIG = 'telugu'
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def _strip_tags(field):
+    return Func(
+        F(field), Value('<[^>]+>'), Value(' '), Value('g'),
+        function='regexp_replace', output_field=TextField(),
+    )
+
+
+def press_release_search_vector():
+    return (
+        SearchVector('title', weight='A', config=ENGLISH_CONFIG)
+        + SearchVector('title_te', weight='A', config=TELUGU_CONFIG)
+        + SearchVector('excerpt', weight='B', config=ENGLISH_CONFIG)
+        + SearchVector('excerpt_te', weight='B', config=TELUGU_CONFIG)
+        + SearchVector(_strip_tags('body'), weight='C', config=ENGLISH_CONFIG)
+        + SearchVector(_strip_tags('body_te'), weight='C', config=TELUGU_CONFIG)
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored search vector for every row in ``queryset``."""
+    if is_supported():
+        queryset.update(search_vector=press_release_search_vector())
+
+
+def search_press_releases(queryset, term):
+    """
+    Filter ``queryset`` to articles matching ``term``.
+
+    On PostgreSQL the result is annotated with a ``search_rank`` (cast to
+    double precision so it round-trips exactly through pagination cursors).
+    """
+    if not is_supported():
+        return queryset.filter(
+            Q(title__icontains=term) | Q(excerpt__icontains=term)
+            | Q(title_te__icontains=term) | Q(excerpt_te__icontains=term)
+        )
+
+    query = (
+        SearchQuery(term, config=ENGLISH_CONFIG, search_type='websearch')
+        | SearchQuery(term, config=TELUGU_CONFIG, search_type='websearch')
+    )
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+    )
@@ -0,0 +1,508 @@
+"""
+Bulk content import for the seeding management commands.
+
+Input is streamed with ijson, image files are decoded and validated in a
+process pool while the previous batch is written, and rows are written
+with ``bulk_create``/``bulk_update`` in one transaction per batch. Images
+are matched by content hash instead of title, and tags are attached in
+bulk. Bulk writes bypass model signals, so search vectors, the site
+search index, pre-rendered API payloads, related news and the API cache
+versions are refreshed here.
+
+Every imported row stores a ``source_hash`` of the record it came from, so
+re-running an import skips unchanged records without touching their
+images, and ``sync`` mode also deletes imported rows missing from the feed.
+Rows created in the admin have no source hash and are left alone, as are
+images still used anywhere else.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from itertools import islice
+
+import ijson
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image as PILImage
+from taggit.models import Tag
+from wagtail.images import get_image_model
+from wagtail.models import ReferenceIndex
+from wagtail.search.backends import get_search_backend
+
+from .cache import bump_version
+from .fulltext import update_search_vectors
+from .models import GalleryImage, PressRelease, PressReleaseTag
+from .prerender import refresh_payloads
+from .related import rebuild_all as rebuild_related_news
+
+
+BATCH_SIZE = 500
+
+# Columns an import may change on an existing press release
+PRESS_RELEASE_FIELDS = (
+    'title', 'title_te', 'excerpt', 'excerpt_te', 'body', 'body_te',
+    'featured_image', 'category', 'author', 'is_published', 'is_featured', 'published_date',
+)
+
+# Item keys that make up the source hash of each kind of record
+PRESS_RELEASE_SOURCE_FIELDS = (
+    'slug', 'title', 'title_te', 'excerpt', 'excerpt_te', 'body', 'body_te', 'category',
+    'author', 'is_published', 'is_featured', 'published_date', 'tags', 'image_path', 'image_title',
+)
+GALLERY_IMAGE_SOURCE_FIELDS = ('title', 'date', 'category', 'image_path')
+
+
+def _source_value(value):
+    # Categories by slug; dates and anything else by their string form
+    return getattr(value, 'slug', None) or str(value)
+
+
+def source_hash(item, fields):
+    """
+    Fingerprint an import item: its raw feed record when given as
+    ``source``, otherwise ``fields``. Image files count by size and
+    modification time, so unchanged records are recognised without reading
+    them.
+    """
+    if 'source' in item:
+        data = {'source': item['source'], 'image_path': item.get('image_path')}
+    else:
+        data = {name: item.get(name) for name in fields}
+    if item.get('image_path'):
+        stat = os.stat(item['image_path'])
+        data['image_file'] = [stat.st_size, stat.st_mtime_ns]
+    encoded = json.dumps(data, sort_keys=True, default=_source_value, ensure_ascii=False)
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+
+def iter_json(path, prefix, stats=None):
+    """Stream the items under ``prefix`` (e.g. ``'news.item'``) of a JSON file."""
+    with open(path, 'rb') as f:
+        for item in ijson.items(f, prefix, use_float=True):
+            if stats is not None:
+                stats.input_bytes = f.tell()
+            yield item
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@dataclass
+class ImageInfo:
+    path: str
+    width: int = 0
+    height: int = 0
+    size: int = 0
+    file_hash: str = ''
+    error: str = None
+
+
+def inspect_image(path):
+    """Decode an image file fully; runs in the worker processes."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        with PILImage.open(BytesIO(data)) as image:
+            image.load()
+            width, height = image.size
+    except (OSError, SyntaxError, ValueError, PILImage.DecompressionBombError) as e:
+        return ImageInfo(path, error=str(e) or e.__class__.__name__)
+    return ImageInfo(path, width, height, len(data), hashlib.sha1(data).hexdigest())
+
+
+class ImportStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.images = 0
+        self.images_deleted = 0
+        self.input_bytes = 0
+        self.image_bytes = 0
+
+    def __str__(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        megabytes = (self.input_bytes + self.image_bytes) / 1_000_000
+        return (
+            f'{self.rows} rows in {elapsed:.1f}s '
+            f'({self.rows / elapsed:.0f} rows/s, {megabytes / elapsed:.1f} MB/s)'
+        )
+
+    def summary(self):
+        """One-line diff of what the import changed."""
+        return (
+            f'{self.created} created, {self.updated} updated, {self.deleted} deleted, '
+            f'{self.unchanged} unchanged; images: {self.images} added, {self.images_deleted} deleted'
+        )
+
+
+def _referenced_images(image_ids):
+    """
+    Ids of the images in ``image_ids`` that Wagtail's reference index finds
+    used outside the imported foreign keys: in pages, snippets or rich text.
+    """
+    # Imported rows are written in bulk, which leaves their index entries out
+    # of date, so their image columns are checked directly instead
+    imported = (
+        Q(content_type=ContentType.objects.get_for_model(PressRelease), model_path='featured_image')
+        | Q(content_type=ContentType.objects.get_for_model(GalleryImage), model_path='image')
+    )
+    references = ReferenceIndex.objects.filter(
+        to_content_type=ContentType.objects.get_for_model(get_image_model()),
+        to_object_id__in=[str(pk) for pk in image_ids],
+    ).exclude(imported)
+    return {int(pk) for pk in references.values_list('to_object_id', flat=True)}
+
+
+class ContentImporter:
+    """
+    Import press releases and gallery images in batches.
+
+    Use as a context manager so the worker pool is shut down. ``workers=1``
+    inspects images in this process. ``log`` receives progress lines.
+    """
+
+    def __init__(self, workers=None, batch_size=BATCH_SIZE, log=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.stats = ImportStats()
+        self.image_ids = []
+        # Images a changed or deleted row stopped using; removed if now unused
+        self.released_image_ids = set()
+        self.pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            # Forked workers must not share this process's connections
+            connections.close_all()
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    # Images
+
+    def _submit(self, paths):
+        if self.pool is None:
+            return dict.fromkeys(paths)
+        return {path: self.pool.submit(inspect_image, path) for path in paths}
+
+    def _collect(self, pending):
+        return {
+            path: future.result() if future is not None else inspect_image(path)
+            for path, future in pending.items()
+        }
+
+    def _with_images(self, batches, image_key):
+        """
+        Yield ``(batch, image_infos)``, inspecting the images of the next
+        batch in the pool while the caller writes the current one.
+        """
+        pending = None
+        for batch in batches:
+            paths = {item[image_key] for item in batch if item.get(image_key)}
+            submitted = (batch, self._submit(paths))
+            if pending is not None:
+                yield pending[0], self._collect(pending[1])
+            pending = submitted
+        if pending is not None:
+            yield pending[0], self._collect(pending[1])
+
+    def _store_images(self, infos, titles):
+        """Return ``{path: Image}``, reusing images already stored with the same content."""
+        Image = get_image_model()
+        valid = {}
+        for path, info in infos.items():
+            if info.error:
+                self.log(f'  Skipped image {path}: {info.error}')
+            else:
+                valid[path] = info
+                self.stats.image_bytes += info.size
+
+        images = {
+            image.file_hash: image
+            for image in Image.objects.filter(file_hash__in={info.file_hash for info in valid.values()})
+        }
+        new_images = []
+        storage = Image._meta.get_field('file').storage
+        for path, info in valid.items():
+            if info.file_hash in images:
+                continue
+            image = Image(
+                title=titles[path],
+                width=info.width,
+                height=info.height,
+                file_size=info.size,
+                file_hash=info.file_hash,
+            )
+            with open(path, 'rb') as f:
+                image.file = storage.save(image.get_upload_to(os.path.basename(path)), f)
+            images[info.file_hash] = image
+            new_images.append(image)
+
+        if new_images:
+            Image.objects.bulk_create(new_images)
+            get_search_backend().add_bulk(Image, new_images)
+            self.image_ids.extend(image.pk for image in new_images)
+            self.stats.images += len(new_images)
+        return {path: images[info.file_hash] for path, info in valid.items()}
+
+    def _delete_unused_images(self):
+        """Delete the images this run detached from imported rows, unless something still uses them."""
+        candidates = self.released_image_ids
+        if not candidates:
+            return
+        in_use = set(
+            PressRelease.objects.filter(featured_image_id__in=candidates).values_list('featured_image_id', flat=True)
+        ) | set(
+            GalleryImage.objects.filter(image_id__in=candidates).values_list('image_id', flat=True)
+        ) | _referenced_images(candidates)
+        # Deleting through the ORM lets Wagtail remove the files and renditions
+        _, deleted = get_image_model().objects.filter(pk__in=candidates - in_use).delete()
+        self.stats.images_deleted += deleted.get(get_image_model()._meta.label, 0)
+        self.released_image_ids = set()
+
+    # Press releases
+
+    def import_press_releases(self, items, update=True, sync=False):
+        """
+        Create or update press releases keyed by slug.
+
+        Each item holds the model fields plus ``tags`` (names, replacing the
+        current ones when given), and optionally ``image_path`` and
+        ``image_title`` for the featured image. Records whose source hash
+        matches the stored one are skipped. Existing articles are left alone
+        unless ``update`` is true; ``sync`` also deletes the articles that
+        are not in ``items``.
+        """
+        seen = set()
+        touched = False
+        batches = (self._changed_press_releases(batch, seen) for batch in batched(items, self.batch_size))
+        for batch, infos in self._with_images(batches, 'image_path'):
+            images = self._store_images(infos, {
+                item['image_path']: item.get('image_title') or item['title']
+                for item in batch if item.get('image_path')
+            })
+            touched |= self._write_press_releases(batch, images, update)
+            self.log(f'  {self.stats}')
+
+        if sync:
+            touched |= self._delete_press_releases(seen)
+        self._delete_unused_images()
+        if touched:
+            rebuild_related_news()
+            bump_version(PressRelease)
+
+    def _changed_press_releases(self, batch, seen):
+        """Hash the batch and drop the records that haven't changed since the last import."""
+        # The last occurrence of a slug wins, as it would with one save per item
+        batch = list({item['slug']: item for item in batch}.values())
+        seen.update(item['slug'] for item in batch)
+        stored = dict(
+            PressRelease.objects.filter(slug__in=[item['slug'] for item in batch]).values_list('slug', 'source_hash')
+        )
+        changed = []
+        for item in batch:
+            item['source_hash'] = source_hash(item, PRESS_RELEASE_SOURCE_FIELDS)
+            if stored.get(item['slug']) == item['source_hash']:
+                self.stats.unchanged += 1
+            else:
+                changed.append(item)
+        return changed
+
+    @transaction.atomic
+    def _write_press_releases(self, batch, images, update):
+        existing = {
+            slug: (pk, image_id)
+            for slug, pk, image_id in PressRelease.objects.filter(
+                slug__in=[item['slug'] for item in batch]
+            ).values_list('slug', 'pk', 'featured_image_id')
+        }
+        now = timezone.now()
+        created, updated, tags = [], [], []
+        for item in batch:
+            fields = {name: item[name] for name in PRESS_RELEASE_FIELDS if name in item}
+            fields['featured_image'] = images.get(item.get('image_path'))
+            press_release = PressRelease(slug=item['slug'], source_hash=item['source_hash'], **fields)
+            pk, image_id = existing.get(item['slug'], (None, None))
+            if pk is None:
+                created.append(press_release)
+            elif update:
+                press_release.pk = pk
+                press_release.updated_at = now
+                updated.append(press_release)
+                if image_id is not None and image_id != press_release.featured_image_id:
+                    self.released_image_ids.add(image_id)
+            else:
+                self.stats.skipped += 1
+                continue
+            if item.get('tags'):
+                tags.append((press_release, item['tags']))
+
+        PressRelease.objects.bulk_create(created)
+        if updated:
+            PressRelease.objects.bulk_update(updated, PRESS_RELEASE_FIELDS + ('source_hash', 'updated_at'))
+        self._attach_tags({press_release.pk: names for press_release, names in tags})
+        update_search_vectors(PressRelease.objects.filter(pk__in=[pr.pk for pr in created + updated]))
+        get_search_backend().add_bulk(PressRelease, created + updated)
+        refresh_payloads([pr.pk for pr in created + updated])
+
+        self.stats.created += len(created)
+        self.stats.updated += len(updated)
+        self.stats.rows += len(created) + len(updated)
+        return bool(created or updated)
+
+    @transaction.atomic
+    def _delete_press_releases(self, keep_slugs):
+        # Only imported articles; those written in the admin have no source hash
+        stale = [
+            (pk, image_id)
+            for pk, slug, image_id in PressRelease.objects.exclude(source_hash='').values_list(
+                'pk', 'slug', 'featured_image_id',
+            )
+            if slug not in keep_slugs
+        ]
+        for chunk in batched(stale, self.batch_size):
+            PressRelease.objects.filter(pk__in=[pk for pk, _ in chunk]).delete()
+            self.released_image_ids.update(image_id for _, image_id in chunk if image_id)
+        self.stats.deleted += len(stale)
+        return bool(stale)
+
+    def _attach_tags(self, tags_by_pk):
+        """Replace the tags of each press release with the given names, in order."""
+        names = list(dict.fromkeys(name for names in tags_by_pk.values() for name in names))
+        tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+
+        missing = [name for name in names if name not in tags]
+        if missing:
+            slugs = {name: Tag().slugify(name) for name in missing}
+            taken = set(Tag.objects.filter(slug__in=slugs.values()).values_list('slug', flat=True))
+            new_tags = []
+            for name in missing:
+                slug, i = slugs[name], 1
+                while slug in taken:
+                    slug = Tag().slugify(name, i)
+                    i += 1
+                taken.add(slug)
+                new_tags.append(Tag(name=name, slug=slug))
+            for tag in Tag.objects.bulk_create(new_tags):
+                tags[tag.name] = tag
+
+        PressReleaseTag.objects.filter(content_object_id__in=tags_by_pk).delete()
+        PressReleaseTag.objects.bulk_create([
+            PressReleaseTag(content_object_id=pk, tag=tags[name])
+            for pk, names in tags_by_pk.items()
+            for name in dict.fromkeys(names)
+        ])
+
+    # Gallery
+
+    def import_gallery_images(self, items, sync=False):
+        """
+        Import gallery images from items with ``image_path``, ``title``,
+        ``date`` and ``category`` (a GalleryCategory or None).
+
+        Records whose source hash is already stored are skipped; a changed
+        record updates the gallery row showing the same image. ``sync`` also
+        deletes the gallery rows that are not in ``items``.
+        """
+        kept = set()
+        touched = False
+        batches = (self._changed_gallery_images(batch, kept) for batch in batched(items, self.batch_size))
+        for batch, infos in self._with_images(batches, 'image_path'):
+            images = self._store_images(infos, {item['image_path']: item['title'] for item in batch})
+            touched |= self._write_gallery_images(batch, images, kept)
+            self.log(f'  {self.stats}')
+
+        if sync:
+            touched |= self._delete_gallery_images(kept)
+        self._delete_unused_images()
+        if touched:
+            bump_version(GalleryImage)
+
+    def _changed_gallery_images(self, batch, kept):
+        for item in batch:
+            item['source_hash'] = source_hash(item, GALLERY_IMAGE_SOURCE_FIELDS)
+        stored = dict(
+            GalleryImage.objects.filter(
+                source_hash__in=[item['source_hash'] for item in batch]
+            ).values_list('source_hash', 'pk')
+        )
+        changed = []
+        for item in batch:
+            pk = stored.get(item['source_hash'])
+            if pk is not None and pk not in kept:
+                kept.add(pk)
+                self.stats.unchanged += 1
+            else:
+                changed.append(item)
+        return changed
+
+    @transaction.atomic
+    def _write_gallery_images(self, batch, images, kept):
+        rows_by_image = {}
+        for pk, image_id in GalleryImage.objects.filter(image__in=images.values()).values_list('pk', 'image_id'):
+            if pk not in kept:
+                rows_by_image.setdefault(image_id, pk)
+
+        created, updated = [], []
+        for item in batch:
+            image = images.get(item['image_path'])
+            if image is None:
+                self.stats.skipped += 1
+                continue
+            gallery_image = GalleryImage(
+                image=image,
+                title=item['title'],
+                date=item['date'],
+                category=item.get('category'),
+                source_hash=item['source_hash'],
+            )
+            pk = rows_by_image.pop(image.pk, None)
+            if pk is None:
+                created.append(gallery_image)
+            else:
+                gallery_image.pk = pk
+                gallery_image.updated_at = timezone.now()
+                updated.append(gallery_image)
+
+        GalleryImage.objects.bulk_create(created)
+        if updated:
+            GalleryImage.objects.bulk_update(updated, ('title', 'date', 'category', 'source_hash', 'updated_at'))
+        get_search_backend().add_bulk(GalleryImage, created + updated)
+        kept.update(gallery_image.pk for gallery_image in created + updated)
+
+        self.stats.created += len(created)
+        self.stats.updated += len(updated)
+        self.stats.rows += len(created) + len(updated)
+        return bool(created or updated)
+
+    @transaction.atomic
+    def _delete_gallery_images(self, keep_pks):
+        # Only imported gallery images; those added in the admin have no source hash
+        stale = [
+            (pk, image_id)
+            for pk, image_id in GalleryImage.objects.exclude(source_hash='').values_list('pk', 'image_id')
+            if pk not in keep_pks
+        ]
+        for chunk in batched(stale, self.batch_size):
+            GalleryImage.objects.filter(pk__in=[pk for pk, _ in chunk]).delete()
+            self.released_image_ids.update(image_id for _, image_id in chunk)
+        self.stats.deleted += len(stale)
+        return bool(stale)
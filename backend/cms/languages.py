@@ -0,0 +1,77 @@
+"""
+Single-language news payloads.
+
+Articles carry English and Telugu text side by side (``title`` and
+``title_te`` and so on). By default the news endpoints return both; with
+``?lang=en`` or ``?lang=te`` they return one, under the English field
+names, and only read that language's columns. ``?lang=auto`` picks the
+language from the Accept-Language header. Telugu text falls back to the
+English text when an article hasn't been translated.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import patch_vary_headers
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+
+LANGUAGES = ('en', 'te')
+DEFAULT_LANGUAGE = 'en'
+
+# Fields with a Telugu counterpart named ``<field>_te``
+TRANSLATED_FIELDS = ('title', 'excerpt', 'body')
+
+
+class InvalidLanguage(ValueError):
+    pass
+
+
+def negotiate_language(accept_language):
+    """The first supported language in an Accept-Language header."""
+    for code, _ in parse_accept_lang_header(accept_language or ''):
+        language = code.split('-')[0]
+        if language in LANGUAGES:
+            return language
+    return DEFAULT_LANGUAGE
+
+
+def request_language(request):
+    """
+    The language ``request`` asks for with ``?lang=``, or None for both.
+
+    Raises InvalidLanguage for unsupported values.
+    """
+    lang = request.GET.get('lang', '').strip()
+    if not lang:
+        return None
+    if lang == 'auto':
+        return negotiate_language(request.headers.get('Accept-Language'))
+    if lang not in LANGUAGES:
+        raise InvalidLanguage(lang)
+    return lang
+
+
+def translated(obj, name, lang):
+    """``obj.<name>`` in ``lang``, falling back to English where no translation exists."""
+    if lang == 'te':
+        return getattr(obj, f'{name}_te') or getattr(obj, name)
+    return getattr(obj, name)
+
+
+def vary_on_language(view):
+    """Add ``Vary: Accept-Language`` to responses negotiated with ``?lang=auto``."""
+    def vary(request, response):
+        if request.GET.get('lang', '').strip() == 'auto':
+            patch_vary_headers(response, ('Accept-Language',))
+        return response
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapped(request, *args, **kwargs):
+            return vary(request, await view(request, *args, **kwargs))
+        return async_wrapped
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        return vary(request, view(request, *args, **kwargs))
+    return wrapped
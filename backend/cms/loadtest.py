@@ -0,0 +1,205 @@
+"""
+Concurrent load against the API served by gunicorn, over WSGI and ASGI.
+
+Used by the ``benchmark_servers`` management command. Each server runs in
+its own process group against the same database; a single asyncio client
+keeps ``concurrency`` connections busy with the requests of
+``benchmark.benchmark_requests`` in turn, for a fixed time, and reports
+throughput and latency percentiles. Connections are kept alive where the
+server allows it (gunicorn's sync workers close them after each
+response, so the client reconnects, as browsers do).
+"""
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+from .benchmark import _percentile
+
+
+HOST = '127.0.0.1'
+
+# Seconds a server gets to answer its first request
+STARTUP_TIMEOUT = 60
+
+READY_PATH = '/api/v2/notifications/'
+
+# ``(name, gunicorn arguments, environment)`` of every server setup compared
+SERVERS = (
+    ('wsgi', ['config.wsgi:application'], {'ASYNC_VIEWS': 'False'}),
+    ('asgi', ['config.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker'], {'ASYNC_VIEWS': 'True'}),
+)
+
+
+@dataclass
+class LoadMeasurement:
+    server: str
+    concurrency: int
+    requests: int
+    errors: int
+    requests_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def raw_request(path, params):
+    """The bytes of a keep-alive GET of ``path?params``."""
+    target = f'{path}?{urlencode(params)}' if params else path
+    return (
+        f'GET {target} HTTP/1.1\r\n'
+        f'Host: localhost\r\n'
+        f'Accept-Encoding: br, gzip\r\n'
+        f'\r\n'
+    ).encode()
+
+
+async def _read_response(reader):
+    """Read one response; returns its status and whether the server closes the connection."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('connection closed')
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while size := int((await reader.readline()).split(b';')[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    return int(status_line.split()[1]), headers.get('connection') == 'close'
+
+
+async def _client(port, requests, offset, deadline, timings, errors):
+    reader = writer = None
+    i = offset
+    while time.perf_counter() < deadline:
+        request = requests[i % len(requests)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(HOST, port)
+            writer.write(request)
+            status, close = await _read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors.append(None)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        timings.append((time.perf_counter() - start) * 1000)
+        if status != 200:
+            errors.append(status)
+        if close:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _load(port, requests, concurrency, duration):
+    timings, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        _client(port, requests, offset, deadline, timings, errors) for offset in range(concurrency)
+    ))
+    return timings, errors
+
+
+def run_load(server, port, requests, concurrency, duration):
+    """Keep ``concurrency`` clients requesting from ``port`` for ``duration`` seconds."""
+    started = time.perf_counter()
+    timings, errors = asyncio.run(_load(port, requests, concurrency, duration))
+    elapsed = time.perf_counter() - started
+    if not timings:
+        raise RuntimeError(f'{server}: no request completed')
+    return LoadMeasurement(
+        server=server,
+        concurrency=concurrency,
+        requests=len(timings),
+        errors=len(errors),
+        requests_per_second=round(len(timings) / elapsed, 1),
+        p50_ms=round(_percentile(timings, 0.50), 2),
+        p95_ms=round(_percentile(timings, 0.95), 2),
+        p99_ms=round(_percentile(timings, 0.99), 2),
+        max_ms=round(max(timings), 2),
+    )
+
+
+def _wait_until_ready(process, port, log):
+    request = raw_request(READY_PATH, {})
+
+    async def ready():
+        reader, writer = await asyncio.open_connection(HOST, port)
+        try:
+            writer.write(request)
+            status, _ = await _read_response(reader)
+            return status == 200
+        finally:
+            writer.close()
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            if asyncio.run(ready()):
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    log.seek(0)
+    raise RuntimeError(f'Server did not start:\n{log.read().decode(errors="replace")[-2000:]}')
+
+
+@contextmanager
+def serve(arguments, workers, threads=1, env=None):
+    """Run gunicorn with ``arguments`` on a free port until the block exits; yields the port."""
+    port = _free_port()
+    command = [
+        sys.executable, '-m', 'gunicorn', *arguments,
+        '--bind', f'{HOST}:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--log-level', 'warning',
+    ]
+    with tempfile.TemporaryFile() as log:
+        process = subprocess.Popen(
+            command,
+            cwd=settings.BASE_DIR,
+            env={**os.environ, **(env or {})},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+        try:
+            _wait_until_ready(process, port, log)
+            yield port
+        finally:
+            if process.poll() is None:
+                os.killpg(process.pid, signal.SIGTERM)
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    os.killpg(process.pid, signal.SIGKILL)
+                    process.wait()
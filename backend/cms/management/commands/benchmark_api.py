@@ -0,0 +1,143 @@
+"""
+Management command to benchmark the /api/v2/ endpoints against budgets.
+Usage: python manage.py benchmark_api --scale small
+
+Seeds a synthetic dataset into a throwaway test database (PostgreSQL or
+SQLite, whichever DATABASES points at), measures p50/p95 latency, query
+count and payload size per endpoint and fails if a budget is exceeded.
+It also times the JSON renderers on a large news page and fails if their
+output differs, and compares opening a connection per request with
+persistent and pooled connections.
+"""
+import json
+import time
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from cms import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the cms API endpoints on a synthetic dataset and checks budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(benchmark.SCALES),
+            default='small',
+            help='Dataset size preset, also selects the budget set (default: small)',
+        )
+        parser.add_argument('--articles', type=int, help='Override the number of press releases')
+        parser.add_argument('--gallery-images', type=int, help='Override the number of gallery images')
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=30,
+            help='Requests per endpoint (default: 30)',
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Keep the response cache between requests instead of measuring cold requests',
+        )
+        parser.add_argument(
+            '--budgets',
+            default=benchmark.BUDGETS_PATH,
+            help='Path to the budgets JSON file',
+        )
+        parser.add_argument(
+            '--no-budgets',
+            action='store_true',
+            help='Report measurements without failing on budgets',
+        )
+        parser.add_argument('--output', help='Write the measurements as JSON to this path')
+
+    def handle(self, *args, **options):
+        sizes = dict(benchmark.SCALES[options['scale']])
+        if options['articles'] is not None:
+            sizes['articles'] = options['articles']
+        if options['gallery_images'] is not None:
+            sizes['gallery_images'] = options['gallery_images']
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            measurements = self.run_benchmarks(sizes, options)
+            renderers = self.compare_renderers(options)
+            self.compare_connections(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump([benchmark.as_dict(m) for m in measurements], f, indent=2)
+
+        mismatched = [r.name for r in renderers if not r.matches_default]
+        if mismatched:
+            raise CommandError(f'Output differs from JSONRenderer: {", ".join(mismatched)}')
+
+        if options['no_budgets']:
+            return
+
+        budgets = benchmark.load_budgets(options['budgets'], options['scale'])
+        failures = []
+        for measurement in measurements:
+            failures.extend(benchmark.check_budget(measurement, budgets.get(measurement.name, {})))
+        if failures:
+            for failure in failures:
+                self.stderr.write(self.style.ERROR(f'  Over budget: {failure}'))
+            raise CommandError(f'{len(failures)} budget(s) exceeded')
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget'))
+
+    def run_benchmarks(self, sizes, options):
+        self.stdout.write(
+            f'Seeding {sizes["articles"]} press releases, {sizes["gallery_images"]} gallery images '
+            f'({connection.vendor})...'
+        )
+        start = time.perf_counter()
+        benchmark.seed_dataset(**sizes)
+        self.stdout.write(f'  Seeded in {time.perf_counter() - start:.1f}s')
+
+        self.stdout.write('')
+        self.stdout.write(f'{"endpoint":<24} {"p50 ms":>9} {"p95 ms":>9} {"queries":>8} {"bytes":>11}')
+        measurements = []
+        for name, path, params in benchmark.benchmark_requests():
+            measurement = benchmark.measure(name, path, params, options['iterations'], options['warm'])
+            measurements.append(measurement)
+            self.stdout.write(
+                f'{name:<24} {measurement.p50_ms:>9.2f} {measurement.p95_ms:>9.2f} '
+                f'{measurement.queries:>8} {measurement.bytes:>11}'
+            )
+        self.stdout.write('')
+        return measurements
+
+    def compare_renderers(self, options):
+        path, params = benchmark.RENDERER_REQUEST
+        self.stdout.write(f'Renderers on {path}?{urlencode(params)}:')
+        self.stdout.write(f'{"renderer":<24} {"mean ms":>9} {"bytes":>11}  matches')
+        measurements = benchmark.compare_renderers(options['iterations'])
+        for measurement in measurements:
+            self.stdout.write(
+                f'{measurement.name:<24} {measurement.mean_ms:>9.3f} {measurement.bytes:>11}  '
+                f'{"yes" if measurement.matches_default else "NO"}'
+            )
+        self.stdout.write('')
+        return measurements
+
+    def compare_connections(self, options):
+        path, _ = benchmark.CONNECTION_REQUEST
+        self.stdout.write(f'Database connections on {path} through the WSGI handler:')
+        self.stdout.write(f'{"mode":<24} {"mean ms":>9} {"p95 ms":>9} {"opened":>8}')
+        measurements = benchmark.compare_connections(options['iterations'])
+        for measurement in measurements:
+            self.stdout.write(
+                f'{measurement.name:<24} {measurement.mean_ms:>9.3f} {measurement.p95_ms:>9.3f} '
+                f'{measurement.connections:>8}'
+            )
+        self.stdout.write('')
+        return measurements
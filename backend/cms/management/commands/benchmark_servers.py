@@ -0,0 +1,115 @@
+"""
+Management command to compare the API served over WSGI and ASGI under load.
+Usage: python manage.py benchmark_servers --scale small --concurrency 10 100
+
+Seeds a synthetic dataset into a throwaway PostgreSQL test database, starts
+gunicorn with config.wsgi (sync views) and then with config.asgi on
+uvicorn workers (the async views of cms.api_async), each with the same
+number of worker processes, and reports requests per second and latency
+percentiles at each concurrency level. Caches are warmed for a few
+seconds before each measurement, as in production.
+"""
+from importlib.util import find_spec
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from cms import benchmark, loadtest
+
+
+class Command(BaseCommand):
+    help = 'Compares throughput and tail latency of the API under gunicorn over WSGI and ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(benchmark.SCALES),
+            default='small',
+            help='Dataset size preset (default: small)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=[10, 50],
+            help='Concurrent client connections, one measurement per value (default: 10 50)',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Seconds of load per measurement (default: 10)',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=float,
+            default=3,
+            help='Seconds of load before measuring each server (default: 3)',
+        )
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes per server (default: 2)')
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=1,
+            help='Threads per WSGI worker; gunicorn serves with threads above 1 (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        missing = [name for name in ('gunicorn', 'uvicorn') if find_spec(name) is None]
+        if missing:
+            raise CommandError(f'Install {" and ".join(missing)} to run the servers')
+        if connection.vendor != 'postgresql':
+            raise CommandError('The servers share the seeded database, which needs PostgreSQL')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            sizes = benchmark.SCALES[options['scale']]
+            self.stdout.write(
+                f'Seeding {sizes["articles"]} press releases, {sizes["gallery_images"]} gallery images...'
+            )
+            benchmark.seed_dataset(**sizes)
+            requests = [loadtest.raw_request(path, params) for _, path, params in benchmark.benchmark_requests()]
+            # The servers open their own connections to the test database
+            connection.close()
+            measurements = self.run_servers(requests, test_name, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(measurements)
+
+    def run_servers(self, requests, test_name, options):
+        measurements = []
+        for name, arguments, env in loadtest.SERVERS:
+            threads = options['threads'] if name == 'wsgi' else 1
+            self.stdout.write(f'Starting {name} ({options["workers"]} workers)...')
+            try:
+                with loadtest.serve(arguments, options['workers'], threads, {**env, 'DB_NAME': test_name}) as port:
+                    if options['warmup']:
+                        loadtest.run_load(name, port, requests, max(options['concurrency']), options['warmup'])
+                    for concurrency in options['concurrency']:
+                        measurements.append(
+                            loadtest.run_load(name, port, requests, concurrency, options['duration'])
+                        )
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+        return measurements
+
+    def report(self, measurements):
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"server":<8} {"clients":>8} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} '
+            f'{"p99 ms":>9} {"max ms":>9} {"errors":>7}'
+        )
+        for m in sorted(measurements, key=lambda m: (m.concurrency, m.server)):
+            self.stdout.write(
+                f'{m.server:<8} {m.concurrency:>8} {m.requests_per_second:>9.1f} {m.p50_ms:>9.2f} '
+                f'{m.p95_ms:>9.2f} {m.p99_ms:>9.2f} {m.max_ms:>9.2f} {m.errors:>7}'
+            )
+        self.stdout.write('')
+        if any(m.errors for m in measurements):
+            raise CommandError('Some requests failed')
+        self.stdout.write(self.style.SUCCESS('Done'))
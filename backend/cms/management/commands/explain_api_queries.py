@@ -0,0 +1,105 @@
+"""
+Management command to explain the SQL behind the /api/v2/ endpoints.
+Usage: python manage.py explain_api_queries [--scale small]
+
+Serves each canonical API request, runs EXPLAIN (ANALYZE, BUFFERS) on every
+SELECT it issued (EXPLAIN QUERY PLAN on SQLite) and fails if any of them
+scans a large table sequentially. Without --scale it reads the configured
+database inside a transaction that is rolled back.
+"""
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from cms import benchmark, explain
+from cms.models import PressRelease
+
+
+class Command(BaseCommand):
+    help = 'Explains the queries of the cms API endpoints and flags sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(benchmark.SCALES),
+            help='Seed a throwaway test database of this size instead of using the configured one',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Only flag sequential scans reading at least this many rows (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Query plans are not supported on {connection.vendor}')
+
+        setup_test_environment()
+        try:
+            if options['scale']:
+                old_name = connection.settings_dict['NAME']
+                connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                try:
+                    self.stdout.write(f'Seeding the {options["scale"]} dataset...')
+                    benchmark.seed_dataset(**benchmark.SCALES[options['scale']])
+                    if connection.vendor == 'postgresql':
+                        # Fresh tables have no planner statistics or visibility map
+                        with connection.cursor() as cursor:
+                            cursor.execute('VACUUM ANALYZE')
+                    plans = self.collect_plans()
+                finally:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+            else:
+                plans = self.collect_plans()
+        finally:
+            teardown_test_environment()
+
+        flagged = []
+        for name, plan in plans:
+            timing = f'{plan.execution_ms:8.2f} ms' if plan.execution_ms is not None else ' ' * 11
+            buffers = f'  hit={plan.shared_hit} read={plan.shared_read}' if plan.shared_hit is not None else ''
+            self.stdout.write(f'{name:<24} {timing}{buffers}  {plan.sql[:100]}')
+            if options['verbosity'] > 1:
+                for line in plan.plan.splitlines():
+                    self.stdout.write(f'    {line}')
+            for scan in plan.seq_scans:
+                if scan.rows >= options['min_rows']:
+                    flagged.append((name, scan))
+                    self.stdout.write(self.style.WARNING(f'    Seq scan on {scan.table} ({scan.rows} rows)'))
+
+        if flagged:
+            raise CommandError(f'{len(flagged)} sequential scan(s) of {options["min_rows"]}+ rows')
+        self.stdout.write(self.style.SUCCESS('No sequential scans over large tables'))
+
+    def collect_plans(self):
+        if not PressRelease.objects.filter(is_published=True).exists():
+            raise CommandError('No published press releases to query; use --scale to seed a dataset')
+
+        plans = []
+        client = Client()
+        # A private cache emptied before every request, so each one reaches
+        # the database, and view counts written straight away so the rollback
+        # discards them.
+        with override_settings(
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'explain-api-queries',
+            }},
+            CMS_VIEW_COUNT_FLUSH_INTERVAL=0,
+        ), transaction.atomic():
+            for name, path, params in benchmark.benchmark_requests():
+                cache.clear()
+                connection.queries_log.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(path, params)
+                if response.status_code != 200:
+                    raise CommandError(f'{name}: {path} returned {response.status_code}')
+                statements = dict.fromkeys(
+                    query['sql'] for query in captured.captured_queries if explain.is_select(query['sql'])
+                )
+                plans.extend((name, explain.explain(sql)) for sql in statements)
+            transaction.set_rollback(True)
+        return plans
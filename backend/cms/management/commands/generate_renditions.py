@@ -0,0 +1,86 @@
+"""
+Management command to pre-generate the API image renditions.
+Usage: python manage.py generate_renditions --workers 4
+
+Builds every missing thumbnail/card/full rendition (WebP and JPEG) of the
+gallery and featured images in a process pool, so the API never has to
+resize an original while serving a request.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from wagtail.images import get_image_model
+
+from cms.models import GalleryImage, PressRelease
+from cms.renditions import generate_renditions, missing_renditions, renditions_generated
+
+
+def _init_worker():
+    django.setup()
+
+
+def _render(image_id, specs):
+    """Generate ``specs`` for one image; returns ``(image_id, error)``."""
+    try:
+        generate_renditions(get_image_model().objects.get(pk=image_id), specs)
+    except Exception as e:
+        return image_id, str(e) or e.__class__.__name__
+    finally:
+        connections.close_all()
+    return image_id, None
+
+
+class Command(BaseCommand):
+    help = 'Generates missing image renditions for the gallery and news API in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes; 1 renders in this process (default: CPU count)',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
+
+        image_ids = set(
+            GalleryImage.objects.exclude(image=None).values_list('image_id', flat=True)
+        ) | set(
+            PressRelease.objects.exclude(featured_image=None).values_list('featured_image_id', flat=True)
+        )
+        missing = missing_renditions(sorted(image_ids))
+        if not missing:
+            self.stdout.write(self.style.SUCCESS(f'All {len(image_ids)} images already have their renditions'))
+            return
+
+        count = sum(len(specs) for specs in missing.values())
+        self.stdout.write(f'Generating {count} renditions for {len(missing)} images with {workers} worker(s)...')
+        start = time.perf_counter()
+
+        if workers == 1:
+            results = [_render(image_id, specs) for image_id, specs in missing.items()]
+        else:
+            # Workers must open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [pool.submit(_render, image_id, specs) for image_id, specs in missing.items()]
+                results = [future.result() for future in as_completed(futures)]
+
+        done = [image_id for image_id, error in results if error is None]
+        failed = [(image_id, error) for image_id, error in results if error is not None]
+        for image_id, error in failed:
+            self.stderr.write(self.style.WARNING(f'  Image {image_id}: {error}'))
+        if done:
+            renditions_generated(done)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated renditions for {len(done)} images in {time.perf_counter() - start:.1f}s'
+            + (f', {len(failed)} failed' if failed else '')
+        ))
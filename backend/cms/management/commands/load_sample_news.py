@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import datetime
-from cms.models import NewsCategory, PressRelease
+from cms.importer import ContentImporter
+from cms.models import NewsCategory
 from wagtail.images.models import Image
 from django.core.files.base import ContentFile
 import requests
@@ -104,33 +105,31 @@ class Command(BaseCommand):
             },
         ]
 
-        for news in news_data:
-            category = categories.get(news['category'])
-
-            press_release, created = PressRelease.objects.get_or_create(
-                slug=news['slug'],
-                defaults={
-                    'title': news['title'],
-                    'title_te': news['title_te'],
-                    'excerpt': news['excerpt'],
-                    'excerpt_te': news['excerpt_te'],
-                    'body': news['body'],
-                    'body_te': news['body_te'],
-                    'category': category,
-                    'is_featured': news['is_featured'],
-                    'is_published': True,
-                    'published_date': datetime.fromisoformat(news['published_date'].replace('Z', '+00:00')),
-                    'author': 'Ministry of Minority Welfare',
-                }
-            )
-
-            if created:
-                # Add tags
-                for tag_name in news['tags']:
-                    press_release.tags.add(tag_name)
+        # get_or_create semantics: existing articles are left untouched
+        items = [
+            {
+                'slug': news['slug'],
+                'title': news['title'],
+                'title_te': news['title_te'],
+                'excerpt': news['excerpt'],
+                'excerpt_te': news['excerpt_te'],
+                'body': news['body'],
+                'body_te': news['body_te'],
+                'category': categories.get(news['category']),
+                'is_featured': news['is_featured'],
+                'is_published': True,
+                'published_date': datetime.fromisoformat(news['published_date'].replace('Z', '+00:00')),
+                'author': 'Ministry of Minority Welfare',
+                'tags': news['tags'],
+            }
+            for news in news_data
+        ]
+        with ContentImporter(workers=1, log=self.stdout.write) as importer:
+            importer.import_press_releases(items, update=False)
+        stats = importer.stats
 
-                self.stdout.write(self.style.SUCCESS(f'Created news: {press_release.title[:50]}...'))
-            else:
-                self.stdout.write(self.style.WARNING(f'News already exists: {press_release.title[:50]}...'))
+        self.stdout.write(self.style.SUCCESS(f'Created {stats.created} news articles'))
+        if stats.skipped:
+            self.stdout.write(self.style.WARNING(f'{stats.skipped} news articles already exist'))
 
         self.stdout.write(self.style.SUCCESS('Sample news data loaded successfully!'))
@@ -1,14 +1,33 @@
 import os
 from datetime import datetime
-from django.core.management.base import BaseCommand
-from django.core.files.images import ImageFile
-from wagtail.images.models import Image
-from cms.models import GalleryImage, GalleryCategory
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from cms.importer import ContentImporter
+from cms.models import GalleryCategory
 
 
 class Command(BaseCommand):
     help = 'Populate gallery with images'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--images-dir",
+            default="media/gallery",
+            help="Directory holding the gallery image files (default: media/gallery)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes decoding images (default: CPU count)",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Make the gallery match the built-in list: unchanged images are skipped "
+                 "and gallery images not in it are deleted",
+        )
+
     def handle(self, *args, **options):
         gallery_data = [
             {
@@ -133,33 +152,32 @@ class Command(BaseCommand):
             },
         ]
 
-        images_dir = "media/gallery"
-        created_count = 0
+        images_dir = options["images_dir"]
+        categories = {category.slug: category for category in GalleryCategory.objects.all()}
 
+        items = []
         for item in gallery_data:
             filepath = os.path.join(images_dir, item["filename"])
-            
+
             if not os.path.exists(filepath):
+                if options["sync"]:
+                    raise CommandError(f"File not found: {filepath} (a sync would delete its gallery image)")
                 self.stdout.write(self.style.WARNING(f"File not found: {filepath}"))
                 continue
 
-            # Create Wagtail Image
-            with open(filepath, "rb") as f:
-                wagtail_image = Image(title=item["title"])
-                wagtail_image.file.save(item["filename"], ImageFile(f))
-                wagtail_image.save()
+            items.append({
+                "image_path": filepath,
+                "title": item["title"],
+                "date": datetime.strptime(item["date"], "%Y-%m-%d").date(),
+                "category": categories.get(item["category"]),
+            })
 
-            # Get category
-            category = GalleryCategory.objects.filter(slug=item["category"]).first()
+        # Images are decoded in parallel and rows written in bulk
+        with ContentImporter(workers=options["workers"], log=self.stdout.write) as importer:
+            importer.import_gallery_images(items, sync=options["sync"])
+        stats = importer.stats
 
-            # Create GalleryImage
-            GalleryImage.objects.create(
-                image=wagtail_image,
-                title=item["title"],
-                date=datetime.strptime(item["date"], "%Y-%m-%d").date(),
-                category=category
-            )
-            created_count += 1
-            self.stdout.write(f"Created: {item['title']}")
+        if importer.image_ids:
+            call_command("generate_renditions", workers=importer.workers)
 
-        self.stdout.write(self.style.SUCCESS(f"\nCreated {created_count} gallery images!"))
+        self.stdout.write(self.style.SUCCESS(f"\nGallery images: {stats.summary()}"))
@@ -0,0 +1,27 @@
+"""
+Management command to re-render the stored API payloads of every article.
+Usage: python manage.py prerender_news
+
+Articles refresh their payloads on save; run this after changing how the
+news API serializes articles, or after writes that bypassed the signals.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from cms.cache import bump_version
+from cms.models import PressRelease
+from cms.prerender import refresh_payloads
+
+
+class Command(BaseCommand):
+    help = 'Re-renders the pre-rendered API payloads of every press release'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rendering news payloads...')
+        start = time.perf_counter()
+        count = len(refresh_payloads(PressRelease.objects.order_by('pk').values_list('pk', flat=True)))
+        bump_version(PressRelease)
+        self.stdout.write(self.style.SUCCESS(
+            f'Payloads rendered for {count} articles in {time.perf_counter() - start:.1f}s'
+        ))
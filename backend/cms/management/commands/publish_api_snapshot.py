@@ -0,0 +1,49 @@
+"""
+Management command to publish the static JSON snapshot of the public API.
+Usage: python manage.py publish_api_snapshot [--output-dir DIR] [--origin URL]
+
+Renders the news, gallery and notification lists the site fetches and
+every published article into files the web server can serve without
+Django (see cms.snapshot). Only files whose content changed are
+rewritten. Run it after bulk imports, which bypass the on-publish hook,
+or from cron to refresh view counts.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cms.snapshot import publish
+
+
+class Command(BaseCommand):
+    help = 'Writes the public cms API responses to static JSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            default=settings.CMS_API_SNAPSHOT_DIR,
+            help='Directory to write the snapshot to (default: CMS_API_SNAPSHOT_DIR)',
+        )
+        parser.add_argument(
+            '--origin',
+            default=settings.CMS_API_SNAPSHOT_ORIGIN,
+            help='Scheme and host the snapshot URLs point at (default: CMS_API_SNAPSHOT_ORIGIN)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['output_dir']:
+            raise CommandError('No output directory; pass --output-dir or set API_SNAPSHOT_DIR')
+
+        start = time.perf_counter()
+        result = publish(options['output_dir'], options['origin'])
+
+        if options['verbosity'] > 1:
+            for path in result.written:
+                self.stdout.write(f'  wrote {path}')
+            for path in result.removed:
+                self.stdout.write(f'  removed {path}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot published to {options["output_dir"]} in {time.perf_counter() - start:.1f}s: '
+            f'{len(result.written)} written, {result.unchanged} unchanged, {len(result.removed)} removed'
+        ))
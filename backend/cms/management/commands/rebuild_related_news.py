@@ -0,0 +1,28 @@
+"""
+Management command to recompute related news for every published article.
+Usage: python manage.py rebuild_related_news
+
+Articles keep their related news up to date on save; run this after bulk
+imports, to refit the IDF weights across the whole archive, and once after
+migration 0012, which adds the stored article vectors saves score against.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from cms.cache import bump_version
+from cms.models import PressRelease
+from cms.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the related news of every published press release'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding related news...')
+        start = time.perf_counter()
+        count = rebuild_all()
+        bump_version(PressRelease)
+        self.stdout.write(self.style.SUCCESS(
+            f'Related news rebuilt for {count} articles in {time.perf_counter() - start:.1f}s'
+        ))
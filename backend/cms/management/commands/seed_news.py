@@ -2,14 +2,13 @@
 Management command to seed news data from mock JSON file.
 Usage: python manage.py seed_news
 """
-import json
 import os
 from datetime import datetime
-from django.core.management.base import BaseCommand
-from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
+from cms.importer import BATCH_SIZE, ContentImporter, iter_json
 from cms.models import NewsCategory, PressRelease
-from wagtail.images.models import Image
 
 
 class Command(BaseCommand):
@@ -32,6 +31,24 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip importing images',
         )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Make the database match the JSON file: unchanged articles are skipped '
+                 'and articles missing from it are deleted',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processes decoding images (default: CPU count)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Articles written per transaction (default: {BATCH_SIZE})',
+        )
 
     def get_frontend_public_path(self):
         """Get the path to frontend/public folder"""
@@ -39,32 +56,53 @@ class Command(BaseCommand):
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
         return os.path.join(base_dir, 'frontend', 'public')
 
-    def import_image(self, image_path, title):
-        """Import an image file into Wagtail's image library"""
-        public_path = self.get_frontend_public_path()
-
+    def resolve_image(self, image_path):
+        """Return the full path of an image under frontend/public, if it exists"""
         # Normalize the image path (remove leading slash if present)
-        clean_path = image_path.lstrip('/')
-        full_path = os.path.join(public_path, clean_path)
-
+        full_path = os.path.join(self.get_frontend_public_path(), image_path.lstrip('/'))
         if not os.path.exists(full_path):
             self.stderr.write(f'    Image not found: {full_path}')
             return None
+        return full_path
+
+    def news_items(self, json_path, category_map, options, stats):
+        """Stream the articles of the JSON file as importer items"""
+        for news_data in iter_json(json_path, 'news.item', stats):
+            # Parse the published date
+            published_date_str = news_data.get('published_date', '')
+            if published_date_str:
+                published_date = datetime.fromisoformat(published_date_str.replace('Z', '+00:00'))
+            else:
+                published_date = timezone.now()
+
+            # Get the category
+            category_id = news_data.get('category')
+            category = category_map.get(category_id) if category_id else None
 
-        # Check if image already exists in Wagtail by title
-        filename = os.path.basename(full_path)
-        existing_image = Image.objects.filter(title=title).first()
-        if existing_image:
-            self.stdout.write(f'    Image exists: {filename}')
-            return existing_image
-
-        # Create new Wagtail image
-        with open(full_path, 'rb') as f:
-            image_file = ImageFile(f, name=filename)
-            wagtail_image = Image(title=title, file=image_file)
-            wagtail_image.save()
-            self.stdout.write(self.style.SUCCESS(f'    Imported image: {filename}'))
-            return wagtail_image
+            # Handle featured image
+            image_path = None
+            if not options['skip_images'] and news_data.get('featured_image'):
+                image_path = self.resolve_image(news_data['featured_image'])
+
+            yield {
+                'source': news_data,
+                'slug': news_data['slug'],
+                'title': news_data['title'],
+                'title_te': news_data.get('title_te', ''),
+                'excerpt': news_data.get('excerpt', ''),
+                'excerpt_te': news_data.get('excerpt_te', ''),
+                'body': news_data.get('body', ''),
+                'body_te': news_data.get('body_te', ''),
+                'category': category,
+                'author': news_data.get('author', 'Ministry of Minority Welfare'),
+                'is_published': news_data.get('is_published', True),
+                'is_featured': news_data.get('is_featured', False),
+                'published_date': published_date,
+                'tags': news_data.get('tags', []),
+                # Create a title for the image based on the article
+                'image_path': image_path,
+                'image_title': f"News: {news_data['title'][:50]}",
+            }
 
     def handle(self, *args, **options):
         # Default path to frontend mock data
@@ -78,9 +116,8 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f'JSON file not found: {json_path}'))
             return
 
-        # Load JSON data
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if options['clear'] and options['sync']:
+            raise CommandError('--clear and --sync cannot be used together')
 
         # Clear existing data if requested
         if options['clear']:
@@ -92,7 +129,7 @@ class Command(BaseCommand):
         # Seed categories
         self.stdout.write('Seeding news categories...')
         category_map = {}
-        for cat_data in data.get('categories', []):
+        for cat_data in iter_json(json_path, 'categories.item'):
             category, created = NewsCategory.objects.update_or_create(
                 slug=cat_data['slug'],
                 defaults={
@@ -108,69 +145,18 @@ class Command(BaseCommand):
 
         # Seed press releases
         self.stdout.write('Seeding press releases...')
-        created_count = 0
-        updated_count = 0
-        images_imported = 0
-
-        for news_data in data.get('news', []):
-            # Parse the published date
-            published_date_str = news_data.get('published_date', '')
-            if published_date_str:
-                published_date = datetime.fromisoformat(published_date_str.replace('Z', '+00:00'))
-            else:
-                published_date = timezone.now()
-
-            # Get the category
-            category_id = news_data.get('category')
-            category = category_map.get(category_id) if category_id else None
-
-            # Handle featured image
-            featured_image = None
-            if not options['skip_images']:
-                image_path = news_data.get('featured_image')
-                if image_path:
-                    # Create a title for the image based on the article
-                    image_title = f"News: {news_data['title'][:50]}"
-                    featured_image = self.import_image(image_path, image_title)
-                    if featured_image:
-                        images_imported += 1
-
-            # Create or update press release
-            press_release, created = PressRelease.objects.update_or_create(
-                slug=news_data['slug'],
-                defaults={
-                    'title': news_data['title'],
-                    'title_te': news_data.get('title_te', ''),
-                    'excerpt': news_data.get('excerpt', ''),
-                    'excerpt_te': news_data.get('excerpt_te', ''),
-                    'body': news_data.get('body', ''),
-                    'body_te': news_data.get('body_te', ''),
-                    'featured_image': featured_image,
-                    'category': category,
-                    'author': news_data.get('author', 'Ministry of Minority Welfare'),
-                    'is_published': news_data.get('is_published', True),
-                    'is_featured': news_data.get('is_featured', False),
-                    'published_date': published_date,
-                }
+        with ContentImporter(
+            workers=options['workers'], batch_size=options['batch_size'], log=self.stdout.write,
+        ) as importer:
+            importer.import_press_releases(
+                self.news_items(json_path, category_map, options, importer.stats),
+                sync=options['sync'],
             )
+        stats = importer.stats
 
-            # Handle tags
-            tags = news_data.get('tags', [])
-            if tags:
-                press_release.tags.clear()
-                for tag_name in tags:
-                    press_release.tags.add(tag_name)
-
-            if created:
-                created_count += 1
-                self.stdout.write(f'  Created: {press_release.title[:50]}...')
-            else:
-                updated_count += 1
-                self.stdout.write(f'  Updated: {press_release.title[:50]}...')
-
-        self.stdout.write(self.style.SUCCESS(
-            f'Seeded press releases: {created_count} created, {updated_count} updated'
-        ))
+        self.stdout.write(self.style.SUCCESS(f'Seeded press releases: {stats.summary()}'))
+        if importer.image_ids:
+            call_command('generate_renditions', workers=importer.workers)
 
         # Summary
         self.stdout.write('')
@@ -178,5 +164,5 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('News seeding completed successfully!'))
         self.stdout.write(f'  Categories: {NewsCategory.objects.count()}')
         self.stdout.write(f'  Press Releases: {PressRelease.objects.count()}')
-        self.stdout.write(f'  Images Imported: {images_imported}')
+        self.stdout.write(f'  Images Imported: {stats.images}')
         self.stdout.write(self.style.SUCCESS('=' * 50))
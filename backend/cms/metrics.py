@@ -0,0 +1,353 @@
+"""
+Per-request timings, as Server-Timing headers and Prometheus metrics.
+
+``MetricsMiddleware`` times every request: its database queries (how many,
+and how long they took), the view less its queries, the rendering of DRF
+responses, and the total. With CMS_SERVER_TIMING set, the timings are
+sent in a ``Server-Timing`` header, which browsers show with the request
+in their developer tools. They are added to per-endpoint histograms served at
+/metrics in the Prometheus text format, to requests bearing the
+CMS_METRICS_TOKEN. Endpoints are labelled with their URL name, so the
+label values are bounded.
+
+Recording a request is a handful of clock reads and additions under a lock.
+Each process keeps its own totals and writes them to a file of its own in
+CMS_METRICS_DIR at most every CMS_METRICS_PUBLISH_INTERVAL seconds, and on
+exit. /metrics adds up the files, so every answer counts every worker on
+the host, whichever worker gives it. Files stay after their process exits,
+so the totals never go down; clear the directory when the server starts.
+Without CMS_METRICS_DIR, /metrics counts only the process that answers.
+"""
+import atexit
+import bisect
+import contextvars
+import hmac
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_safe
+
+
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Histogram name -> (help text, buckets)
+HISTOGRAMS = {
+    'cms_request_duration_seconds': ('Time from the request entering Django to the response leaving', SECONDS_BUCKETS),
+    'cms_request_db_seconds': ('Time spent in database queries', SECONDS_BUCKETS),
+    'cms_request_view_seconds': ('Time spent in the view, less its database queries', SECONDS_BUCKETS),
+    'cms_request_render_seconds': ('Time spent rendering DRF responses', SECONDS_BUCKETS),
+    'cms_request_queries': ('Database queries per request', QUERY_BUCKETS),
+}
+
+RESPONSES = 'cms_responses_total'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@dataclass
+class RequestTiming:
+    started: float
+    queries: int = 0
+    db: float = 0.0
+    view_started: float | None = None
+    # Query time before the view was called
+    db_before_view: float = 0.0
+    view: float | None = None
+    render_started: float | None = None
+    render: float = 0.0
+
+    def end_view(self, now):
+        if self.view is None and self.view_started is not None:
+            self.view = max(0.0, now - self.view_started - (self.db - self.db_before_view))
+
+
+# The timing of the request being handled; sync_to_async carries it into
+# the threads the async ORM runs queries on
+_timing = contextvars.ContextVar('cms_request_timing', default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timing = _timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - start
+        timing.queries += 1
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # First, so the connection.execute_wrapper() blocks of others, which pop
+    # the last wrapper, never remove it
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _timed_execute)
+
+
+class Registry:
+    """Histograms and response counters of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (histogram, endpoint) -> [count per bucket..., count above the last, sum]
+        self._histograms = {}
+        # (endpoint, status) -> count
+        self._responses = {}
+
+    def record(self, endpoint, status, values):
+        """Add one request's ``{histogram: value}`` observations."""
+        with self._lock:
+            for name, value in values.items():
+                buckets = HISTOGRAMS[name][1]
+                observed = self._histograms.get((name, endpoint))
+                if observed is None:
+                    observed = self._histograms[name, endpoint] = [0] * (len(buckets) + 1) + [0.0]
+                observed[bisect.bisect_left(buckets, value)] += 1
+                observed[-1] += value
+            self._responses[endpoint, status] = self._responses.get((endpoint, status), 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'histograms': {key: list(observed) for key, observed in self._histograms.items()},
+                'responses': dict(self._responses),
+            }
+
+
+registry = Registry()
+
+_process = f'{socket.gethostname()}-{os.getpid()}'
+_published_at = None
+
+
+def _metrics_dir():
+    return getattr(settings, 'CMS_METRICS_DIR', '')
+
+
+def publish():
+    """Write this process's totals to its file in CMS_METRICS_DIR, for /metrics to add up."""
+    global _published_at
+    _published_at = time.monotonic()
+    directory = _metrics_dir()
+    if not directory:
+        return
+    snapshot = registry.snapshot()
+    content = json.dumps({
+        'histograms': [[name, endpoint, observed] for (name, endpoint), observed in snapshot['histograms'].items()],
+        'responses': [[endpoint, status, count] for (endpoint, status), count in snapshot['responses'].items()],
+    })
+    os.makedirs(directory, exist_ok=True)
+    # Hidden, so /metrics never reads a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, os.path.join(directory, f'{_process}.json'))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# Totals recorded since the last publish would be lost with the process
+atexit.register(publish)
+
+
+def _publish_due():
+    interval = getattr(settings, 'CMS_METRICS_PUBLISH_INTERVAL', 15)
+    return _published_at is None or time.monotonic() - _published_at >= interval
+
+
+def _published_snapshots(directory):
+    for filename in os.listdir(directory):
+        if filename.startswith('.') or not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                published = json.load(f)
+        except FileNotFoundError:
+            continue
+        yield {
+            'histograms': {(name, endpoint): observed for name, endpoint, observed in published['histograms']},
+            'responses': {(endpoint, status): count for endpoint, status, count in published['responses']},
+        }
+
+
+def collect():
+    """
+    The totals of every process that published them, this one's up to date.
+
+    Only published totals are added up, so each worker answers with the
+    same, never decreasing, totals of the others.
+    """
+    directory = _metrics_dir()
+    if directory:
+        publish()
+        snapshots = list(_published_snapshots(directory))
+    else:
+        snapshots = [registry.snapshot()]
+
+    histograms, responses = {}, {}
+    for snapshot in snapshots:
+        for key, observed in snapshot['histograms'].items():
+            total = histograms.setdefault(key, [0] * (len(observed) - 1) + [0.0])
+            for i, value in enumerate(observed):
+                total[i] += value
+        for key, count in snapshot['responses'].items():
+            responses[key] = responses.get(key, 0) + count
+    return histograms, responses
+
+
+def _label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def exposition(histograms, responses):
+    """Render collected totals in the Prometheus text format."""
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (histogram, endpoint), observed in sorted(histograms.items()):
+            if histogram != name:
+                continue
+            endpoint = _label(endpoint)
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), observed):
+                cumulative += count
+                lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {_number(observed[-1])}')
+            lines.append(f'{name}_count{{endpoint="{endpoint}"}} {cumulative}')
+    lines.append(f'# HELP {RESPONSES} Responses by endpoint and status code')
+    lines.append(f'# TYPE {RESPONSES} counter')
+    for (endpoint, status), count in sorted(responses.items()):
+        lines.append(f'{RESPONSES}{{endpoint="{_label(endpoint)}",status="{status}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing(timing, total):
+    """The ``Server-Timing`` header value of a finished request."""
+    return (
+        f'db;dur={timing.db * 1000:.1f};desc="{timing.queries} queries", '
+        f'view;dur={(timing.view or 0.0) * 1000:.1f}, '
+        f'render;dur={timing.render * 1000:.1f}, '
+        f'total;dur={total * 1000:.1f}'
+    )
+
+
+class MetricsMiddleware:
+    """
+    Time each request into the registry and a ``Server-Timing`` header.
+
+    Goes first in MIDDLEWARE, so the total covers the other middleware.
+    The view is timed from its call until its response is rendered, for
+    DRF responses, or leaves the middleware below this one otherwise.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would run sync hooks of async middleware on a thread
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = request._cms_timing = RequestTiming(time.perf_counter())
+        token = _timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _timing.reset(token)
+        self.finish(request, response, timing)
+        if _publish_due():
+            publish()
+        return response
+
+    async def __acall__(self, request):
+        timing = request._cms_timing = RequestTiming(time.perf_counter())
+        token = _timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timing.reset(token)
+        self.finish(request, response, timing)
+        if _publish_due():
+            await sync_to_async(publish)()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view(request._cms_timing)
+
+    def process_template_response(self, request, response):
+        return self.start_render(request._cms_timing, response)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view(request._cms_timing)
+
+    async def aprocess_template_response(self, request, response):
+        return self.start_render(request._cms_timing, response)
+
+    def start_view(self, timing):
+        timing.view_started = time.perf_counter()
+        timing.db_before_view = timing.db
+
+    def start_render(self, timing, response):
+        timing.render_started = time.perf_counter()
+        timing.end_view(timing.render_started)
+
+        def rendered(response):
+            timing.render = time.perf_counter() - timing.render_started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, timing):
+        now = time.perf_counter()
+        timing.end_view(now)
+        total = now - timing.started
+        match = request.resolver_match
+        registry.record(match.view_name if match else 'unmatched', response.status_code, {
+            'cms_request_duration_seconds': total,
+            'cms_request_db_seconds': timing.db,
+            'cms_request_view_seconds': timing.view or 0.0,
+            'cms_request_render_seconds': timing.render,
+            'cms_request_queries': timing.queries,
+        })
+        if getattr(settings, 'CMS_SERVER_TIMING', False):
+            response['Server-Timing'] = server_timing(timing, total)
+
+
+def _authorized(request):
+    token = getattr(settings, 'CMS_METRICS_TOKEN', '')
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode())
+
+
+@require_safe
+def metrics(request):
+    """Prometheus metrics, for requests with ``Authorization: Bearer <CMS_METRICS_TOKEN>`` only."""
+    if not _authorized(request):
+        raise Http404
+    return HttpResponse(exposition(*collect()), content_type=CONTENT_TYPE)
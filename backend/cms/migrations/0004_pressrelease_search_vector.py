@@ -0,0 +1,54 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=['search_vector'], name='cms_pressrelease_search_gin',
+)
+
+
+def create_search_index(apps, schema_editor):
+    # Full-text search is PostgreSQL only; other databases keep the column
+    # unused and fall back to substring matching.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE TEXT SEARCH CONFIGURATION telugu (COPY = pg_catalog.simple)"
+    )
+    PressRelease = apps.get_model('cms', 'PressRelease')
+    schema_editor.add_index(PressRelease, SEARCH_INDEX)
+
+    from cms.fulltext import press_release_search_vector
+    PressRelease.objects.update(search_vector=press_release_search_vector())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    PressRelease = apps.get_model('cms', 'PressRelease')
+    schema_editor.remove_index(PressRelease, SEARCH_INDEX)
+    schema_editor.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS telugu")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0003_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pressrelease',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='pressrelease', index=SEARCH_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0004_pressrelease_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPressRelease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='cms.pressrelease')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cms.pressrelease')),
+            ],
+            options={
+                'ordering': ['source', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('source', 'rank'), name='cms_relatedpressrelease_source_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0005_relatedpressrelease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='galleryimage',
+            name='source_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='pressrelease',
+            name='source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0006_source_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['category', '-date', 'id'], name='cms_galleryimg_cat_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['-date', 'id'], name='cms_galleryimg_date_idx'),
+        ),
+    ]
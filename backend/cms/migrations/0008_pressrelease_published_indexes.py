@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0007_galleryimage_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pressrelease',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-published_date', '-id'], name='cms_pr_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pressrelease',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['category', '-published_date', '-id'], name='cms_pr_published_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pressrelease',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['-published_date', '-id'], name='cms_pr_published_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pressrelease',
+            index=models.Index(fields=['updated_at', 'id'], name='cms_pr_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0008_pressrelease_published_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pressrelease',
+            name='api_detail_json',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pressrelease',
+            name='api_list_json',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0009_pressrelease_api_payloads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pressrelease',
+            name='api_detail_en_json',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pressrelease',
+            name='api_detail_te_json',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pressrelease',
+            name='api_list_en_json',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pressrelease',
+            name='api_list_te_json',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
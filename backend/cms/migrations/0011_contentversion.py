@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-18 18:04
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+# Models the API is versioned by; they start out at their latest change
+VERSIONED_MODELS = ('notification', 'gallerycategory', 'galleryimage', 'newscategory', 'pressrelease')
+
+
+def seed_versions(apps, schema_editor):
+    ContentVersion = apps.get_model('cms', 'ContentVersion')
+    for name in VERSIONED_MODELS:
+        last_modified = apps.get_model('cms', name).objects.aggregate(last_modified=Max('updated_at'))['last_modified']
+        ContentVersion.objects.create(model=f'cms.{name}', version=1, updated_at=last_modified)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0010_pressrelease_language_payloads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('model', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RunPython(seed_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0011_contentversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=255)),
+                ('weight', models.FloatField()),
+                ('press_release', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cms.pressrelease')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='cms_relatedterm_term_idx')],
+            },
+        ),
+    ]
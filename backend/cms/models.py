@@ -1,13 +1,21 @@
+from collections import defaultdict
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 from django.utils.text import slugify
 from wagtail.snippets.models import register_snippet  # type: ignore
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel  # type: ignore
 from wagtail.fields import RichTextField  # type: ignore
+from wagtail.search import index  # type: ignore
 from taggit.models import TaggedItemBase  # type: ignore
 from modelcluster.fields import ParentalKey  # type: ignore
 from modelcluster.contrib.taggit import ClusterTaggableManager  # type: ignore
 from modelcluster.models import ClusterableModel  # type: ignore
 
+from .counters import view_counter
+
 
 @register_snippet
 class Notification(models.Model):
@@ -16,6 +24,7 @@ class Notification(models.Model):
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     panels = [
         FieldPanel('title'),
@@ -35,6 +44,7 @@ class Notification(models.Model):
 class GalleryCategory(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     panels = [
         FieldPanel('name'),
@@ -49,7 +59,7 @@ class GalleryCategory(models.Model):
 
 
 @register_snippet
-class GalleryImage(models.Model):
+class GalleryImage(index.Indexed, models.Model):
     image = models.ForeignKey(
         'wagtailimages.Image',
         on_delete=models.CASCADE,
@@ -63,6 +73,10 @@ class GalleryImage(models.Model):
         null=True,
         related_name='images'
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Fingerprint of the imported source record (see cms.importer)
+    source_hash = models.CharField(max_length=40, blank=True, editable=False, db_index=True)
 
     panels = [
         FieldPanel('image'),
@@ -71,8 +85,21 @@ class GalleryImage(models.Model):
         FieldPanel('category'),
     ]
 
+    # Site search (search.service)
+    search_fields = [
+        index.SearchField('title', boost=2),
+        index.AutocompleteField('title'),
+        index.RelatedFields('category', [index.SearchField('name')]),
+        index.FilterField('date'),
+    ]
+
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Keyset pagination of the gallery API, with and without ?category=
+            models.Index(fields=['category', '-date', 'id'], name='cms_galleryimg_cat_date_idx'),
+            models.Index(fields=['-date', 'id'], name='cms_galleryimg_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -85,6 +112,7 @@ class NewsCategory(models.Model):
     name = models.CharField(max_length=100)
     name_te = models.CharField(max_length=100, blank=True, help_text="Telugu translation")
     slug = models.SlugField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     panels = [
         FieldPanel('name'),
@@ -113,8 +141,19 @@ class PressReleaseTag(TaggedItemBase):
     )
 
 
+def tag_names_by_press_release(press_release_ids):
+    """Map each press release id to its tag names using a single query."""
+    tags = defaultdict(list)
+    tagged_items = PressReleaseTag.objects.filter(
+        content_object_id__in=press_release_ids
+    ).order_by('pk').values_list('content_object_id', 'tag__name')
+    for press_release_id, name in tagged_items:
+        tags[press_release_id].append(name)
+    return tags
+
+
 @register_snippet
-class PressRelease(ClusterableModel):
+class PressRelease(index.Indexed, ClusterableModel):
     # English fields
     title = models.CharField(max_length=500)
     slug = models.SlugField(unique=True, max_length=500)
@@ -157,6 +196,20 @@ class PressRelease(ClusterableModel):
     # Analytics
     views = models.PositiveIntegerField(default=0, editable=False)
 
+    # Full-text search (PostgreSQL only, maintained by cms.signals)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Fingerprint of the imported source record (see cms.importer)
+    source_hash = models.CharField(max_length=40, blank=True, editable=False)
+
+    # Pre-rendered API payloads, bilingual and per language (maintained by cms.prerender)
+    api_list_json = models.TextField(blank=True, editable=False)
+    api_detail_json = models.TextField(blank=True, editable=False)
+    api_list_en_json = models.TextField(blank=True, editable=False)
+    api_detail_en_json = models.TextField(blank=True, editable=False)
+    api_list_te_json = models.TextField(blank=True, editable=False)
+    api_detail_te_json = models.TextField(blank=True, editable=False)
+
     panels = [
         MultiFieldPanel([
             FieldPanel('title'),
@@ -185,10 +238,47 @@ class PressRelease(ClusterableModel):
         ], heading="Publishing"),
     ]
 
+    # Site search (search.service); the news API has its own index, search_vector
+    search_fields = [
+        index.SearchField('title', boost=3),
+        index.SearchField('title_te', boost=3),
+        index.SearchField('excerpt', boost=2),
+        index.SearchField('excerpt_te', boost=2),
+        index.SearchField('body'),
+        index.SearchField('body_te'),
+        index.AutocompleteField('title'),
+        index.RelatedFields('category', [index.SearchField('name'), index.SearchField('name_te')]),
+        index.RelatedFields('tags', [index.SearchField('name')]),
+        index.FilterField('is_published'),
+        index.FilterField('published_date'),
+    ]
+
     class Meta:
         ordering = ['-published_date']
         verbose_name = "Press Release / News Article"
         verbose_name_plural = "Press Releases / News Articles"
+        indexes = [
+            GinIndex(fields=['search_vector'], name='cms_pressrelease_search_gin'),
+            # Public listings only ever read published articles, newest first
+            # (cms.api.NEWS_ORDERING), so these cover just those rows.
+            models.Index(
+                fields=['-published_date', '-id'],
+                condition=Q(is_published=True),
+                name='cms_pr_published_idx',
+            ),
+            models.Index(
+                fields=['category', '-published_date', '-id'],
+                condition=Q(is_published=True),
+                name='cms_pr_published_category_idx',
+            ),
+            models.Index(
+                fields=['-published_date', '-id'],
+                condition=Q(is_published=True, is_featured=True),
+                name='cms_pr_published_featured_idx',
+            ),
+            # Lets the export's ?since= read the index instead of the table.
+            models.Index(fields=['updated_at', 'id'], name='cms_pr_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -199,5 +289,68 @@ class PressRelease(ClusterableModel):
         super().save(*args, **kwargs)
 
     def increment_views(self):
-        self.views += 1
-        self.save(update_fields=['views'])
\ No newline at end of file
+        # Buffered and flushed in batches by cms.counters; the instance
+        # reflects the pending views so callers see an up to date count.
+        self.views += view_counter.increment(self.pk)
+
+
+class RelatedPressRelease(models.Model):
+    """Precomputed content-similar articles, maintained by cms.related."""
+    source = models.ForeignKey(
+        PressRelease,
+        on_delete=models.CASCADE,
+        related_name='related_links'
+    )
+    target = models.ForeignKey(
+        PressRelease,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['source', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'rank'], name='cms_relatedpressrelease_source_rank'),
+        ]
+
+    def __str__(self):
+        return f'{self.source_id} -> {self.target_id}'
+
+
+class RelatedTerm(models.Model):
+    """A term of a published article's TF-IDF vector, maintained by cms.related."""
+    press_release = models.ForeignKey(
+        PressRelease,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    term = models.CharField(max_length=255)
+    # In the article's L2-normalised vector as of its last update; 0 for
+    # terms too common to score on, which still count towards the IDF
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            # Posting lists: the articles that share a term
+            models.Index(fields=['term'], name='cms_relatedterm_term_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.press_release_id}: {self.term}'
+
+
+class ContentVersion(models.Model):
+    """
+    Version of the rows of an API model, moved after every committed change.
+
+    Response cache keys, ETags and Last-Modified are derived from it (see
+    cms.cache), so every worker agrees on them whatever the cache backend.
+    """
+    model = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f'{self.model} v{self.version}'
@@ -0,0 +1,140 @@
+"""
+Keyset (cursor) pagination for the cms API.
+
+Pages are selected with a filter on the ordering columns that starts after
+the last row seen, instead of OFFSET, so fetching a deep page costs the same
+as fetching the first one. For ``ORDER BY a DESC, b DESC`` it reads
+``a <= x AND (a < x OR (a = x AND b < y))``: the same rows as the row value
+comparison ``(a, b) < (x, y)``, which can't express mixed directions, and
+the leading bound is one an index on ``(a, b)`` can range-scan from.
+Cursors are opaque, URL-safe tokens.
+"""
+import base64
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: str | None
+    prev_cursor: str | None
+
+
+def encode_cursor(position, reverse=False):
+    payload = json.dumps({'p': position, 'r': reverse}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload['p'], bool(payload['r'])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(token)
+
+
+def _parse_ordering(ordering):
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def _position(obj, fields):
+    values = []
+    for name, _ in fields:
+        value = getattr(obj, name)
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+    return values
+
+
+def _keyset_filter(model, fields, position, reverse):
+    if len(position) != len(fields):
+        raise InvalidCursor(position)
+    values = []
+    for (name, _), value in zip(fields, position):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations (e.g. a search rank) are stored as plain JSON values.
+            values.append(value)
+            continue
+        try:
+            values.append(field.to_python(value))
+        except ValidationError:
+            raise InvalidCursor(position)
+
+    # (a > x) OR (a = x AND b > y) OR ... with the comparison flipped for
+    # descending fields and again when walking backwards. Databases don't
+    # derive a range bound from the OR, so a >= x is added in front.
+    condition = Q()
+    for i, (name, descending) in enumerate(fields):
+        lookup = 'lt' if descending != reverse else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[i]})
+        for j in range(i):
+            term &= Q(**{fields[j][0]: values[j]})
+        condition |= term
+    name, descending = fields[0]
+    return Q(**{f'{name}__{"lte" if descending != reverse else "gte"}': values[0]}) & condition
+
+
+def _page_queryset(queryset, ordering, cursor):
+    fields = _parse_ordering(ordering)
+    reverse = False
+    if cursor:
+        position, reverse = decode_cursor(cursor)
+        queryset = queryset.filter(_keyset_filter(queryset.model, fields, position, reverse))
+
+    if reverse:
+        queryset = queryset.order_by(*[name if desc else f'-{name}' for name, desc in fields])
+    else:
+        queryset = queryset.order_by(*ordering)
+    return queryset, fields, reverse
+
+
+def _page(items, fields, reverse, cursor, page_size):
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if reverse:
+        items.reverse()
+
+    if not items:
+        return Page(items, None, None)
+
+    first, last = _position(items[0], fields), _position(items[-1], fields)
+    if reverse:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, bool(cursor)
+    return Page(
+        items,
+        encode_cursor(last) if has_next else None,
+        encode_cursor(first, reverse=True) if has_prev else None,
+    )
+
+
+def paginate(queryset, ordering, cursor=None, page_size=None):
+    """
+    Return one ``Page`` of ``queryset`` ordered by ``ordering``.
+
+    ``ordering`` must end in a unique column (usually ``id``) so positions
+    are total. Without a ``page_size`` the whole queryset is returned.
+    """
+    queryset, fields, reverse = _page_queryset(queryset, ordering, cursor)
+    if page_size is None:
+        return Page(list(queryset), None, None)
+    return _page(list(queryset[:page_size + 1]), fields, reverse, cursor, page_size)
+
+
+async def apaginate(queryset, ordering, cursor=None, page_size=None):
+    """``paginate`` for async views."""
+    queryset, fields, reverse = _page_queryset(queryset, ordering, cursor)
+    if page_size is None:
+        return Page([obj async for obj in queryset], None, None)
+    return _page([obj async for obj in queryset[:page_size + 1]], fields, reverse, cursor, page_size)
@@ -0,0 +1,244 @@
+"""
+Pre-rendered API representations of press releases.
+
+Each article stores its default news list item and its detail payload as
+JSON text, bilingual and once per language (see ``cms.languages``), so
+the news endpoints read one column per article instead of
+joining categories, images, renditions and tags and serializing every
+field on each request. URLs are stored site-relative and the live view
+count is left out; the views make the URLs absolute (``absolute_payload``)
+and add the count per response.
+
+Payloads are refreshed once the transaction commits after the article,
+its tags, its category or its featured image change (see ``cms.signals``),
+after bulk imports, and by ``manage.py prerender_news``. Articles read
+without one are rendered in memory for that response; reads never write.
+
+The six columns cost about 13 kB per article, around three times its
+body text: the bodies are stored again in the bilingual and the
+single-language detail payloads. On 1,000 seeded articles the table
+grows from about 10 MB to 23 MB.
+"""
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from .cache import bump_version
+from .languages import LANGUAGES, translated
+from .models import PressRelease, tag_names_by_press_release
+from .renditions import prefetch_renditions, serialize_renditions
+
+
+BATCH_SIZE = 500
+
+
+def payload_field(kind, lang=None):
+    """Column of the ``'list'`` or ``'detail'`` payload in ``lang`` (None: bilingual)."""
+    # Stored as text rather than jsonb, which would reorder the keys
+    return f'api_{kind}_{lang}_json' if lang else f'api_{kind}_json'
+
+
+PAYLOAD_FIELDS = [payload_field(kind, lang) for kind in ('list', 'detail') for lang in (None,) + LANGUAGES]
+
+# Keys of a list payload that make up a related_news entry on the detail endpoint
+RELATED_NEWS_KEYS = (
+    "id", "title", "slug", "excerpt", "featured_image", "featured_image_renditions",
+    "published_date", "category_name", "category_slug",
+)
+
+
+def _image_url(image):
+    return image.file.url if image else None
+
+
+def _localize(payload, pr, lang):
+    """Replace the English/Telugu pairs of a payload with their ``lang`` text, in place."""
+    for name in ('title', 'excerpt', 'body'):
+        if name in payload:
+            payload[name] = translated(pr, name, lang)
+            del payload[f'{name}_te']
+    return payload
+
+
+def list_payload(pr, tags, lang=None):
+    """The news list item of ``pr`` in ``lang`` (None: bilingual), without ``views``."""
+    payload = {
+        "id": pr.id,
+        "title": pr.title,
+        "title_te": pr.title_te,
+        "slug": pr.slug,
+        "excerpt": pr.excerpt,
+        "excerpt_te": pr.excerpt_te,
+        "featured_image": _image_url(pr.featured_image),
+        "featured_image_renditions": serialize_renditions(pr.featured_image),
+        "category": pr.category_id,
+        "category_name": translated(pr.category, 'name', lang) if pr.category else None,
+        "category_slug": pr.category.slug if pr.category else None,
+        "author": pr.author,
+        "tags": tags,
+        "is_featured": pr.is_featured,
+        "is_published": pr.is_published,
+        "published_date": pr.published_date.isoformat(),
+    }
+    return _localize(payload, pr, lang) if lang else payload
+
+
+def detail_payload(pr, tags, lang=None):
+    """The detail payload of ``pr`` in ``lang`` (None: bilingual), without ``views`` and ``related_news``."""
+    payload = {
+        "id": pr.id,
+        "title": pr.title,
+        "title_te": pr.title_te,
+        "slug": pr.slug,
+        "excerpt": pr.excerpt,
+        "excerpt_te": pr.excerpt_te,
+        "body": pr.body,
+        "body_te": pr.body_te,
+        "featured_image": _image_url(pr.featured_image),
+        "featured_image_renditions": serialize_renditions(pr.featured_image),
+        "category": {
+            "id": pr.category.id,
+            "name": pr.category.name,
+            "name_te": pr.category.name_te,
+            "slug": pr.category.slug,
+        } if pr.category else None,
+        "author": pr.author,
+        "tags": tags,
+        "is_featured": pr.is_featured,
+        "published_date": pr.published_date.isoformat(),
+        "created_at": pr.created_at.isoformat(),
+        "updated_at": pr.updated_at.isoformat(),
+    }
+    if lang:
+        _localize(payload, pr, lang)
+        if pr.category:
+            payload["category"] = {
+                "id": pr.category.id,
+                "name": translated(pr.category, 'name', lang),
+                "slug": pr.category.slug,
+            }
+    return payload
+
+
+def _renderers(fields):
+    """``(field, render, lang)`` of each payload column in ``fields``."""
+    return [
+        (payload_field(kind, lang), render, lang)
+        for lang in (None,) + LANGUAGES
+        for kind, render in (('list', list_payload), ('detail', detail_payload))
+        if payload_field(kind, lang) in fields
+    ]
+
+
+def _rendered_batches(press_release_ids, fields):
+    """Batches of the given articles with their ``fields`` payloads rendered onto them."""
+    renderers = _renderers(fields)
+    press_release_ids = list(press_release_ids)
+    for start in range(0, len(press_release_ids), BATCH_SIZE):
+        ids = press_release_ids[start:start + BATCH_SIZE]
+        press_releases = list(
+            PressRelease.objects.filter(pk__in=ids)
+            .select_related('category', 'featured_image')
+            .prefetch_related(prefetch_renditions('featured_image__renditions'))
+            .defer('search_vector', *PAYLOAD_FIELDS)
+        )
+        tags = tag_names_by_press_release(ids)
+        for pr in press_releases:
+            for field, render, lang in renderers:
+                setattr(pr, field, json.dumps(render(pr, tags[pr.id], lang), ensure_ascii=False))
+        yield press_releases
+
+
+def render_payloads(press_release_ids, fields=PAYLOAD_FIELDS):
+    """
+    Render the ``fields`` payloads of the given articles without storing them.
+
+    Returns ``{id: {field: json}}`` for the articles that still exist.
+    """
+    return {
+        pr.id: {field: getattr(pr, field) for field in fields}
+        for press_releases in _rendered_batches(press_release_ids, fields)
+        for pr in press_releases
+    }
+
+
+def refresh_payloads(press_release_ids):
+    """
+    Render and store the payloads of the given articles.
+
+    Returns ``{id: {field: json}}`` for the articles that still exist.
+    """
+    rendered = {}
+    for press_releases in _rendered_batches(press_release_ids, PAYLOAD_FIELDS):
+        PressRelease.objects.bulk_update(press_releases, PAYLOAD_FIELDS)
+        for pr in press_releases:
+            rendered[pr.id] = {field: getattr(pr, field) for field in PAYLOAD_FIELDS}
+    return rendered
+
+
+def load_payloads(press_releases, field):
+    """
+    Decode the stored ``field`` payload of each article.
+
+    Missing ones are rendered in memory and not saved: the signals and
+    ``manage.py prerender_news`` fill the column.
+    """
+    missing = [pr.pk for pr in press_releases if not getattr(pr, field)]
+    if missing:
+        rendered = render_payloads(missing, (field,))
+        for pr in press_releases:
+            if pr.pk in rendered:
+                setattr(pr, field, rendered[pr.pk][field])
+    return [json.loads(getattr(pr, field)) for pr in press_releases]
+
+
+async def aload_payloads(press_releases, field):
+    """``load_payloads`` for async views."""
+    if all(getattr(pr, field) for pr in press_releases):
+        return [json.loads(getattr(pr, field)) for pr in press_releases]
+    return await sync_to_async(load_payloads)(press_releases, field)
+
+
+def absolute_payload(payload, origin):
+    """Prefix the site-relative URLs of a decoded payload with ``origin``, in place."""
+    if payload["featured_image"] and payload["featured_image"].startswith('/'):
+        payload["featured_image"] = origin + payload["featured_image"]
+    for formats in (payload["featured_image_renditions"] or {}).values():
+        for rendition in formats.values():
+            if rendition["url"].startswith('/'):
+                rendition["url"] = origin + rendition["url"]
+    return payload
+
+
+def site_origin(request):
+    """``scheme://host`` of ``request``, to prefix stored URLs with."""
+    return request.build_absolute_uri('/')[:-1]
+
+
+_scheduled = threading.local()
+
+
+def schedule_refresh(*press_release_ids):
+    """
+    Refresh the payloads of the articles when the transaction commits.
+
+    Articles scheduled in the same transaction are rendered together.
+    """
+    pending = getattr(_scheduled, 'ids', None)
+    if pending is None:
+        pending = _scheduled.ids = set()
+    # Ids left over from a rolled back transaction are rendered with these;
+    # a callback is registered every time since theirs never ran.
+    pending.update(press_release_ids)
+
+    def run():
+        ids = sorted(pending)
+        pending.clear()
+        if ids:
+            refresh_payloads(ids)
+            # Responses cached since the change was saved hold the old payloads
+            bump_version(PressRelease)
+
+    transaction.on_commit(run)
@@ -0,0 +1,343 @@
+"""
+Related news engine.
+
+Published articles are vectorised with TF-IDF over their title, excerpt
+and tags, and the top-k cosine neighbours of each article are stored in
+``RelatedPressRelease`` so the detail endpoint reads them with a single
+indexed lookup. Each article's vector is stored too (``RelatedTerm``), one
+row per term, which makes the rows of a term its posting list.
+
+Saving an article re-indexes it once the transaction commits (see
+``schedule_update``): its vector is scored against the stored vectors of
+the articles sharing a term with it, so the cost follows its terms, not
+the size of the archive. IDF weights are taken as of each article's last
+update; ``manage.py rebuild_related_news`` refits them across the archive.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Min
+
+from .cache import bump_version
+from .models import PressRelease, RelatedPressRelease, RelatedTerm, tag_names_by_press_release
+from .snapshot import schedule_articles
+
+
+RELATED_COUNT = 3
+
+# Terms in more than this share of articles carry no signal and make the
+# posting lists long, so they are left out of the vocabulary once the
+# archive is large enough for document frequencies to mean something.
+MAX_DOCUMENT_FREQUENCY = 0.5
+MAX_DOCUMENT_FREQUENCY_MIN_ARTICLES = 50
+
+STOP_WORDS = frozenset(
+    'the and for with from that this was were are has have had its his her their '
+    'into onto over under also been being will shall may can our your about at by '
+    'in of on to as an a is it be or not all any'.split()
+)
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Longer tokens are noise, and would not fit RelatedTerm.term
+MAX_TOKEN_LENGTH = 100
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if 2 < len(token) <= MAX_TOKEN_LENGTH and token not in STOP_WORDS and not token.isdigit()
+    ]
+
+
+def _document_terms(title, excerpt, tags):
+    terms = Counter(tokenize(title))
+    terms.update(tokenize(excerpt))
+    # Tags are editorial signals; count each as a distinct, whole term.
+    terms.update(f'tag:{tag.lower()}' for tag in tags)
+    return terms
+
+
+def _max_document_frequency(n):
+    return int(MAX_DOCUMENT_FREQUENCY * n) if n >= MAX_DOCUMENT_FREQUENCY_MIN_ARTICLES else n
+
+
+def _idf(n, df):
+    return math.log((1 + n) / (1 + df)) + 1
+
+
+class TfidfIndex:
+    """L2-normalised TF-IDF vectors stored as sparse rows and posting lists."""
+
+    def __init__(self, ids, documents):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.position = {pk: row for row, pk in enumerate(ids)}
+        self.documents = documents
+        n = len(ids)
+
+        document_frequency = Counter()
+        for terms in documents:
+            document_frequency.update(terms.keys())
+        max_df = _max_document_frequency(n)
+        vocabulary = {
+            term: index for index, term in enumerate(
+                term for term, df in document_frequency.items() if df <= max_df
+            )
+        }
+        self.terms = list(vocabulary)
+        idf = np.zeros(len(vocabulary))
+        for term, index in vocabulary.items():
+            idf[index] = _idf(n, document_frequency[term])
+
+        # Document rows (CSR)
+        row_ptr = [0]
+        row_terms, row_weights = [], []
+        for terms in documents:
+            indices = [vocabulary[term] for term in terms if term in vocabulary]
+            weights = np.array(
+                [(1 + math.log(terms[term])) for term in terms if term in vocabulary]
+            ) * idf[indices]
+            norm = np.linalg.norm(weights)
+            if norm:
+                weights /= norm
+            row_terms.extend(indices)
+            row_weights.extend(weights.tolist())
+            row_ptr.append(len(row_terms))
+        self.row_ptr = np.asarray(row_ptr, dtype=np.int64)
+        self.row_terms = np.asarray(row_terms, dtype=np.int64)
+        self.row_weights = np.asarray(row_weights, dtype=np.float64)
+
+        # Posting lists per term (CSC), to score one article against all
+        order = np.argsort(self.row_terms, kind='stable')
+        self.posting_docs = np.repeat(np.arange(n), np.diff(self.row_ptr))[order]
+        self.posting_weights = self.row_weights[order]
+        self.term_ptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.row_terms, minlength=len(vocabulary)), out=self.term_ptr[1:])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vector(self, row):
+        """``{term: weight}`` of ``row``, with its terms left out of the vocabulary at 0."""
+        start, end = self.row_ptr[row], self.row_ptr[row + 1]
+        vector = dict.fromkeys(self.documents[row], 0.0)
+        for term, weight in zip(self.row_terms[start:end].tolist(), self.row_weights[start:end].tolist()):
+            vector[self.terms[term]] = weight
+        return vector
+
+    def similarities(self, row):
+        """Cosine similarity of ``row`` with every article (itself excluded)."""
+        start, end = self.row_ptr[row], self.row_ptr[row + 1]
+        docs, products = [], []
+        for term, weight in zip(self.row_terms[start:end], self.row_weights[start:end]):
+            lo, hi = self.term_ptr[term], self.term_ptr[term + 1]
+            docs.append(self.posting_docs[lo:hi])
+            products.append(self.posting_weights[lo:hi] * weight)
+        if not docs:
+            return np.zeros(len(self))
+        scores = np.bincount(np.concatenate(docs), weights=np.concatenate(products), minlength=len(self))
+        scores[row] = 0
+        return scores
+
+    def neighbours(self, row, k=RELATED_COUNT, scores=None):
+        """Return up to ``k`` ``(id, score)`` pairs, most similar first."""
+        if scores is None:
+            scores = self.similarities(row)
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [
+            (int(self.ids[i]), float(scores[i]))
+            for i in candidates if scores[i] > 0
+        ]
+
+
+def _documents(press_release_ids=None):
+    """``{id: terms}`` of the published articles, or of those among ``press_release_ids``."""
+    articles = PressRelease.objects.filter(is_published=True)
+    if press_release_ids is not None:
+        articles = articles.filter(pk__in=press_release_ids)
+    articles = list(articles.order_by('pk').values_list('pk', 'title', 'excerpt'))
+    tags = tag_names_by_press_release([pk for pk, _, _ in articles])
+    return {pk: _document_terms(title, excerpt, tags[pk]) for pk, title, excerpt in articles}
+
+
+def build_index():
+    documents = _documents()
+    return TfidfIndex(list(documents), list(documents.values()))
+
+
+def _links(source_id, neighbours):
+    return [
+        RelatedPressRelease(source_id=source_id, target_id=target_id, score=score, rank=rank)
+        for rank, (target_id, score) in enumerate(neighbours)
+    ]
+
+
+def _term_rows(press_release_id, vector):
+    return [
+        RelatedTerm(press_release_id=press_release_id, term=term, weight=weight)
+        for term, weight in vector.items()
+    ]
+
+
+def rebuild_all(batch_size=1000):
+    """Recompute the vectors and related articles of every published article."""
+    index = build_index()
+    with transaction.atomic():
+        RelatedPressRelease.objects.all().delete()
+        RelatedTerm.objects.all().delete()
+        links, terms = [], []
+        for row, source_id in enumerate(index.ids.tolist()):
+            links.extend(_links(source_id, index.neighbours(row)))
+            terms.extend(_term_rows(source_id, index.vector(row)))
+            if len(links) + len(terms) >= batch_size:
+                RelatedPressRelease.objects.bulk_create(links)
+                RelatedTerm.objects.bulk_create(terms)
+                links, terms = [], []
+        RelatedPressRelease.objects.bulk_create(links)
+        RelatedTerm.objects.bulk_create(terms, batch_size=batch_size)
+    return len(index)
+
+
+def _vector(press_release_id, terms, n):
+    """The ``{term: weight}`` vector of an article, with IDF weights from the stored vectors."""
+    document_frequency = {
+        entry['term']: entry['documents'] + 1
+        for entry in RelatedTerm.objects.filter(term__in=list(terms)).exclude(press_release_id=press_release_id)
+        .values('term').annotate(documents=Count('pk'))
+    }
+    max_df = _max_document_frequency(n)
+    vector = {}
+    for term, frequency in terms.items():
+        df = document_frequency.get(term, 1)
+        vector[term] = (1 + math.log(frequency)) * _idf(n, df) if df <= max_df else 0.0
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {term: weight / norm for term, weight in vector.items()} if norm else vector
+
+
+def _stored_vector(press_release_id):
+    return dict(RelatedTerm.objects.filter(press_release_id=press_release_id).values_list('term', 'weight'))
+
+
+def _scores(press_release_id, vector):
+    """Cosine similarity of ``vector`` with the stored vector of every other article sharing a term."""
+    weights = {term: weight for term, weight in vector.items() if weight > 0}
+    scores = defaultdict(float)
+    postings = (
+        RelatedTerm.objects.filter(term__in=list(weights), weight__gt=0)
+        .exclude(press_release_id=press_release_id)
+        .values_list('press_release_id', 'term', 'weight')
+    )
+    for other_id, term, weight in postings:
+        scores[other_id] += weights[term] * weight
+    return scores
+
+
+def _top(scores, k=RELATED_COUNT):
+    """Up to ``k`` ``(id, score)`` pairs of ``scores``, most similar first."""
+    return sorted(((pk, score) for pk, score in scores.items() if score > 0), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def _update_article(press_release_id, terms, n):
+    """Re-index one article and rewrite the lists it changes; returns their sources."""
+    with transaction.atomic():
+        RelatedTerm.objects.filter(press_release_id=press_release_id).delete()
+        scores = {}
+        if terms is not None:
+            vector = _vector(press_release_id, terms, n)
+            RelatedTerm.objects.bulk_create(_term_rows(press_release_id, vector))
+            scores = _scores(press_release_id, vector)
+
+        # Lists it was in may have to drop it or give it another rank
+        containing = set(
+            RelatedPressRelease.objects.filter(target_id=press_release_id).values_list('source_id', flat=True)
+        )
+        # Lists it now scores high enough to enter
+        candidates = [source_id for source_id in scores if source_id not in containing]
+        lowest = {
+            entry['source_id']: entry['lowest'] if entry['size'] >= RELATED_COUNT else 0
+            for entry in RelatedPressRelease.objects.filter(source_id__in=candidates)
+            .values('source_id').annotate(lowest=Min('score'), size=Count('pk'))
+        }
+        entering = {source_id for source_id in candidates if scores[source_id] > lowest.get(source_id, 0)}
+
+        sources = containing | entering
+        if terms is not None:
+            sources.add(press_release_id)
+        # Writers of the same lists wait here for each other, in id order
+        # so they can't deadlock, and read the lists once they hold them
+        list(PressRelease.objects.select_for_update().filter(pk__in=sources).order_by('pk').values_list('pk'))
+
+        links = []
+        if terms is not None:
+            links.extend(_links(press_release_id, _top(scores)))
+        for source_id in containing:
+            links.extend(_links(source_id, _top(_scores(source_id, _stored_vector(source_id)))))
+        current = defaultdict(dict)
+        for source_id, target_id, score in RelatedPressRelease.objects.filter(
+            source_id__in=entering,
+        ).values_list('source_id', 'target_id', 'score'):
+            current[source_id][target_id] = score
+        for source_id in entering:
+            current[source_id][press_release_id] = scores[source_id]
+            links.extend(_links(source_id, _top(current[source_id])))
+
+        RelatedPressRelease.objects.filter(source_id__in=sources | {press_release_id}).delete()
+        RelatedPressRelease.objects.bulk_create(links)
+    return sources | {press_release_id}
+
+
+def update_related(*press_release_ids):
+    """
+    Re-index some articles and update the related news they change.
+
+    Each article's own list is recomputed, it enters the lists it now
+    scores high enough for, and the lists it was in are recomputed from
+    their stored vectors. Unpublished and deleted articles leave every
+    list. Returns the ids of the articles whose lists were rewritten.
+    """
+    documents = _documents(press_release_ids)
+    n = PressRelease.objects.filter(is_published=True).count()
+    updated = set()
+    for press_release_id in sorted(set(press_release_ids)):
+        updated |= _update_article(press_release_id, documents.get(press_release_id), n)
+    # Detail responses embed the lists
+    bump_version(PressRelease)
+    return sorted(updated)
+
+
+_scheduled = threading.local()
+
+
+def schedule_update(press_release_id):
+    """
+    Update the related news of the article once the transaction commits.
+
+    Articles scheduled in the same transaction are updated together, and
+    the API snapshot files of those whose lists changed are republished.
+    """
+    pending = getattr(_scheduled, 'ids', None)
+    if pending is None:
+        pending = _scheduled.ids = set()
+    # Always register: an id may still be pending from a rolled back
+    # transaction whose callback never ran.
+    pending.add(press_release_id)
+
+    def run():
+        # The first callback to run takes every pending article; one
+        # registered in a rolled back savepoint never runs, so the later
+        # ones don't rely on it.
+        ids = sorted(pending)
+        pending.clear()
+        if ids:
+            # Detail responses embed the lists, so do the snapshot's files
+            schedule_articles(update_related(*ids))
+
+    transaction.on_commit(run)
@@ -0,0 +1,71 @@
+"""
+Fast JSON renderer and parser for the DRF API.
+
+Both use orjson when it is installed and fall back to DRF's stdlib based
+``JSONRenderer`` and ``JSONParser`` otherwise. Output matches
+``JSONRenderer``: compact separators, unescaped unicode, U+2028/U+2029
+escaped, datetimes encoded natively in the same ISO 8601 form (UTC as
+"Z"), and decimals, lazy strings and other types orjson doesn't know
+handed to DRF's own encoder. Only floats of 1e16 and up are spelled
+differently ("1e16" rather than "1e+16").
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    # DRF's encoder writes a zero UTC offset as "Z"
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` with orjson doing the encoding."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None
+            # Indented or ASCII-only output isn't something orjson can match
+            or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        # Valid JSON but not valid JavaScript, so escaped as JSONRenderer does
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    """``JSONParser`` with orjson doing the decoding."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class JSONResponse(HttpResponse):
+    """
+    ``data`` rendered as the DRF views render it, for the views that don't
+    go through DRF (see ``cms.api_async``). Keeps ``data``, like ``Response``.
+    """
+
+    def __init__(self, data, status=200):
+        super().__init__(ORJSONRenderer().render(data), content_type='application/json', status=status)
+        self.data = data
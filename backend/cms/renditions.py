@@ -0,0 +1,140 @@
+"""
+Responsive image renditions for the cms API.
+
+Each image used by the gallery or as a featured image gets a thumbnail,
+card and full size, as WebP plus a JPEG fallback. The API only reports
+renditions that already exist (prefetched in one query per response);
+they are generated after an image is saved and in bulk by
+``manage.py generate_renditions``, never while serving a public request.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+
+from .cache import bump_version
+from .models import GalleryImage, PressRelease
+
+
+RENDITION_SIZES = {
+    'thumbnail': 'fill-320x240',
+    'card': 'fill-640x400',
+    'full': 'max-1600x1600',
+}
+
+RENDITION_FORMATS = {
+    'webp': 'format-webp',
+    'jpeg': 'format-jpeg',
+}
+
+# Image columns the rendition lookup reads (fill crops vary by focal point)
+RENDITION_IMAGE_FIELDS = ('focal_point_x', 'focal_point_y', 'focal_point_width', 'focal_point_height')
+
+RENDITION_SPECS = [
+    f'{size_spec}|{format_spec}'
+    for size_spec in RENDITION_SIZES.values()
+    for format_spec in RENDITION_FORMATS.values()
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _rendition_model():
+    return get_image_model().get_rendition_model()
+
+
+def prefetch_renditions(lookup='renditions'):
+    """A ``Prefetch`` loading the API renditions of the images at ``lookup``."""
+    return Prefetch(
+        lookup,
+        queryset=_rendition_model().objects.filter(filter_spec__in=RENDITION_SPECS),
+        to_attr='prefetched_renditions',
+    )
+
+
+def serialize_renditions(image, request=None):
+    """
+    Return ``{size: {format: {url, width, height}}}`` for existing renditions.
+
+    Sizes or formats that haven't been generated yet are left out; clients
+    fall back to the original image URL. URLs are absolute when a
+    ``request`` is given.
+    """
+    if image is None:
+        return None
+    filters = {
+        (size, image_format): Filter(f'{size_spec}|{format_spec}')
+        for size, size_spec in RENDITION_SIZES.items()
+        for image_format, format_spec in RENDITION_FORMATS.items()
+    }
+    existing = image.find_existing_renditions(*filters.values())
+    renditions = {}
+    for (size, image_format), rendition_filter in filters.items():
+        rendition = existing.get(rendition_filter)
+        if rendition is not None:
+            renditions.setdefault(size, {})[image_format] = {
+                "url": request.build_absolute_uri(rendition.url) if request else rendition.url,
+                "width": rendition.width,
+                "height": rendition.height,
+            }
+    return renditions
+
+
+def missing_renditions(image_ids):
+    """Map each image id to the API rendition specs it doesn't have yet."""
+    existing = {}
+    renditions = _rendition_model().objects.filter(
+        image_id__in=image_ids, filter_spec__in=RENDITION_SPECS,
+    ).values_list('image_id', 'filter_spec')
+    for image_id, spec in renditions:
+        existing.setdefault(image_id, set()).add(spec)
+    missing = {}
+    for image_id in image_ids:
+        specs = [spec for spec in RENDITION_SPECS if spec not in existing.get(image_id, ())]
+        if specs:
+            missing[image_id] = specs
+    return missing
+
+
+def generate_renditions(image, specs=RENDITION_SPECS):
+    """Create any of ``specs`` that ``image`` is missing, reading the source file once."""
+    return image.get_renditions(*specs)
+
+
+def renditions_generated(image_ids):
+    """
+    Publish new renditions of ``image_ids`` to the API.
+
+    Rows using the images are touched so ETags change, the pre-rendered
+    payloads of the articles are refreshed and their cached responses are
+    invalidated.
+    """
+    from .prerender import refresh_payloads  # cms.prerender imports this module
+
+    now = timezone.now()
+    GalleryImage.objects.filter(image_id__in=image_ids).update(updated_at=now)
+    press_releases = PressRelease.objects.filter(featured_image_id__in=image_ids)
+    press_releases.update(updated_at=now)
+    refresh_payloads(press_releases.values_list('pk', flat=True))
+    bump_version(GalleryImage, PressRelease)
+
+
+def schedule_generation(image_id):
+    """Generate the missing renditions of an image once the transaction commits."""
+    def run():
+        specs = missing_renditions([image_id]).get(image_id)
+        if not specs:
+            return
+        try:
+            generate_renditions(get_image_model().objects.get(pk=image_id), specs)
+        except Exception:
+            # The original may be missing or unreadable; the API keeps
+            # serving it and generate_renditions will report it.
+            logger.exception('Could not generate renditions for image %s', image_id)
+            return
+        renditions_generated([image_id])
+
+    transaction.on_commit(run)
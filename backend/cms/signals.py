@@ -0,0 +1,113 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from wagtail.images import get_image_model
+
+from .cache import bump_version
+from .fulltext import update_search_vectors
+from .prerender import schedule_refresh
+from .related import schedule_update
+from .renditions import schedule_generation
+from .snapshot import remember_lists, schedule_publish
+from .models import (
+    GalleryCategory,
+    GalleryImage,
+    NewsCategory,
+    Notification,
+    PressRelease,
+    PressReleaseTag,
+    RelatedPressRelease,
+)
+
+
+def invalidate_api_cache(sender, **kwargs):
+    bump_version(sender)
+
+
+def refresh_search_vector(sender, instance, **kwargs):
+    update_search_vectors(PressRelease.objects.filter(pk=instance.pk))
+
+
+def refresh_related_news(sender, instance, **kwargs):
+    schedule_update(instance.pk)
+
+
+def refresh_related_news_of_sources(sender, instance, **kwargs):
+    # The cascade removes the links pointing at this article, so refill
+    # the lists it was part of.
+    source_ids = RelatedPressRelease.objects.filter(target=instance).values_list('source_id', flat=True)
+    for source_id in source_ids:
+        schedule_update(source_id)
+
+
+def generate_image_renditions(sender, instance, **kwargs):
+    image_id = instance.featured_image_id if sender is PressRelease else instance.image_id
+    if image_id:
+        schedule_generation(image_id)
+
+
+def refresh_payload(sender, instance, **kwargs):
+    schedule_refresh(instance.pk)
+
+
+def refresh_payload_for_tags(sender, instance, **kwargs):
+    schedule_refresh(instance.content_object_id)
+
+
+def refresh_payloads_of_category(sender, instance, **kwargs):
+    # On delete the articles are detached after pre_delete; the refresh
+    # runs on commit, once they have been.
+    schedule_refresh(*PressRelease.objects.filter(category=instance).values_list('pk', flat=True))
+
+
+def refresh_payloads_of_image(sender, instance, **kwargs):
+    schedule_refresh(*PressRelease.objects.filter(featured_image=instance).values_list('pk', flat=True))
+
+
+def invalidate_press_release_tags(sender, **kwargs):
+    bump_version(PressRelease)
+
+
+def refresh_related_news_for_tags(sender, instance, **kwargs):
+    schedule_update(instance.content_object_id)
+
+
+def remember_api_snapshot_lists(sender, instance, **kwargs):
+    remember_lists(instance)
+
+
+def republish_api_snapshot(sender, instance, **kwargs):
+    schedule_publish(instance)
+
+
+for model in (Notification, GalleryCategory, GalleryImage, NewsCategory, PressRelease):
+    post_save.connect(invalidate_api_cache, sender=model)
+    post_delete.connect(invalidate_api_cache, sender=model)
+
+post_save.connect(invalidate_press_release_tags, sender=PressReleaseTag)
+post_delete.connect(invalidate_press_release_tags, sender=PressReleaseTag)
+
+# Before the related news, whose update republishes the snapshot files
+# rendered from the payloads
+post_save.connect(refresh_payload, sender=PressRelease)
+post_save.connect(refresh_payload_for_tags, sender=PressReleaseTag)
+post_delete.connect(refresh_payload_for_tags, sender=PressReleaseTag)
+
+post_save.connect(refresh_search_vector, sender=PressRelease)
+post_save.connect(refresh_related_news, sender=PressRelease)
+pre_delete.connect(refresh_related_news_of_sources, sender=PressRelease)
+post_save.connect(refresh_related_news_for_tags, sender=PressReleaseTag)
+post_delete.connect(refresh_related_news_for_tags, sender=PressReleaseTag)
+post_save.connect(generate_image_renditions, sender=PressRelease)
+post_save.connect(generate_image_renditions, sender=GalleryImage)
+
+post_save.connect(refresh_payloads_of_category, sender=NewsCategory)
+pre_delete.connect(refresh_payloads_of_category, sender=NewsCategory)
+post_save.connect(refresh_payloads_of_image, sender=get_image_model())
+pre_delete.connect(refresh_payloads_of_image, sender=get_image_model())
+
+for model in (GalleryImage, PressRelease):
+    pre_save.connect(remember_api_snapshot_lists, sender=model)
+
+# Connected last so the publish is queued behind the refreshes above
+for model in (Notification, GalleryCategory, GalleryImage, NewsCategory, PressRelease, PressReleaseTag):
+    post_save.connect(republish_api_snapshot, sender=model)
+    post_delete.connect(republish_api_snapshot, sender=model)
@@ -0,0 +1,369 @@
+"""
+Static JSON snapshot of the public cms API.
+
+``publish`` renders the responses the site fetches into files under a
+directory the web server serves without reaching Django: notifications,
+the gallery and news categories, the first page of the gallery and news
+lists (all, per category, and the featured news) with the page sizes the
+site asks for, and every published article in each language. Files are
+named after the request path and query string, so nginx can map a request
+onto its file directly:
+
+    location /api/v2/ {
+        root <CMS_API_SNAPSHOT_DIR>;
+        default_type application/json;
+        try_files $uri/index${is_args}${args}.json @django;
+    }
+
+Other pages and parameter combinations have no file and fall through to
+Django. Query strings are matched as sent, so the lists are published with
+their parameters in the order the site's API client writes them. Files are
+replaced atomically and only when their content changed; files of deleted
+or unpublished content are removed. View counts are as of the last
+publish; the site counts article reads through ``press_release_view``,
+which never has a file.
+
+With CMS_API_SNAPSHOT_DIR set, a content change republishes the files the
+changed object was and is in, in a background thread once the transaction
+commits (``schedule_publish``), and related news updates republish the
+articles whose lists changed (``schedule_articles``). Category changes
+republish everything.
+"""
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from functools import partial
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpRequest, QueryDict
+from rest_framework.settings import api_settings
+
+from .api import (
+    GALLERY_ORDERING,
+    GALLERY_PAGE_SIZE,
+    NEWS_PAGE_SIZE,
+    gallery_categories_data,
+    gallery_images_data,
+    gallery_images_queryset,
+    news_categories_data,
+    news_list_data,
+    news_list_query,
+    notifications_data,
+    page_size,
+    press_release_detail_data,
+)
+from .languages import LANGUAGES
+from .models import (
+    GalleryCategory,
+    GalleryImage,
+    NewsCategory,
+    Notification,
+    PressRelease,
+    PressReleaseTag,
+    tag_names_by_press_release,
+)
+from .pagination import paginate
+from .prerender import load_payloads, payload_field, site_origin
+
+
+logger = logging.getLogger(__name__)
+
+API_ROOT = '/api/v2/'
+NEWS_ROOT = f'{API_ROOT}news/'
+
+# The site's home page shows this many featured news
+FEATURED_NEWS_COUNT = 3
+
+
+@dataclass
+class SnapshotResult:
+    written: list = field(default_factory=list)
+    unchanged: int = 0
+    removed: list = field(default_factory=list)
+
+
+def _gallery_page(category=None):
+    # Parameters in the order of the site's getGalleryImages()
+    params = {'category': category} if category else {}
+    params['limit'] = GALLERY_PAGE_SIZE
+    return ('/api/v2/gallery/images/', params)
+
+
+def _news_page(category=None, featured=False):
+    # Parameters in the order of the site's getPressReleases()
+    params = {'category': category} if category else {}
+    if featured:
+        params['featured'] = 'true'
+    params['limit'] = FEATURED_NEWS_COUNT if featured else NEWS_PAGE_SIZE
+    return (NEWS_ROOT, params)
+
+
+def article_requests(slug):
+    """``(path, params)`` of the detail responses of the article ``slug``, in each language."""
+    return [(f'{NEWS_ROOT}{slug}/', {'lang': lang} if lang else {}) for lang in (None,) + LANGUAGES]
+
+
+def snapshot_requests():
+    """``(path, params)`` of every request the snapshot answers."""
+    gallery_categories = GalleryCategory.objects.values_list('slug', flat=True)
+    news_categories = NewsCategory.objects.values_list('slug', flat=True)
+    articles = PressRelease.objects.filter(is_published=True).order_by('pk').values_list('slug', flat=True)
+    return [
+        ('/api/v2/notifications/', {}),
+        ('/api/v2/gallery/categories/', {}),
+        _gallery_page(),
+        *(_gallery_page(slug) for slug in gallery_categories),
+        ('/api/v2/news/categories/', {}),
+        _news_page(),
+        _news_page(featured=True),
+        *(_news_page(slug) for slug in news_categories),
+        *(request for slug in articles.iterator() for request in article_requests(slug)),
+    ]
+
+
+def list_requests(instance):
+    """``(path, params)`` of the snapshot files ``instance`` is in, or None for all of them."""
+    if isinstance(instance, Notification):
+        return [('/api/v2/notifications/', {})]
+    if isinstance(instance, GalleryImage):
+        requests = [_gallery_page()]
+        if instance.category_id:
+            requests.append(_gallery_page(instance.category.slug))
+        return requests
+    if isinstance(instance, PressRelease):
+        requests = [_news_page(), *article_requests(instance.slug)]
+        if instance.is_featured:
+            requests.append(_news_page(featured=True))
+        if instance.category_id:
+            requests.append(_news_page(instance.category.slug))
+        return requests
+    if isinstance(instance, PressReleaseTag):
+        # Tags are part of the list items
+        press_release = PressRelease.objects.select_related('category').filter(pk=instance.content_object_id).first()
+        return list_requests(press_release) if press_release else []
+    # Categories are in every list of theirs, and add or remove files
+    return None
+
+
+def snapshot_path(path, params):
+    """File of the response to ``path?params``, relative to the snapshot directory."""
+    name = f'index?{urlencode(params)}.json' if params else 'index.json'
+    return os.path.join(*path.strip('/').split('/'), name)
+
+
+def write_file(path, content):
+    """Atomically replace ``path`` with ``content`` unless it already holds it; returns whether it wrote."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Hidden, so readers never see a partial file and pruning leaves it alone
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+class _SnapshotRequest(HttpRequest):
+    """A GET of ``path?params`` as sent to ``origin``, for the views' data functions."""
+
+    def __init__(self, origin, path, params):
+        super().__init__()
+        url = urlsplit(origin)
+        self.method = 'GET'
+        self.path = self.path_info = path
+        self.GET = QueryDict(urlencode(params))
+        self._scheme = url.scheme
+        self._host = url.netloc
+
+    def _get_scheme(self):
+        return self._scheme
+
+    def get_host(self):
+        # Set by the operator, not a client, so not checked against ALLOWED_HOSTS
+        return self._host
+
+
+def _notifications(request):
+    return notifications_data()
+
+
+def _gallery_categories(request):
+    return gallery_categories_data(GalleryCategory.objects.all())
+
+
+def _gallery_images(request):
+    images = gallery_images_queryset(request)
+    page = paginate(images, GALLERY_ORDERING, None, page_size(request, GALLERY_PAGE_SIZE))
+    return gallery_images_data(page, images.count(), request)
+
+
+def _news_categories(request):
+    return news_categories_data(NewsCategory.objects.all())
+
+
+def _news(request):
+    query = news_list_query(request)
+    page = paginate(query.queryset, query.ordering, query.cursor, query.page_size)
+    payloads = load_payloads(page.items, query.list_field) if query.prerendered else None
+    tags = tag_names_by_press_release([pr.id for pr in page.items]) if query.needs_tags else {}
+    return news_list_data(query, page, query.queryset.count(), request, payloads, tags)
+
+
+def _article(request):
+    """The detail response of the article, or None if it isn't published."""
+    lang = request.GET.get('lang') or None
+    pr = PressRelease.objects.filter(slug=request.path[len(NEWS_ROOT):-1], is_published=True).only(
+        'id', 'views', payload_field('detail', lang),
+    ).first()
+    return press_release_detail_data(pr, lang, site_origin(request)) if pr else None
+
+
+# Path -> the data of its response, as the view builds it; any other path
+# is an article's
+RESPONSE_DATA = {
+    '/api/v2/notifications/': _notifications,
+    '/api/v2/gallery/categories/': _gallery_categories,
+    '/api/v2/gallery/images/': _gallery_images,
+    '/api/v2/news/categories/': _news_categories,
+    '/api/v2/news/': _news,
+}
+
+
+def _rendered_responses(origin, requests):
+    """``(path, params, content)`` of each request as the API renders it; content is None if there is none."""
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    for path, params in requests:
+        data = RESPONSE_DATA.get(path, _article)(_SnapshotRequest(origin, path, params))
+        yield path, params, renderer.render(data) if data is not None else None
+
+
+def _remove(root, relative_path, result):
+    try:
+        os.unlink(os.path.join(root, relative_path))
+    except FileNotFoundError:
+        return
+    result.removed.append(relative_path)
+
+
+def _prune(root, keep, result):
+    for directory, _, filenames in os.walk(os.path.join(root, *API_ROOT.strip('/').split('/')), topdown=False):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            # Hidden files are other publishers' writes in progress
+            if not filename.startswith('.') and os.path.relpath(path, root) not in keep:
+                os.unlink(path)
+                result.removed.append(os.path.relpath(path, root))
+        if not os.listdir(directory):
+            os.rmdir(directory)
+
+
+def publish(root, origin, requests=None):
+    """
+    Write the snapshot under ``root``, with URLs under ``origin``, and return what changed.
+
+    With ``requests``, only their files are written, or removed if their
+    content is gone; without, files no request answers are removed too.
+    """
+    result = SnapshotResult()
+    keep = set()
+    everything = requests is None
+    for path, params, content in _rendered_responses(origin.rstrip('/'), snapshot_requests() if everything else requests):
+        relative_path = snapshot_path(path, params)
+        if relative_path in keep:
+            # An article slugged like a list endpoint ("categories") is never routed to
+            continue
+        if content is None:
+            _remove(root, relative_path, result)
+            continue
+        keep.add(relative_path)
+        if write_file(os.path.join(root, relative_path), content):
+            result.written.append(relative_path)
+        else:
+            result.unchanged += 1
+    if everything:
+        _prune(root, keep, result)
+    return result
+
+
+_lock = threading.Lock()
+_publisher = None
+# Everything is republished, or the requests of _pending by their file
+_everything = False
+_pending = {}
+
+
+def _publish_until_clean():
+    global _everything, _publisher
+    try:
+        while True:
+            with _lock:
+                if not _everything and not _pending:
+                    _publisher = None
+                    return
+                requests = None if _everything else list(_pending.values())
+                _everything = False
+                _pending.clear()
+            try:
+                publish(settings.CMS_API_SNAPSHOT_DIR, settings.CMS_API_SNAPSHOT_ORIGIN, requests)
+            except Exception:
+                logger.exception('Publishing the API snapshot failed')
+    finally:
+        connection.close()
+
+
+def _start_publisher(requests):
+    global _everything, _publisher
+    with _lock:
+        # A publish already running is followed by one of these
+        if requests is None:
+            _everything = True
+        else:
+            _pending.update((snapshot_path(path, params), (path, params)) for path, params in requests)
+        if _publisher is None:
+            _publisher = threading.Thread(target=_publish_until_clean, name='api-snapshot', daemon=True)
+            _publisher.start()
+
+
+def remember_lists(instance):
+    """Note the files ``instance`` is in before it's saved; saving republishes them too."""
+    if getattr(settings, 'CMS_API_SNAPSHOT_DIR', '') and instance.pk:
+        saved = type(instance)._base_manager.select_related('category').filter(pk=instance.pk).first()
+        instance._snapshot_lists = list_requests(saved) if saved else []
+
+
+def schedule_publish(instance=None):
+    """
+    Republish the files ``instance`` was and is in (None: everything) in the
+    background once the transaction commits, if a snapshot is configured.
+    """
+    if not getattr(settings, 'CMS_API_SNAPSHOT_DIR', ''):
+        return
+    requests = list_requests(instance)
+    if requests is not None:
+        requests += getattr(instance, '_snapshot_lists', [])
+    transaction.on_commit(partial(_start_publisher, requests))
+
+
+def schedule_articles(press_release_ids):
+    """Republish the detail files of the articles once the transaction commits, if a snapshot is configured."""
+    if not getattr(settings, 'CMS_API_SNAPSHOT_DIR', '') or not press_release_ids:
+        return
+    slugs = PressRelease.objects.filter(pk__in=press_release_ids).values_list('slug', flat=True)
+    requests = [request for slug in slugs for request in article_requests(slug)]
+    transaction.on_commit(partial(_start_publisher, requests))
@@ -1,3 +1,1148 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import time
+from unittest import skipIf, skipUnless
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.functional import lazy
+from PIL import Image as PILImage
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from wagtail.images.models import Filter, Image
+from wagtail.search.backends import get_search_backend
+
+from . import api_async, compression, fulltext, metrics, related, snapshot
+from .cache import bump_version, cache_stats
+from .counters import ViewCounter, view_counter
+from .explain import explain
+from .importer import ContentImporter, iter_json
+from .models import (
+    ContentVersion,
+    GalleryCategory,
+    GalleryImage,
+    NewsCategory,
+    Notification,
+    PressRelease,
+    RelatedPressRelease,
+    tag_names_by_press_release,
+)
+from .prerender import refresh_payloads
+from .renderers import ORJSONParser, ORJSONRenderer
+from .renditions import renditions_generated
+
+
+class JSONRendererTests(TestCase):
+    def test_output_matches_default_renderer(self):
+        data = {
+            "title": "మైనారిటీ \u2028 welfare",
+            "published": datetime(2025, 6, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "local": datetime(2025, 6, 1, 9, 30, tzinfo=dt_timezone(timedelta(hours=5, minutes=30))),
+            "date": date(2025, 6, 1),
+            "amount": Decimal('12.50'),
+            "label": lazy(lambda: 'Press Releases', str)(),
+            "counts": {1: 2},
+            "tags": ("a", "b"),
+            "empty": None,
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output_falls_back_to_default_renderer(self):
+        data = {"news": [{"id": 1}]}
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_parser(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"title": "వార్త"}'.encode())), {"title": "వార్త"})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"title": '))
+
+
+@override_settings(
+    CMS_NOTIFICATIONS_POLL_INTERVAL=0,
+    CMS_NOTIFICATIONS_HEARTBEAT_INTERVAL=0,
+    CMS_NOTIFICATIONS_STREAM_MAX_AGE=60,
+)
+class NotificationStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Notification.objects.create(title='Office closed')
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_stream_sends_current_set_then_changes(self):
+        response = await self.async_client.get('/api/v2/notifications/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b'retry: 0\n\n')
+        first = (await anext(events)).decode()
+        self.assertIn('event: notifications', first)
+        self.assertIn('"title":"Office closed"', first)
+        self.assertEqual(await anext(events), b': heartbeat\n\n')
+
+        def add_notification():
+            # The version moves once the transaction commits
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification.objects.create(title='Exams postponed')
+
+        await sync_to_async(add_notification)()
+        second = (await anext(events)).decode()
+        self.assertIn('"title":"Exams postponed"', second)
+        self.assertNotEqual(first.split('\n')[0], second.split('\n')[0])
+        await response.streaming_content.aclose()
+
+    def test_wsgi_requests_are_answered_once(self):
+        response = self.client.get('/api/v2/notifications/stream/')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('retry: 0\n\n'))
+        event_id = body.split('id: ')[1].split('\n')[0]
+
+        # A client that has the current set only gets the retry delay
+        response = self.client.get('/api/v2/notifications/stream/', HTTP_LAST_EVENT_ID=event_id)
+        self.assertEqual(response.content, b'retry: 0\n\n')
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Notification.objects.create(title='Office closed')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_move_when_the_transaction_commits(self):
+        etag = self.client.get('/api/v2/notifications/')['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            Notification.objects.create(title='Exams postponed')
+            bump_version(Notification, NewsCategory)
+            self.assertEqual(ContentVersion.objects.get(model='cms.notification').version, 1)
+        for callback in callbacks:
+            callback()
+
+        versions = dict(ContentVersion.objects.values_list('model', 'version'))
+        self.assertEqual((versions['cms.notification'], versions['cms.newscategory']), (2, 2))
+        response = self.client.get('/api/v2/notifications/')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Exams postponed')
+        self.assertEqual(cache_stats()['notifications']['hits'], 0)
+
+    def test_versions_moved_by_other_workers_invalidate_cached_responses(self):
+        self.client.get('/api/v2/notifications/')
+        self.client.get('/api/v2/notifications/')
+        self.assertEqual(cache_stats()['notifications']['hits'], 1)
+
+        # Saved and committed elsewhere, so this worker saw no signal
+        Notification.objects.bulk_create([Notification(title='Exams postponed')])
+        ContentVersion.objects.filter(model='cms.notification').update(version=F('version') + 1)
+        self.assertContains(self.client.get('/api/v2/notifications/'), 'Exams postponed')
+        self.assertEqual(cache_stats()['notifications']['misses'], 2)
+
+
+class ConditionalRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = NewsCategory.objects.create(name='Press Releases', slug='press-releases')
+        PressRelease.objects.create(
+            title='Budget session',
+            slug='budget-session',
+            body='<p>Body</p>',
+            category=category,
+            is_published=True,
+            published_date=timezone.now(),
+        )
+        refresh_payloads(PressRelease.objects.values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+        # Versions, and so Last-Modified, move on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_version(PressRelease, NewsCategory)
+
+    def test_if_none_match(self):
+        for path in ('/api/v2/news/', '/api/v2/news/budget-session/'):
+            etag = self.client.get(path)['ETag']
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get('/api/v2/news/')['Last-Modified']
+        self.assertEqual(self.client.get('/api/v2/news/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(
+            self.client.get('/api/v2/news/', HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2024 00:00:00 GMT').status_code, 200,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PressRelease.objects.update(title='Budget session adjourned')
+            bump_version(PressRelease)
+        response = self.client.get(
+            '/api/v2/news/', HTTP_IF_MODIFIED_SINCE='Fri, 31 Dec 9999 23:59:59 GMT', HTTP_IF_NONE_MATCH='"stale"',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(CMS_VIEW_COUNT_FLUSH_INTERVAL=0)
+    def test_reads_are_counted_by_the_view_endpoint(self):
+        press_release = PressRelease.objects.get(slug='budget-session')
+        views = press_release.views + view_counter.pending(press_release.pk)
+        # The page may come from the snapshot, so reading it counts nothing
+        self.client.get('/api/v2/news/budget-session/')
+        self.assertEqual(self.client.post('/api/v2/news/budget-session/view/').status_code, 204)
+        self.assertEqual(self.client.post('/api/v2/news/missing/view/').status_code, 404)
+        self.assertEqual(self.client.get('/api/v2/news/budget-session/view/').status_code, 405)
+        press_release.refresh_from_db()
+        self.assertEqual(press_release.views, views + 1)
+
+
+# 25 published articles with images and tags, their payloads rendered
+class NewsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = NewsCategory.objects.create(name='Press Releases', slug='press-releases')
+        now = timezone.now()
+        for i in range(25):
+            image = Image.objects.create(
+                title=f'Image {i}', file=f'original_images/image-{i}.jpg', width=800, height=600,
+            )
+            press_release = PressRelease.objects.create(
+                title=f'Article {i}',
+                slug=f'article-{i}',
+                excerpt='Summary',
+                body='<p>Body</p>',
+                featured_image=image,
+                category=category,
+                is_published=True,
+                published_date=now - timedelta(days=i),
+            )
+            press_release.tags.add('Welfare', f'Tag {i}')
+            press_release.save()
+        # Signals render payloads on commit, which a TestCase never reaches
+        refresh_payloads(PressRelease.objects.values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+
+class PressReleaseQueryCountTests(NewsTestCase):
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        for limit in (1, 10, 25):
+            cache.clear()
+            with self.assertNumQueries(3):
+                response = self.client.get('/api/v2/news/', {'limit': limit})
+            self.assertEqual(len(response.json()['news']), limit)
+
+    def test_detail_query_count(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v2/news/article-3/')
+        self.assertEqual(response.json()['tags'], ['Welfare', 'Tag 3'])
+
+    def test_list_returns_tags_per_article(self):
+        response = self.client.get('/api/v2/news/', {'limit': 2})
+        self.assertEqual(
+            [item['tags'] for item in response.json()['news']],
+            [['Welfare', 'Tag 0'], ['Welfare', 'Tag 1']],
+        )
+
+
+class NewsListFieldsTests(NewsTestCase):
+    def test_list_omits_body_by_default(self):
+        item = self.client.get('/api/v2/news/', {'limit': 1}).json()['news'][0]
+        self.assertNotIn('body', item)
+        self.assertNotIn('body_te', item)
+
+    def test_list_sparse_fields_defer_unrequested_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v2/news/', {'limit': 1, 'fields': 'id,title'})
+        self.assertEqual(list(response.json()['news'][0]), ['id', 'title'])
+        page_query = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"body"', page_query)
+        self.assertNotIn('"excerpt"', page_query)
+
+    def test_list_rejects_unknown_fields(self):
+        response = self.client.get('/api/v2/news/', {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RenditionTests(NewsTestCase):
+    def test_list_returns_existing_renditions_only(self):
+        image = PressRelease.objects.get(slug='article-0').featured_image
+        spec = 'fill-320x240|format-webp'
+        image.renditions.create(
+            filter_spec=spec,
+            focal_point_key=Filter(spec).get_cache_key(image),
+            file='images/image-0.fill-320x240.format-webp.webp',
+            width=320,
+            height=240,
+        )
+        renditions_generated([image.id])
+        item = self.client.get('/api/v2/news/', {'limit': 2}).json()['news']
+        self.assertEqual(list(item[0]['featured_image_renditions']), ['thumbnail'])
+        self.assertEqual(
+            item[0]['featured_image_renditions']['thumbnail']['webp'],
+            {
+                'url': 'http://testserver/media/images/image-0.fill-320x240.format-webp.webp',
+                'width': 320,
+                'height': 240,
+            },
+        )
+        self.assertEqual(item[1]['featured_image_renditions'], {})
+
+
+class PrerenderTests(NewsTestCase):
+    def test_missing_payloads_are_rendered_on_read(self):
+        PressRelease.objects.filter(slug='article-0').update(api_list_json='', api_detail_json='')
+        item = self.client.get('/api/v2/news/', {'limit': 1}).json()['news'][0]
+        self.assertEqual(item['featured_image'], 'http://testserver/media/original_images/image-0.jpg')
+        self.assertEqual(item['views'], 0)
+        # Reads don't write; the signals and prerender_news fill the columns
+        stored = PressRelease.objects.values('api_list_json', 'api_detail_json').get(slug='article-0')
+        self.assertEqual(stored, {'api_list_json': '', 'api_detail_json': ''})
+
+    def test_category_rename_refreshes_payloads(self):
+        category = NewsCategory.objects.get()
+        category.name = 'Announcements'
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+        detail = self.client.get('/api/v2/news/article-1/').json()
+        self.assertEqual(detail['category']['name'], 'Announcements')
+        item = self.client.get('/api/v2/news/', {'limit': 1}).json()['news'][0]
+        self.assertEqual(item['category_name'], 'Announcements')
+
+
+class NewsLanguageTests(NewsTestCase):
+    def test_list_in_one_language(self):
+        PressRelease.objects.filter(slug='article-0').update(title_te='వార్త 0')
+        NewsCategory.objects.update(name_te='పత్రికా ప్రకటనలు')
+        refresh_payloads(PressRelease.objects.values_list('pk', flat=True))
+        data = self.client.get('/api/v2/news/', {'limit': 2, 'lang': 'te'}).json()
+        self.assertEqual(data['lang'], 'te')
+        # Untranslated text falls back to English
+        self.assertEqual([item['title'] for item in data['news']], ['వార్త 0', 'Article 1'])
+        self.assertEqual(data['news'][0]['category_name'], 'పత్రికా ప్రకటనలు')
+        self.assertNotIn('title_te', data['news'][0])
+        self.assertNotIn('excerpt_te', data['news'][0])
+
+        detail = self.client.get('/api/v2/news/article-0/', {'lang': 'en'}).json()
+        self.assertEqual(detail['title'], 'Article 0')
+        self.assertEqual(detail['category']['name'], 'Press Releases')
+        self.assertNotIn('name_te', detail['category'])
+        self.assertNotIn('body_te', detail)
+
+    def test_language_fields_read_one_language_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v2/news/', {'limit': 1, 'fields': 'id,title,body', 'lang': 'en'})
+        self.assertEqual(list(response.json()['news'][0]), ['id', 'title', 'body'])
+        page_query = queries.captured_queries[-1]['sql']
+        self.assertIn('"body"', page_query)
+        self.assertNotIn('"title_te"', page_query)
+        self.assertNotIn('"body_te"', page_query)
+        response = self.client.get('/api/v2/news/', {'fields': 'title_te', 'lang': 'en'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_auto_language_negotiates_and_varies(self):
+        PressRelease.objects.filter(slug='article-0').update(title_te='వార్త 0')
+        refresh_payloads(PressRelease.objects.values_list('pk', flat=True))
+        params = {'limit': 1, 'lang': 'auto'}
+        telugu = self.client.get('/api/v2/news/', params, HTTP_ACCEPT_LANGUAGE='te-IN,te;q=0.9,en;q=0.8')
+        english = self.client.get('/api/v2/news/', params, HTTP_ACCEPT_LANGUAGE='en-US,en;q=0.9')
+        self.assertEqual(telugu.json()['news'][0]['title'], 'వార్త 0')
+        self.assertEqual(english.json()['news'][0]['title'], 'Article 0')
+        self.assertIn('Accept-Language', telugu['Vary'])
+        self.assertNotEqual(telugu['ETag'], english['ETag'])
+        self.assertEqual(self.client.get('/api/v2/news/', {'lang': 'fr'}).status_code, 400)
+
+
+class PartialIndexTests(NewsTestCase):
+    def test_news_lists_use_partial_indexes(self):
+        cursor = self.client.get('/api/v2/news/', {'limit': 5}).json()['next']
+        # Drafts, which the partial indexes leave out
+        category = NewsCategory.objects.get()
+        PressRelease.objects.bulk_create(
+            PressRelease(title=f'Draft {i}', slug=f'draft-{i}', category=category, published_date=timezone.now())
+            for i in range(500)
+        )
+        with connection.cursor() as db_cursor:
+            if connection.vendor == 'postgresql':
+                db_cursor.execute('ANALYZE cms_pressrelease')
+                # A table this small would still be read sequentially
+                db_cursor.execute('SET LOCAL enable_seqscan = off')
+        for params, index in (
+            ({'limit': 5}, 'cms_pr_published_idx'),
+            ({'limit': 5, 'cursor': cursor}, 'cms_pr_published_idx'),
+            ({'category': 'press-releases', 'limit': 5}, 'cms_pr_published_category_idx'),
+            ({'featured': 'true', 'limit': 5}, 'cms_pr_published_featured_idx'),
+        ):
+            with self.subTest(params=params):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get('/api/v2/news/', params)
+                page_query = next(
+                    query['sql'] for query in queries.captured_queries
+                    if 'FROM "cms_pressrelease"' in query['sql'] and 'ORDER BY' in query['sql']
+                )
+                plan = explain(page_query)
+                self.assertIn(index, plan.plan)
+                self.assertEqual(plan.seq_scans, [])
+
+
+class CompressionTests(NewsTestCase):
+    def test_api_responses_are_compressed_and_cached_compressed(self):
+        identity = self.client.get('/api/v2/news/', {'limit': 20})
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertIn('Accept-Encoding', identity['Vary'])
+
+        for rendered in (True, False):
+            response = self.client.get('/api/v2/news/', {'limit': 20}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            # Once cached, the compressed body is served without rendering the payload
+            self.assertEqual(hasattr(response, 'data'), rendered)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response['Vary'])
+            self.assertEqual(gzip.decompress(response.content), identity.content)
+            # Cached bodies get the highest compression level
+            self.assertEqual(response.content, gzip.compress(identity.content, compresslevel=9, mtime=0))
+            self.assertEqual(response['ETag'], f'W/{identity["ETag"]}')
+        self.assertEqual(self.client.get(
+            '/api/v2/news/', {'limit': 20}, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'],
+        ).status_code, 304)
+        # The browsable API isn't served the cached JSON
+        with self.settings(STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }):
+            response = self.client.get('/api/v2/news/', {'limit': 20}, HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+        if compression.brotli is not None:
+            response = self.client.get('/api/v2/news/article-0/', HTTP_ACCEPT_ENCODING='gzip;q=0.5, br')
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertEqual(json.loads(compression.brotli.decompress(response.content))['slug'], 'article-0')
+        self.assertIsNone(compression.negotiate_encoding('br;q=0, gzip;q=0, identity'))
+
+        response = self.client.get('/api/v2/export/news/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertNotIn('Content-Encoding', response)
+
+
+class SnapshotTests(NewsTestCase):
+    ORIGIN = 'https://example.com'
+
+    def read(self, root, path):
+        with open(os.path.join(root, path), 'rb') as f:
+            return f.read()
+
+    def get(self, path, params=None):
+        return self.client.get(path, params, HTTP_HOST='example.com', secure=True)
+
+    def test_snapshot_writes_the_pages_and_articles_the_site_fetches(self):
+        with tempfile.TemporaryDirectory() as root:
+            snapshot.write_file(os.path.join(root, 'api/v2/news/index.json'), b'{}')
+            result = snapshot.publish(root, self.ORIGIN)
+            # 6 lists, the news categories and 3 files per article
+            self.assertEqual((len(result.written), result.unchanged), (7 + 25 * 3, 0))
+            self.assertEqual(result.removed, ['api/v2/news/index.json'])
+
+            # Named after the query strings the site sends
+            self.assertEqual(
+                self.read(root, 'api/v2/news/index?limit=20.json'), self.get('/api/v2/news/', {'limit': 20}).content,
+            )
+            page = json.loads(self.read(root, 'api/v2/news/index?category=press-releases&limit=20.json'))
+            self.assertEqual((len(page['news']), page['total']), (20, 25))
+            self.assertEqual(json.loads(self.read(root, 'api/v2/news/index?featured=true&limit=3.json'))['total'], 0)
+            self.assertEqual(json.loads(self.read(root, 'api/v2/gallery/images/index?limit=48.json'))['total'], 0)
+            for params in ({}, {'lang': 'en'}, {'lang': 'te'}):
+                self.assertEqual(
+                    self.read(root, snapshot.snapshot_path('/api/v2/news/article-0/', params)),
+                    self.get('/api/v2/news/article-0/', params).content,
+                )
+
+            article = PressRelease.objects.get(slug='article-0')
+            PressRelease.objects.filter(pk=article.pk).update(is_published=False)
+            bump_version(PressRelease)
+            result = snapshot.publish(root, self.ORIGIN, snapshot.list_requests(article))
+            self.assertIn('api/v2/news/index?limit=20.json', result.written)
+            self.assertIn('api/v2/news/index?category=press-releases&limit=20.json', result.written)
+            # The unpublished article's files go; the other articles' stay
+            self.assertEqual(sorted(result.removed), [
+                'api/v2/news/article-0/index.json',
+                'api/v2/news/article-0/index?lang=en.json',
+                'api/v2/news/article-0/index?lang=te.json',
+            ])
+            self.assertTrue(os.path.exists(os.path.join(root, 'api/v2/news/article-1/index.json')))
+            self.assertEqual(json.loads(self.read(root, 'api/v2/news/index?limit=20.json'))['total'], 24)
+
+    def test_changes_republish_the_files_they_touch(self):
+        other = NewsCategory.objects.create(name='Other', slug='other')
+        article = PressRelease.objects.get(slug='article-1')
+        article.category = other
+        article.is_featured = True
+        with override_settings(CMS_API_SNAPSHOT_DIR='/srv/snapshot'), self.captureOnCommitCallbacks() as callbacks:
+            article.save()
+        [requests] = [callback.args[0] for callback in callbacks if getattr(callback, 'func', None) is snapshot._start_publisher]
+        # The lists it left are republished with the ones it joined
+        self.assertEqual({snapshot.snapshot_path(*request) for request in requests}, {
+            'api/v2/news/index?limit=20.json',
+            'api/v2/news/index?category=press-releases&limit=20.json',
+            'api/v2/news/index?category=other&limit=20.json',
+            'api/v2/news/index?featured=true&limit=3.json',
+            'api/v2/news/article-1/index.json',
+            'api/v2/news/article-1/index?lang=en.json',
+            'api/v2/news/article-1/index?lang=te.json',
+        })
+
+        # Related news updates republish the articles whose lists changed
+        with override_settings(CMS_API_SNAPSHOT_DIR='/srv/snapshot'), self.captureOnCommitCallbacks() as callbacks:
+            snapshot.schedule_articles([article.pk])
+        self.assertEqual([callback.args[0] for callback in callbacks], [snapshot.article_requests('article-1')])
+
+
+class ExportTests(NewsTestCase):
+    def test_export_streams_ndjson_in_id_order(self):
+        response = self.client.get('/api/v2/export/news/')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(records), 25)
+        self.assertEqual(records[0]['slug'], 'article-0')
+        self.assertEqual(records[0]['tags'], ['Welfare', 'Tag 0'])
+        self.assertEqual(records[0]['category'], 'press-releases')
+
+    def test_export_csv_filters_by_since(self):
+        PressRelease.objects.filter(slug__in=['article-1', 'article-2']).update(
+            updated_at=timezone.now() + timedelta(days=1),
+        )
+        since = (timezone.now() + timedelta(hours=1)).isoformat()
+        response = self.client.get('/api/v2/export/news/', {'format': 'csv', 'since': since})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['id', 'slug'])
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['article-1', 'article-2'])
+
+    def test_article_slugged_export_is_reachable(self):
+        PressRelease.objects.filter(slug='article-0').update(slug='export', api_detail_json='')
+        self.assertEqual(self.client.get('/api/v2/news/export/').json()['slug'], 'export')
+
+    def test_export_rejects_invalid_since(self):
+        response = self.client.get('/api/v2/export/news/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncViewTests(NewsTestCase):
+    async def test_async_views_answer_like_sync_views(self):
+        await Notification.objects.acreate(title='Office closed')
+        factory = AsyncRequestFactory()
+        for view, path, params in (
+            (api_async.notifications_list, '/api/v2/notifications/', {}),
+            (api_async.gallery_categories_list, '/api/v2/gallery/categories/', {}),
+            (api_async.gallery_images_list, '/api/v2/gallery/images/', {'limit': 5}),
+            (api_async.gallery_images_list, '/api/v2/gallery/images/', {'date_from': '2025-13-01'}),
+            (api_async.news_categories_list, '/api/v2/news/categories/', {}),
+            (api_async.press_releases_list, '/api/v2/news/', {'limit': 3}),
+            (api_async.press_releases_list, '/api/v2/news/', {'limit': 2, 'lang': 'te', 'fields': 'id,title,tags'}),
+            (api_async.press_releases_list, '/api/v2/news/', {'cursor': 'nope'}),
+        ):
+            await cache.aclear()
+            expected = await sync_to_async(self.client.get)(path, params)
+            await cache.aclear()
+            response = await view(factory.get(path, params))
+            self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+            self.assertEqual(response.get('ETag'), expected.get('ETag'))
+
+        # Served from the entry the sync view cached
+        expected = await sync_to_async(self.client.get)('/api/v2/news/', {'limit': 3})
+        response = await api_async.press_releases_list(factory.get('/api/v2/news/', {'limit': 3}))
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual((await sync_to_async(cache_stats)())['news']['hits'], 1)
+
+    async def test_async_detail_and_export(self):
+        factory = AsyncRequestFactory()
+        expected = (await sync_to_async(self.client.get)('/api/v2/news/article-3/')).json()
+        response = await api_async.press_release_detail(factory.get('/api/v2/news/article-3/'), slug='article-3')
+        self.assertEqual(json.loads(response.content), expected)
+        response = await api_async.press_release_detail(factory.get('/api/v2/news/missing/'), slug='missing')
+        self.assertEqual(response.status_code, 404)
+        response = await api_async.press_release_view(factory.post('/api/v2/news/article-3/view/'), slug='article-3')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(view_counter.pending((await PressRelease.objects.aget(slug='article-3')).pk), 1)
+
+        expected = await sync_to_async(self.client.get)('/api/v2/export/news/', {'format': 'csv'})
+        response = await api_async.press_releases_export(factory.get('/api/v2/export/news/', {'format': 'csv'}))
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        content = b''.join([line async for line in response.streaming_content])
+        self.assertEqual(content, await sync_to_async(b''.join)(expected.streaming_content))
+
+
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.first = PressRelease.objects.create(title='Budget session', published_date=now, views=5)
+        cls.second = PressRelease.objects.create(title='Exams postponed', published_date=now)
+
+    def setUp(self):
+        self.counter = ViewCounter('cms.PressRelease')
+        self.addCleanup(self.counter._stop.set)
+
+    def views(self):
+        return list(PressRelease.objects.order_by('pk').values_list('views', flat=True))
+
+    @override_settings(CMS_VIEW_COUNT_FLUSH_INTERVAL=3600)
+    def test_increments_accumulate_until_flushed(self):
+        self.assertEqual([self.counter.increment(self.first.pk) for _ in range(3)], [1, 2, 3])
+        self.counter.increment(self.second.pk)
+        self.assertEqual(self.counter.pending(self.first.pk), 3)
+        self.assertEqual(self.views(), [5, 0])
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.counter.flush(), 4)
+        queries = [query['sql'] for query in captured.captured_queries]
+        # One transaction, one UPDATE views = views + delta per article
+        self.assertTrue(queries[0].startswith('SAVEPOINT'))
+        self.assertTrue(queries[-1].startswith('RELEASE SAVEPOINT'))
+        updates = queries[1:-1]
+        self.assertEqual(len(updates), 2)
+        self.assertTrue(all(update.startswith('UPDATE') and '"views" + ' in update for update in updates))
+        self.assertEqual(self.views(), [8, 1])
+        self.assertEqual(self.counter.pending(self.first.pk), 0)
+        self.assertEqual(self.counter.flush(), 0)
+
+    @override_settings(CMS_VIEW_COUNT_FLUSH_INTERVAL=0)
+    def test_views_are_written_on_the_spot_without_an_interval(self):
+        self.assertEqual(self.counter.increment(self.first.pk), 1)
+        self.assertEqual(self.views(), [6, 0])
+        self.assertIsNone(self.counter._thread)
+
+    def test_failed_flush_keeps_the_counts(self):
+        counter = ViewCounter('cms.PressRelease', field='missing')
+        counter._pending[self.first.pk] = 2
+        with self.assertRaises(Exception):
+            counter.flush()
+        self.assertEqual(counter.pending(self.first.pk), 2)
+
+    def test_pending_views_are_flushed_at_exit(self):
+        self.counter._pending[self.first.pk] = 2
+        self.counter._flush_at_exit()
+        self.assertTrue(self.counter._stop.is_set())
+        self.assertEqual(self.views(), [7, 0])
+
+    def test_forked_children_start_empty(self):
+        self.counter._pending[self.first.pk] = 2
+        self.counter._thread = object()
+        self.counter._reset_after_fork()
+        self.assertEqual(self.counter.pending(self.first.pk), 0)
+        self.assertIsNone(self.counter._thread)
+
+
+class ViewCounterFlusherTests(TransactionTestCase):
+    @override_settings(CMS_VIEW_COUNT_FLUSH_INTERVAL=0.05)
+    def test_background_thread_flushes_pending_views(self):
+        press_release = PressRelease.objects.create(title='Budget session', published_date=timezone.now())
+        counter = ViewCounter('cms.PressRelease')
+        self.addCleanup(counter._stop.set)
+        counter.increment(press_release.pk)
+        counter.increment(press_release.pk)
+        self.assertTrue(counter._thread.is_alive())
+
+        deadline = time.monotonic() + 5
+        while press_release.views < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            press_release.refresh_from_db()
+        self.assertEqual(press_release.views, 2)
+        self.assertEqual(counter.pending(press_release.pk), 0)
+
+
+@override_settings(CMS_SERVER_TIMING=True, CMS_METRICS_TOKEN='secret', CMS_METRICS_DIR='')
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        NewsCategory.objects.create(name='Press Releases', slug='press-releases')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_metrics(self, token='secret', **extra):
+        with self.settings(STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }):
+            if token is not None:
+                extra['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+            return self.client.get('/metrics', **extra)
+
+    def requests_counted(self, endpoint):
+        prefix = f'cms_request_duration_seconds_count{{endpoint="{endpoint}"}} '
+        for line in self.get_metrics().content.decode().splitlines():
+            if line.startswith(prefix):
+                return int(line[len(prefix):])
+        return 0
+
+    def test_server_timing_counts_the_requests_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v2/news/categories/')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        for name in ('view', 'render', 'total'):
+            self.assertIn(f'{name};dur=', timing)
+
+    def test_server_timing_is_opt_in(self):
+        with self.settings(CMS_SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get('/api/v2/news/categories/'))
+
+    async def test_queries_on_async_threads_are_counted(self):
+        sync = await sync_to_async(self.client.get)('/api/v2/news/categories/')
+        await cache.aclear()
+        response = await self.async_client.get('/api/v2/news/categories/')
+        queries = sync['Server-Timing'].split(', ')[0].split(';')[-1]
+        self.assertEqual(response['Server-Timing'].split(', ')[0].split(';')[-1], queries)
+        self.assertNotEqual(queries, 'desc="0 queries"')
+
+    def test_metrics_are_served_to_token_bearers(self):
+        before = self.requests_counted('news-categories')
+        self.client.get('/api/v2/news/categories/')
+        self.client.get('/api/v2/news/categories/')
+        self.assertEqual(self.requests_counted('news-categories'), before + 2)
+
+        response = self.get_metrics()
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertIn('cms_responses_total{endpoint="news-categories",status="200"}', response.content.decode())
+        self.assertEqual(self.get_metrics('wrong').status_code, 404)
+        self.assertEqual(self.get_metrics(None).status_code, 404)
+        with self.settings(CMS_METRICS_TOKEN=''):
+            self.assertEqual(self.get_metrics('').status_code, 404)
+
+    def test_metrics_add_up_the_files_of_every_process(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(CMS_METRICS_DIR=directory):
+            self.client.get('/api/v2/news/categories/')
+            own = self.requests_counted('news-categories')
+            # Another worker's totals, left behind when it exited
+            observed = [0] * (len(metrics.SECONDS_BUCKETS) + 1) + [0.5]
+            observed[0] = 3
+            with open(os.path.join(directory, 'other-1.json'), 'w') as f:
+                json.dump({
+                    'histograms': [['cms_request_duration_seconds', 'news-categories', observed]],
+                    'responses': [['news-categories', 200, 3]],
+                }, f)
+            self.assertEqual(self.requests_counted('news-categories'), own + 3)
+            self.assertEqual(sorted(os.listdir(directory)), sorted(['other-1.json', f'{metrics._process}.json']))
+
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        articles = [
+            ('in-title', {'title': 'Budget session begins'}),
+            ('in-excerpt', {'title': 'Assembly update', 'excerpt': 'The budget was tabled'}),
+            ('in-body', {'title': 'Assembly diary', 'body': '<p>Debate on the <b>budget</b> continued</p>'}),
+            ('in-telugu', {'title': 'Session', 'title_te': 'బడ్జెట్ సమావేశాలు ప్రారంభం'}),
+            ('elections', {'title': 'Election results declared'}),
+        ]
+        for i, (slug, fields) in enumerate(articles):
+            PressRelease.objects.create(
+                slug=slug, is_published=True, published_date=now - timedelta(days=i), **fields,
+            )
+        refresh_payloads(PressRelease.objects.values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, term, **params):
+        data = self.client.get('/api/v2/news/', {'search': term, **params}).json()
+        return [item['slug'] for item in data['news']]
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL searches the full-text index')
+    def test_other_databases_match_substrings_of_titles_and_excerpts(self):
+        self.assertFalse(fulltext.is_supported())
+        # Newest first, case-insensitive, and the body isn't searched
+        self.assertEqual(self.search('BUDGET'), ['in-title', 'in-excerpt'])
+        self.assertEqual(self.search('బడ్జెట్'), ['in-telugu'])
+        self.assertEqual(self.search('elections'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'full-text search needs PostgreSQL')
+    def test_matches_are_ranked_by_field_weight(self):
+        self.assertEqual(self.search('budget'), ['in-title', 'in-excerpt', 'in-body'])
+        # Ranked pages are walked with the rank in the cursor
+        first = self.client.get('/api/v2/news/', {'search': 'budget', 'limit': 2}).json()
+        rest = self.client.get('/api/v2/news/', {'search': 'budget', 'cursor': first['next']}).json()
+        self.assertEqual([item['slug'] for item in rest['news']], ['in-body'])
+        # English terms are stemmed, markup is not indexed
+        self.assertEqual(self.search('elections'), ['elections'])
+        self.assertEqual(self.search('b'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'full-text search needs PostgreSQL')
+    def test_telugu_configuration(self):
+        self.assertEqual(self.search('బడ్జెట్'), ['in-telugu'])
+        with connection.cursor() as cursor:
+            # Copied from the simple configuration: lower-cased, never stemmed
+            cursor.execute("SELECT to_tsvector('telugu', 'Elections'), to_tsvector('english', 'Elections')")
+            self.assertEqual(cursor.fetchone(), ("'elections':1", "'elect':1"))
+        vector = PressRelease.objects.filter(slug='in-telugu').values_list('search_vector', flat=True).get()
+        self.assertIn("'బడ్జెట్':", vector)
+        self.assertIn("'session':1A", vector)
+
+
+ARTICLES = (
+    ('flood-camps', 'Flood relief camps opened', 'Relief material distributed to flood victims'),
+    ('flood-funds', 'Flood relief funds released', 'Relief funds for flood hit districts'),
+    ('cricket-tournament', 'Police cricket tournament', 'Annual cricket tournament begins'),
+    ('cricket-final', 'Police cricket team wins', 'Cricket final held at the stadium'),
+)
+
+
+def create_articles(articles=ARTICLES):
+    return {
+        slug: PressRelease.objects.create(
+            slug=slug, title=title, excerpt=excerpt, is_published=True, published_date=timezone.now(),
+        )
+        for slug, title, excerpt in articles
+    }
+
+
+def related_slugs(press_release):
+    return list(
+        RelatedPressRelease.objects.filter(source=press_release).order_by('rank').values_list('target__slug', flat=True)
+    )
+
+
+class RelatedNewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.articles = create_articles()
+        related.rebuild_all()
+
+    def test_saved_article_enters_and_leaves_related_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            [review] = create_articles([('flood-review', 'Flood relief review', 'Review of relief work')]).values()
+        self.assertEqual(set(related_slugs(review)), {'flood-camps', 'flood-funds'})
+        self.assertIn('flood-review', related_slugs(self.articles['flood-camps']))
+
+        review.is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            review.save()
+        self.assertEqual(related_slugs(review), [])
+        self.assertNotIn('flood-review', related_slugs(self.articles['flood-camps']))
+
+    def test_update_cost_does_not_grow_with_the_archive(self):
+        camps = self.articles['flood-camps']
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(related.update_related(camps.pk), sorted(pr.pk for pr in self.articles.values() if pr.slug.startswith('flood')))
+        create_articles(
+            (f'budget-{i}', f'Budget session day {i}', 'Assembly debates the budget') for i in range(40)
+        )
+        related.rebuild_all()
+        with CaptureQueriesContext(connection) as large:
+            related.update_related(camps.pk)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(related_slugs(camps), ['flood-funds'])
+        self.assertEqual(related_slugs(self.articles['cricket-final']), ['cricket-tournament'])
+
+    def test_incremental_updates_match_a_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_articles([
+                ('flood-review', 'Flood relief review', 'Review of relief work'),
+                ('cricket-review', 'Cricket tournament review', 'Police team reviews the final'),
+            ])
+            funds = self.articles['flood-funds']
+            funds.title = 'Cricket kits released'
+            funds.save()
+        incremental = {pr.slug: set(related_slugs(pr)) for pr in PressRelease.objects.all()}
+        related.rebuild_all()
+        # Ranks may differ, as IDF weights are refitted; the lists may not
+        self.assertEqual({pr.slug: set(related_slugs(pr)) for pr in PressRelease.objects.all()}, incremental)
+        self.assertIn('cricket-tournament', incremental['flood-funds'])
+
+    def test_articles_left_from_a_rolled_back_transaction_are_updated_next(self):
+        camps, funds = self.articles['flood-camps'], self.articles['flood-funds']
+        RelatedPressRelease.objects.filter(source=camps).delete()
+        try:
+            with transaction.atomic():
+                related.schedule_update(camps.pk)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with self.captureOnCommitCallbacks(execute=True):
+            related.schedule_update(funds.pk)
+        self.assertEqual(related_slugs(camps), ['flood-funds'])
+
+
+class NewsPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(9):
+            # Three articles a day, so pages break inside a day
+            PressRelease.objects.create(
+                title=f'Article {i}', slug=f'article-{i}', is_published=True, published_date=now - timedelta(days=i // 3),
+            )
+        refresh_payloads(PressRelease.objects.values_list('pk', flat=True))
+        cls.expected = list(
+            PressRelease.objects.order_by('-published_date', '-id').values_list('slug', flat=True)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, data, direction):
+        pages = [[item['slug'] for item in data['news']]]
+        while data[direction]:
+            data = self.client.get('/api/v2/news/', {'limit': 2, 'cursor': data[direction]}).json()
+            pages.append([item['slug'] for item in data['news']])
+        return pages, data
+
+    def test_cursor_walks_forwards_and_backwards(self):
+        forwards, last = self.walk(self.client.get('/api/v2/news/', {'limit': 2}).json(), 'next')
+        self.assertEqual(sum(forwards, []), self.expected)
+        self.assertEqual([len(page) for page in forwards], [2, 2, 2, 2, 1])
+        self.assertIsNone(last['next'])
+
+        backwards, first = self.walk(last, 'prev')
+        self.assertEqual(backwards, forwards[::-1])
+        self.assertIsNone(first['prev'])
+
+    def test_cursor_filter_starts_with_a_range_bound(self):
+        cursor = self.client.get('/api/v2/news/', {'limit': 2}).json()['next']
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get('/api/v2/news/', {'limit': 2, 'cursor': cursor})
+        page_query = next(
+            query['sql'] for query in captured.captured_queries
+            if 'FROM "cms_pressrelease"' in query['sql'] and 'ORDER BY' in query['sql']
+        )
+        self.assertRegex(page_query, r'"published_date" <= [^()]+ AND \(\S+"published_date" < [^()]+ OR ')
+
+
+class GalleryImagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categories = [
+            GalleryCategory.objects.create(name=name.title(), slug=name) for name in ('training', 'welfare')
+        ]
+        for i in range(30):
+            image = Image.objects.create(
+                title=f'Photo {i}', file=f'original_images/photo-{i}.jpg', width=800, height=600,
+            )
+            GalleryImage.objects.create(
+                image=image,
+                title=f'Photo {i}',
+                # Pairs share a date so the id tie-breaker matters
+                date=date(2025, 6, 1) - timedelta(days=i // 2),
+                category=categories[i % 2],
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_category_filter_and_cursor_walk(self):
+        titles, cursor = [], None
+        while True:
+            params = {'category': 'training', 'limit': 4}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get('/api/v2/gallery/images/', params).json()
+            titles.extend(item['title'] for item in data['gallery'])
+            self.assertEqual(data['total'], 15)
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(titles, [f'Photo {i}' for i in range(0, 30, 2)])
+
+    def test_date_range_is_inclusive(self):
+        data = self.client.get('/api/v2/gallery/images/', {
+            'date_from': '2025-05-30', 'date_to': '2025-05-31',
+        }).json()
+        self.assertEqual([item['title'] for item in data['gallery']], [f'Photo {i}' for i in range(2, 6)])
+
+    def test_rejects_invalid_dates(self):
+        response = self.client.get('/api/v2/gallery/images/', {'date_from': '2025-13-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_category_page_uses_composite_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/v2/gallery/images/', {'category': 'training', 'limit': 10})
+        page_query = next(
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "cms_galleryimage"' in query['sql'] and 'ORDER BY' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # The test table is tiny; make the planner show what it would use at scale
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = explain(page_query).plan
+        self.assertIn('cms_galleryimg_cat_date_idx', plan)
+        # Read in order from the index, so a page costs the same at any depth
+        self.assertEqual([line for line in plan.splitlines() if 'Sort' in line or 'TEMP B-TREE' in line], [])
+
+
+class ContentImportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=os.path.join(self.tmp.name, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+        self.category = NewsCategory.objects.create(name='Press Releases', slug='press-releases')
+        self.image_path = os.path.join(self.tmp.name, 'photo.jpg')
+        PILImage.new('RGB', (64, 48), 'teal').save(self.image_path)
+        self.published_date = timezone.now()
+
+    def import_news(self, news, sync=False):
+        path = os.path.join(self.tmp.name, 'news.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'news': news}, f)
+        items = (
+            dict(item, category=self.category, published_date=self.published_date)
+            for item in iter_json(path, 'news.item')
+        )
+        with ContentImporter(workers=1, batch_size=2) as importer:
+            importer.import_press_releases(items, sync=sync)
+        return importer.stats
+
+    def test_import_creates_articles_tags_and_images(self):
+        stats = self.import_news([
+            {'slug': f'article-{i}', 'title': f'Article {i}', 'excerpt': 'Summary', 'body': '<p>Body</p>',
+             'is_published': True, 'tags': ['Welfare', f'Tag {i}'], 'image_path': self.image_path}
+            for i in range(3)
+        ])
+        self.assertEqual((stats.created, stats.updated, stats.images), (3, 0, 1))
+        articles = PressRelease.objects.order_by('slug')
+        self.assertEqual(len({article.featured_image_id for article in articles}), 1)
+        image = articles[0].featured_image
+        self.assertEqual((image.width, image.height), (64, 48))
+        self.assertEqual(
+            tag_names_by_press_release([articles[1].pk])[articles[1].pk], ['Welfare', 'Tag 1'],
+        )
+
+    def test_reimport_updates_by_slug_and_reuses_images(self):
+        article = {'slug': 'article', 'title': 'Old', 'excerpt': 'Summary', 'body': '<p>Body</p>',
+                   'tags': ['Old tag'], 'image_path': self.image_path}
+        self.import_news([article])
+        stats = self.import_news([dict(article, title='New', tags=['New tag'])])
+
+        self.assertEqual((stats.created, stats.updated, stats.images), (0, 1, 0))
+        self.assertEqual(Image.objects.count(), 1)
+        press_release = PressRelease.objects.get()
+        self.assertEqual(press_release.title, 'New')
+        self.assertEqual(tag_names_by_press_release([press_release.pk])[press_release.pk], ['New tag'])
+
+    def test_sync_skips_unchanged_and_deletes_missing_articles(self):
+        articles = [
+            {'slug': f'article-{i}', 'title': f'Article {i}', 'excerpt': 'Summary', 'body': '<p>Body</p>'}
+            for i in range(3)
+        ]
+        articles[2]['image_path'] = self.image_path
+        self.import_news(articles)
+
+        stats = self.import_news(articles[:2], sync=True)
+        self.assertEqual((stats.created, stats.updated, stats.deleted, stats.unchanged), (0, 0, 1, 2))
+        self.assertEqual(stats.images_deleted, 1)
+        self.assertFalse(Image.objects.exists())
+        self.assertEqual(sorted(PressRelease.objects.values_list('slug', flat=True)), ['article-0', 'article-1'])
+
+    def test_sync_leaves_articles_written_in_the_admin(self):
+        articles = [
+            {'slug': f'article-{i}', 'title': f'Article {i}', 'excerpt': 'Summary', 'body': '<p>Body</p>'}
+            for i in range(2)
+        ]
+        articles[1]['image_path'] = self.image_path
+        self.import_news(articles)
+        image = PressRelease.objects.get(slug='article-1').featured_image
+        # Written in the admin: no source hash, and its body embeds the imported
+        # image (Wagtail indexes the reference on commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            PressRelease.objects.create(
+                slug='admin-article', title='Admin article', published_date=self.published_date,
+                body=f'<p>Body</p><embed embedtype="image" id="{image.pk}" format="fullwidth"/>',
+            )
+
+        stats = self.import_news(articles[:1], sync=True)
+        self.assertEqual((stats.deleted, stats.images_deleted), (1, 0))
+        self.assertEqual(sorted(PressRelease.objects.values_list('slug', flat=True)), ['admin-article', 'article-0'])
+        self.assertTrue(Image.objects.filter(pk=image.pk).exists())
+
+    def test_sync_leaves_gallery_images_added_in_the_admin(self):
+        def import_gallery(titles):
+            items = [
+                {'image_path': self.image_path, 'title': title, 'date': date(2025, 5, 1), 'category': None}
+                for title in titles
+            ]
+            with ContentImporter(workers=1) as importer:
+                importer.import_gallery_images(items, sync=True)
+            return importer.stats
+
+        import_gallery(['Imported'])
+        image = GalleryImage.objects.get().image
+        GalleryImage.objects.create(image=image, title='Added in the admin', date=date(2025, 5, 2))
+
+        stats = import_gallery([])
+        self.assertEqual((stats.deleted, stats.images_deleted), (1, 0))
+        self.assertEqual(list(GalleryImage.objects.values_list('title', flat=True)), ['Added in the admin'])
+
+
+# The site templates reference static files, which aren't collected for tests
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+class SiteSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = NewsCategory.objects.create(name='Press Releases', slug='press-releases')
+        for i in range(15):
+            PressRelease.objects.create(
+                title=f'Scholarship drive {i}',
+                slug=f'scholarship-drive-{i}',
+                excerpt='Applications open',
+                body='<p>Body</p>',
+                category=category,
+                is_published=i != 0,
+                published_date=timezone.now() - timedelta(days=i),
+            )
+        gallery = GalleryCategory.objects.create(name='Events', slug='events')
+        image = Image.objects.create(title='Photo', file='original_images/photo.jpg', width=800, height=600)
+        GalleryImage.objects.create(image=image, title='Scholarship ceremony', date=date(2025, 6, 1), category=gallery)
+        # Wagtail indexes saved objects on commit, which a TestCase never reaches
+        backend = get_search_backend()
+        backend.add_bulk(PressRelease, list(PressRelease.objects.all()))
+        backend.add_bulk(GalleryImage, list(GalleryImage.objects.all()))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_news_and_gallery_results_are_paged_from_the_cache(self):
+        response = self.client.get('/search/', {'query': 'Scholarship'})
+        first_page = response.context['search_results']
+        self.assertEqual(first_page.paginator.count, 15)
+        self.assertEqual(len(first_page.object_list), 10)
+        kinds = {result.kind for result in first_page.object_list}
+        self.assertIn('news', kinds)
+        self.assertNotIn('scholarship-drive-0', ''.join(result.url for result in first_page.object_list))
+
+        # Later pages, and the same query spelled differently, reuse the ranked hits
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/search/', {'query': '  scholarship ', 'page': 2})
+        second_page = response.context['search_results']
+        self.assertEqual(len(second_page.object_list), 5)
+        self.assertFalse(any('wagtailsearch' in query['sql'] for query in captured.captured_queries))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in captured.captured_queries))
+        urls = [result.url for result in first_page.object_list + second_page.object_list]
+        self.assertEqual(len(set(urls) - {'http://localhost:3000/photo-gallery'}), 14)
+
+    def test_changed_content_is_searched_again(self):
+        self.client.get('/search/', {'query': 'Scholarship'})
+        PressRelease.objects.filter(slug='scholarship-drive-0').update(is_published=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_version(PressRelease)
+        response = self.client.get('/search/', {'query': 'Scholarship'})
+        self.assertEqual(response.context['search_results'].paginator.count, 16)
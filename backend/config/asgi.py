@@ -0,0 +1,25 @@
+"""
+ASGI config for config project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Served this way the cms API runs its async views (see cms.api_async), e.g.:
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+os.environ.setdefault("ASYNC_VIEWS", "True")
+# Requests don't share a thread under ASGI, so a persistent connection would
+# be left open per request; connections come from the pool instead, or are
+# closed after each request where psycopg_pool isn't installed.
+os.environ.setdefault("DB_POOL", "True")
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+
+application = get_asgi_application()
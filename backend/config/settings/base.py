@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os 
+import sys
+from importlib.util import find_spec
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -62,12 +65,17 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles", 
+    "django.contrib.postgres",
     "cms",
     'corsheaders',
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest
+    "cms.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    # Before anything that reads or writes the response body
+    "cms.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -103,6 +111,13 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# Each worker keeps its connection open for DB_CONN_MAX_AGE seconds (0
+# closes it after every request) and checks it before reusing it when
+# DB_CONN_HEALTH_CHECKS is on. DB_POOL=True gives each worker a psycopg 3
+# connection pool instead. Management commands other than runserver, and
+# environments without psycopg_pool, fall back to a persistent connection:
+# a one-off command has no use for a pool holding DB_POOL_MIN_SIZE
+# connections open.
 
 DATABASES = {
     'default': {
@@ -112,9 +127,118 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', '1234'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {},
     }
 }
 
+RUNNING_MANAGEMENT_COMMAND = (
+    os.path.basename(sys.argv[0]) == 'manage.py' and sys.argv[1:2] != ['runserver']
+)
+
+if (
+    os.getenv('DB_POOL', 'False') == 'True'
+    and not RUNNING_MANAGEMENT_COMMAND
+    and find_spec('psycopg_pool') is not None
+):
+    # Pooled connections go back to the pool after each request
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        # Seconds a request waits for a free connection before failing
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# CACHE_BACKEND picks locmem (per process), file (shared on one host) or
+# redis (shared by every host). CACHE_LOCATION is the directory for file
+# caches and the server URL for redis. API entries are keyed by the content
+# versions in the database (see cms.cache), so every backend serves current
+# responses; a shared one fills each entry once for all workers. The
+# timeout only bounds storage.
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '86400')),
+    }
+}
+
+if CACHE_BACKEND != 'redis':
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '5000')),
+    }
+
+
+# Article views are buffered in each worker and written back in batches
+# every CMS_VIEW_COUNT_FLUSH_INTERVAL seconds (0 writes on every view).
+CMS_VIEW_COUNT_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNT_FLUSH_INTERVAL', '10'))
+
+# Notification event stream (see cms.events): seconds between version
+# checks, between heartbeats, and before a stream is closed for the
+# client to reconnect.
+CMS_NOTIFICATIONS_POLL_INTERVAL = float(os.getenv('NOTIFICATIONS_POLL_INTERVAL', '2'))
+CMS_NOTIFICATIONS_HEARTBEAT_INTERVAL = float(os.getenv('NOTIFICATIONS_HEARTBEAT_INTERVAL', '15'))
+CMS_NOTIFICATIONS_STREAM_MAX_AGE = float(os.getenv('NOTIFICATIONS_STREAM_MAX_AGE', '300'))
+
+# Route the news, gallery and notification endpoints to their async views
+# (cms.api_async). Set by config.asgi; under WSGI each async view would run
+# in its own event loop, so the sync views are kept there.
+CMS_ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# Per-request timings (see cms.metrics): with SERVER_TIMING=True, a
+# Server-Timing header on every response, which tells anyone how long the
+# database took. Prometheus metrics at /metrics are served to requests with
+# "Authorization: Bearer <METRICS_TOKEN>" (unset: to nobody). Each process
+# writes its totals to a file in METRICS_DIR every METRICS_PUBLISH_INTERVAL
+# seconds for /metrics to add up; point every worker of a host at the same
+# directory and clear it when the server starts.
+CMS_SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+CMS_METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+CMS_METRICS_DIR = os.getenv('METRICS_DIR', '')
+CMS_METRICS_PUBLISH_INTERVAL = float(os.getenv('METRICS_PUBLISH_INTERVAL', '15'))
+
+# Ranked site search hits are cached per query for CMS_SEARCH_CACHE_TIMEOUT
+# seconds, so paging through them doesn't search again (see search.service).
+CMS_SEARCH_CACHE_TIMEOUT = int(os.getenv('SEARCH_CACHE_TIMEOUT', '60'))
+
+# Public site that news and gallery search results link to
+FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000').rstrip('/')
+
+# Static JSON snapshot of the public API for the web server to serve (see
+# cms.snapshot). With API_SNAPSHOT_DIR set, content changes republish it;
+# API_SNAPSHOT_ORIGIN is the scheme and host its URLs point at.
+CMS_API_SNAPSHOT_DIR = os.getenv('API_SNAPSHOT_DIR', '')
+CMS_API_SNAPSHOT_ORIGIN = os.getenv('API_SNAPSHOT_ORIGIN', 'http://localhost:8000')
+
+
+# Django REST Framework: DRF's defaults with orjson doing the JSON work
+# (see cms.renderers; falls back to the stdlib when orjson is missing)
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'cms.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'cms.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,17 @@
+"""
+Settings for running the test suite without a database server:
+
+    DJANGO_SETTINGS_MODULE=config.settings.test python manage.py test
+
+The tests run on an in-memory SQLite database, and the PostgreSQL-only ones
+(full-text search, query plans) are skipped. Run them with the default
+settings against PostgreSQL to cover those too.
+"""
+from .dev import *
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'test.sqlite3'),
+    }
+}
@@ -8,15 +8,32 @@ from wagtail.documents import urls as wagtaildocs_urls
 
 from search import views as search_views 
 
-from cms.api import (
-    api_router,
-    notifications_list,
-    gallery_categories_list,
-    gallery_images_list,
-    news_categories_list,
-    press_releases_list,
-    press_release_detail,
-)
+from cms.api import api_router, api_cache_stats
+from cms.events import notifications_stream
+from cms.metrics import metrics
+
+if settings.CMS_ASYNC_VIEWS:
+    from cms.api_async import (
+        notifications_list,
+        gallery_categories_list,
+        gallery_images_list,
+        news_categories_list,
+        press_releases_list,
+        press_release_detail,
+        press_release_view,
+        press_releases_export,
+    )
+else:
+    from cms.api import (
+        notifications_list,
+        gallery_categories_list,
+        gallery_images_list,
+        news_categories_list,
+        press_releases_list,
+        press_release_detail,
+        press_release_view,
+        press_releases_export,
+    )
 
 urlpatterns = [
     path("django-admin/", admin.site.urls),
@@ -29,6 +46,7 @@ urlpatterns = [
 
     # Our custom Snippet APIs
     path("api/v2/notifications/", notifications_list, name="notifications-list"),
+    path("api/v2/notifications/stream/", notifications_stream, name="notifications-stream"),
     path("api/v2/gallery/categories/", gallery_categories_list, name="gallery-categories"),
     path("api/v2/gallery/images/", gallery_images_list, name="gallery-images"),
 
@@ -36,6 +54,15 @@ urlpatterns = [
     path("api/v2/news/categories/", news_categories_list, name="news-categories"),
     path("api/v2/news/", press_releases_list, name="press-releases-list"),
     path("api/v2/news/<slug:slug>/", press_release_detail, name="press-release-detail"),
+    path("api/v2/news/<slug:slug>/view/", press_release_view, name="press-release-view"),
+    # Outside news/, where it would hide an article slugged "export"
+    path("api/v2/export/news/", press_releases_export, name="press-releases-export"),
+
+    # Response cache hit/miss counters (staff only)
+    path("api/v2/cache/stats/", api_cache_stats, name="api-cache-stats"),
+
+    # Prometheus metrics (CMS_METRICS_TOKEN bearers only)
+    path("metrics", metrics, name="metrics"),
 
     # Wagtail catch-all (keep at bottom)
     path("", include(wagtail_urls)),
@@ -0,0 +1,114 @@
+"""
+Site search over pages, press releases and gallery images.
+
+Wagtail search backends search one model at a time, so each kind is
+searched separately, by relevance, and the hits are merged rank by rank. The ranked list of
+``(kind, pk)`` keys is cached per normalized query for
+CMS_SEARCH_CACHE_TIMEOUT seconds (and until news or gallery content
+changes), so paging through results slices the cached list instead of
+searching and counting again; only the objects on the current page are
+loaded.
+"""
+import hashlib
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+
+from cms.cache import get_versions
+from cms.models import GalleryImage, PressRelease
+
+
+# Hits kept per kind; a query matching more than this pages through the best ones
+MAX_RESULTS_PER_KIND = 200
+
+PAGE, NEWS, GALLERY = 'page', 'news', 'gallery'
+
+
+@dataclass
+class SearchResult:
+    kind: str
+    title: str
+    url: str
+    description: str = ''
+
+
+def normalize_query(query):
+    """``query`` with whitespace collapsed and case folded."""
+    return ' '.join((query or '').split()).casefold()
+
+
+def _searches():
+    return (
+        (PAGE, Page.objects.live()),
+        (NEWS, PressRelease.objects.filter(is_published=True)),
+        (GALLERY, GalleryImage.objects.all()),
+    )
+
+
+def _search(query):
+    backend = get_search_backend()
+    hits = []
+    for order, (kind, queryset) in enumerate(_searches()):
+        results = backend.search(query, queryset.only('pk'))[:MAX_RESULTS_PER_KIND]
+        hits.extend((rank, order, kind, result.pk) for rank, result in enumerate(results))
+    # Scores aren't comparable across models (nor available on every
+    # backend), so the kinds are merged rank by rank
+    hits.sort()
+    return [(kind, pk) for _, _, kind, pk in hits]
+
+
+def _cache_key(query):
+    versions = '.'.join(str(version) for version in get_versions((PressRelease, GalleryImage)))
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f'search:results:{versions}:{digest}'
+
+
+def ranked_result_keys(query):
+    """The ranked ``(kind, pk)`` hits for ``query``, from the cache when possible."""
+    query = normalize_query(query)
+    if not query:
+        return []
+    key = _cache_key(query)
+    keys = cache.get(key)
+    if keys is None:
+        keys = _search(query)
+        cache.set(key, keys, timeout=getattr(settings, 'CMS_SEARCH_CACHE_TIMEOUT', 60))
+    return keys
+
+
+def _page_result(page, request):
+    return SearchResult(PAGE, page.title, page.get_url(request), page.search_description)
+
+
+def _news_result(pr):
+    return SearchResult(NEWS, pr.title, f'{settings.FRONTEND_URL}/news-and-press/{pr.slug}', pr.excerpt)
+
+
+def _gallery_result(image):
+    description = image.category.name if image.category else ''
+    return SearchResult(GALLERY, image.title, f'{settings.FRONTEND_URL}/photo-gallery', description)
+
+
+def load_results(keys, request=None):
+    """``SearchResult``s for a slice of ``ranked_result_keys``, in the same order."""
+    ids = {PAGE: [], NEWS: [], GALLERY: []}
+    for kind, pk in keys:
+        ids[kind].append(pk)
+
+    objects = {}
+    if ids[PAGE]:
+        for page in Page.objects.live().filter(pk__in=ids[PAGE]):
+            objects[PAGE, page.pk] = _page_result(page, request)
+    if ids[NEWS]:
+        news = PressRelease.objects.filter(pk__in=ids[NEWS], is_published=True).only('title', 'slug', 'excerpt')
+        for pr in news:
+            objects[NEWS, pr.pk] = _news_result(pr)
+    if ids[GALLERY]:
+        for image in GalleryImage.objects.filter(pk__in=ids[GALLERY]).select_related('category'):
+            objects[GALLERY, image.pk] = _gallery_result(image)
+
+    # Hits deleted or unpublished since the search was cached are dropped
+    return [objects[key] for key in keys if key in objects]
@@ -1,7 +1,7 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.paginator import Paginator
 from django.template.response import TemplateResponse
 
-from wagtail.models import Page
+from .service import load_results, ranked_result_keys
 
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
@@ -15,26 +15,18 @@ def search(request):
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
 
-    # Search
-    if search_query:
-        search_results = Page.objects.live().search(search_query)
+    # Search: ranked hits are cached per query, so later pages don't search again
+    result_keys = ranked_result_keys(search_query)
 
-        # To log this query for use with the "Promoted search results" module:
+    # To log this query for use with the "Promoted search results" module:
 
-        # query = Query.get(search_query)
-        # query.add_hit()
+    # if search_query:
+    #     query = Query.get(search_query)
+    #     query.add_hit()
 
-    else:
-        search_results = Page.objects.none()
-
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+    # Pagination: the hits are a list, so counting them doesn't hit the database
+    search_results = Paginator(result_keys, 10).get_page(page)
+    search_results.object_list = load_results(search_results.object_list, request)
 
     return TemplateResponse(
         request,
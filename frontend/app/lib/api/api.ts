@@ -1,10 +1,14 @@
 import type {
+  LocalizedPressReleaseDetail,
+  LocalizedPressReleasesResponse,
   NewsCategoriesResponse,
+  NewsLanguage,
   PressReleasesResponse,
   PressReleaseDetail,
   PressReleaseFilters,
 } from "../types/news";
-import { API_V2_URL } from "./config";
+import type { GalleryImageFilters } from "../types/gallery";
+import { API_V2_URL, FEATURED_NEWS_COUNT } from "./config";
 
 const API_BASE = API_V2_URL;
 
@@ -24,8 +28,18 @@ export async function getGalleryCategories() {
   return res.json();
 }
 
-export async function getGalleryImages() {
-  const res = await fetch(`${API_BASE}/gallery/images/`, {
+export async function getGalleryImages(filters?: GalleryImageFilters) {
+  const params = new URLSearchParams();
+
+  if (filters?.category) params.append("category", filters.category);
+  if (filters?.date_from) params.append("date_from", filters.date_from);
+  if (filters?.date_to) params.append("date_to", filters.date_to);
+  if (filters?.limit) params.append("limit", filters.limit.toString());
+  if (filters?.cursor) params.append("cursor", filters.cursor);
+
+  const url = `${API_BASE}/gallery/images/${params.toString() ? `?${params.toString()}` : ""}`;
+
+  const res = await fetch(url, {
     cache: "no-store",
   });
   if (!res.ok) throw new Error("Failed to fetch gallery");
@@ -42,9 +56,15 @@ export async function getNewsCategories(): Promise<NewsCategoriesResponse> {
   return res.json();
 }
 
+export function getPressReleases(
+  filters: PressReleaseFilters & { lang: NewsLanguage }
+): Promise<LocalizedPressReleasesResponse>;
+export function getPressReleases(
+  filters?: PressReleaseFilters
+): Promise<PressReleasesResponse>;
 export async function getPressReleases(
   filters?: PressReleaseFilters
-): Promise<PressReleasesResponse> {
+): Promise<PressReleasesResponse | LocalizedPressReleasesResponse> {
   const params = new URLSearchParams();
 
   if (filters?.category) params.append("category", filters.category);
@@ -52,6 +72,8 @@ export async function getPressReleases(
     params.append("featured", filters.featured.toString());
   if (filters?.search) params.append("search", filters.search);
   if (filters?.limit) params.append("limit", filters.limit.toString());
+  if (filters?.cursor) params.append("cursor", filters.cursor);
+  if (filters?.lang) params.append("lang", filters.lang);
 
   const url = `${API_BASE}/news/${params.toString() ? `?${params.toString()}` : ""}`;
 
@@ -63,10 +85,17 @@ export async function getPressReleases(
   return res.json();
 }
 
+export function getPressReleaseBySlug(
+  slug: string,
+  lang: NewsLanguage
+): Promise<LocalizedPressReleaseDetail>;
+export function getPressReleaseBySlug(slug: string): Promise<PressReleaseDetail>;
 export async function getPressReleaseBySlug(
-  slug: string
-): Promise<PressReleaseDetail> {
-  const res = await fetch(`${API_BASE}/news/${slug}`, {
+  slug: string,
+  lang?: NewsLanguage
+): Promise<PressReleaseDetail | LocalizedPressReleaseDetail> {
+  const query = lang ? `?lang=${lang}` : "";
+  const res = await fetch(`${API_BASE}/news/${slug}${query}`, {
     cache: "no-store",
   });
 
@@ -80,6 +109,18 @@ export async function getPressReleaseBySlug(
   return res.json();
 }
 
+// Article pages may be served as static files, so reads are counted here
+export async function recordPressReleaseView(slug: string): Promise<void> {
+  try {
+    await fetch(`${API_BASE}/news/${slug}/view/`, {
+      method: "POST",
+      keepalive: true,
+    });
+  } catch {
+    // A lost count isn't worth an error on the page
+  }
+}
+
 export async function getFeaturedNews(): Promise<PressReleasesResponse> {
-  return getPressReleases({ featured: true, limit: 3 });
+  return getPressReleases({ featured: true, limit: FEATURED_NEWS_COUNT });
 }
\ No newline at end of file
@@ -16,6 +16,12 @@ export const API_V2_PATH = "/api/v2";
 export const API_V1_URL = `${API_BASE_URL}${API_V1_PATH}`;
 export const API_V2_URL = `${API_BASE_URL}${API_V2_PATH}`;
 
+// Page sizes of the lists the site fetches. The backend publishes these
+// exact pages as static files (see cms.snapshot), so keep the two in step.
+export const NEWS_PAGE_SIZE = 20;
+export const FEATURED_NEWS_COUNT = 3;
+export const GALLERY_PAGE_SIZE = 48;
+
 // Media URL for images and files
 export const MEDIA_URL = `${API_BASE_URL}/media`;
 
@@ -0,0 +1,9 @@
+// Photo Gallery TypeScript Types
+
+export interface GalleryImageFilters {
+  category?: string;
+  date_from?: string;
+  date_to?: string;
+  limit?: number;
+  cursor?: string;
+}
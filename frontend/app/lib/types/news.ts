@@ -7,6 +7,17 @@ export interface NewsCategory {
   slug: string;
 }
 
+export interface ImageRendition {
+  url: string;
+  width: number;
+  height: number;
+}
+
+// Pre-generated sizes; missing sizes or formats are omitted
+export type ImageRenditions = Partial<
+  Record<'thumbnail' | 'card' | 'full', Partial<Record<'webp' | 'jpeg', ImageRendition>>>
+>;
+
 export interface PressRelease {
   id: number;
   title: string;
@@ -14,9 +25,10 @@ export interface PressRelease {
   slug: string;
   excerpt: string;
   excerpt_te: string;
-  body: string;
-  body_te: string;
+  body?: string;
+  body_te?: string;
   featured_image: string | null;
+  featured_image_renditions?: ImageRenditions | null;
   category: number | null;
   category_name?: string;
   category_slug?: string;
@@ -35,6 +47,8 @@ export interface PressReleaseDetail extends Omit<PressRelease, 'category'> {
     name_te: string;
     slug: string;
   } | null;
+  body: string;
+  body_te: string;
   created_at: string;
   updated_at: string;
 }
@@ -45,6 +59,33 @@ export interface NewsCategoriesResponse {
 
 export interface PressReleasesResponse {
   news: PressRelease[];
+  total: number;
+  next: string | null;
+  prev: string | null;
+}
+
+// "auto" picks the language from the browser's Accept-Language header
+export type NewsLanguage = 'en' | 'te' | 'auto';
+
+// With ?lang= the API returns one language under the English field names
+export type LocalizedPressRelease = Omit<PressRelease, 'title_te' | 'excerpt_te' | 'body_te'>;
+
+export interface LocalizedPressReleaseDetail
+  extends Omit<PressReleaseDetail, 'category' | 'title_te' | 'excerpt_te' | 'body_te'> {
+  category: {
+    id: number;
+    name: string;
+    slug: string;
+  } | null;
+  lang: 'en' | 'te';
+}
+
+export interface LocalizedPressReleasesResponse {
+  news: LocalizedPressRelease[];
+  total: number;
+  next: string | null;
+  prev: string | null;
+  lang: 'en' | 'te';
 }
 
 export interface PressReleaseFilters {
@@ -52,4 +93,6 @@ export interface PressReleaseFilters {
   featured?: boolean;
   search?: string;
   limit?: number;
+  cursor?: string;
+  lang?: NewsLanguage;
 }
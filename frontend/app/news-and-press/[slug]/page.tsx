@@ -5,7 +5,7 @@ import { useParams, useRouter } from "next/navigation";
 import Image from "next/image";
 import Link from "next/link";
 import { Calendar, User, Tag, Eye, ArrowLeft, Share2 } from "lucide-react";
-import { getPressReleaseBySlug } from "../../lib/api/api";
+import { getPressReleaseBySlug, recordPressReleaseView } from "../../lib/api/api";
 import type { PressReleaseDetail } from "../../lib/types/news";
 
 export default function NewsDetailPage() {
@@ -24,6 +24,7 @@ export default function NewsDetailPage() {
       try {
         const data = await getPressReleaseBySlug(slug);
         setArticle(data);
+        recordPressReleaseView(slug);
         setLoading(false);
       } catch (err) {
         setError(
@@ -5,26 +5,36 @@ import Image from "next/image";
 import Link from "next/link";
 import { Search, Calendar, Tag, Eye } from "lucide-react";
 import { getPressReleases, getNewsCategories } from "../lib/api/api";
+import { NEWS_PAGE_SIZE } from "../lib/api/config";
 import type { PressRelease, NewsCategory } from "../lib/types/news";
 
 export default function NewsAndPressPage() {
   const [selectedCategory, setSelectedCategory] = useState<string>("all");
   const [searchQuery, setSearchQuery] = useState("");
   const [news, setNews] = useState<PressRelease[]>([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [categories, setCategories] = useState<NewsCategory[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
+  const category = selectedCategory === "all" ? undefined : selectedCategory;
+
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const [newsData, categoriesData] = await Promise.all([
-          getPressReleases(),
-          getNewsCategories(),
-        ]);
+    getNewsCategories()
+      .then((data) => setCategories(data.categories || []))
+      .catch(() => setError("Failed to load news"));
+  }, []);
 
+  // One page per category; these pages are served as static files
+  useEffect(() => {
+    const fetchNews = async () => {
+      try {
+        const newsData = await getPressReleases({ category, limit: NEWS_PAGE_SIZE });
         setNews(newsData.news || []);
-        setCategories(categoriesData.categories || []);
+        setTotal(newsData.total);
+        setNextCursor(newsData.next);
         setLoading(false);
       } catch (err) {
         setError("Failed to load news");
@@ -32,19 +42,33 @@ export default function NewsAndPressPage() {
       }
     };
 
-    fetchData();
-  }, []);
+    fetchNews();
+  }, [category]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const newsData = await getPressReleases({
+        category,
+        limit: NEWS_PAGE_SIZE,
+        cursor: nextCursor,
+      });
+      setNews((current) => [...current, ...(newsData.news || [])]);
+      setNextCursor(newsData.next);
+    } catch (err) {
+      setError("Failed to load news");
+    }
+    setLoadingMore(false);
+  };
 
   const filteredNews = news.filter((item) => {
-    const matchesCategory =
-      selectedCategory === "all" ||
-      item.category_slug === selectedCategory;
     const matchesSearch =
       searchQuery === "" ||
       item.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
       item.excerpt.toLowerCase().includes(searchQuery.toLowerCase());
 
-    return matchesCategory && matchesSearch;
+    return matchesSearch;
   });
 
   const formatDate = (dateString: string) => {
@@ -127,7 +151,7 @@ export default function NewsAndPressPage() {
 
         {/* Results Count */}
         <div className="mb-6 text-gray-600">
-          Showing {filteredNews.length} {filteredNews.length === 1 ? "article" : "articles"}
+          Showing {filteredNews.length} of {total} {total === 1 ? "article" : "articles"}
         </div>
 
         {/* News Grid */}
@@ -221,6 +245,19 @@ export default function NewsAndPressPage() {
             ))}
           </div>
         )}
+
+        {/* Load More */}
+        {nextCursor && (
+          <div className="mt-8 text-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-6 py-3 rounded-lg bg-green-600 text-white font-medium hover:bg-green-700 disabled:opacity-60 transition-colors"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -4,6 +4,7 @@ import { useState, useEffect } from "react";
 import Image from "next/image";
 import { X, ChevronLeft, ChevronRight, Download, ZoomIn, Calendar, Image as ImageIcon } from "lucide-react";
 import { getGalleryImages, getGalleryCategories } from "../lib/api/api";
+import { GALLERY_PAGE_SIZE } from "../lib/api/config";
 
 type GalleryItem = {
   id: number;
@@ -23,23 +24,37 @@ export default function PhotoGalleryPage() {
   const [selectedImage, setSelectedImage] = useState<GalleryItem | null>(null);
   const [currentIndex, setCurrentIndex] = useState(0);
   const [gallery, setGallery] = useState<GalleryItem[]>([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [categories, setCategories] = useState<Category[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
-  useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const [imagesData, categoriesData] = await Promise.all([
-          getGalleryImages(),
-          getGalleryCategories(),
-        ]);
+  const category = selectedCategory === "all" ? undefined : selectedCategory;
 
-        setGallery(imagesData.gallery || []);
+  useEffect(() => {
+    getGalleryCategories()
+      .then((categoriesData) =>
         setCategories([
           { id: "all", label: "All" },
           ...(categoriesData.categories || []),
-        ]);
+        ])
+      )
+      .catch((err) => {
+        console.error("Gallery fetch error:", err);
+        setError("Failed to load gallery");
+      });
+  }, []);
+
+  // One page per category; these pages are served as static files
+  useEffect(() => {
+    const fetchImages = async () => {
+      try {
+        const imagesData = await getGalleryImages({ category, limit: GALLERY_PAGE_SIZE });
+        setGallery(imagesData.gallery || []);
+        setTotal(imagesData.total);
+        setNextCursor(imagesData.next);
         setLoading(false);
       } catch (err) {
         console.error("Gallery fetch error:", err);
@@ -48,13 +63,26 @@ export default function PhotoGalleryPage() {
       }
     };
 
-    fetchData();
-  }, []);
+    fetchImages();
+  }, [category]);
 
-  const filteredImages =
-    selectedCategory === "all"
-      ? gallery
-      : gallery.filter((item) => item.category === selectedCategory);
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const imagesData = await getGalleryImages({
+        category,
+        limit: GALLERY_PAGE_SIZE,
+        cursor: nextCursor,
+      });
+      setGallery((current) => [...current, ...(imagesData.gallery || [])]);
+      setNextCursor(imagesData.next);
+    } catch (err) {
+      console.error("Gallery fetch error:", err);
+      setError("Failed to load gallery");
+    }
+    setLoadingMore(false);
+  };
 
   const formatDate = (dateString: string) => {
     return new Date(dateString).toLocaleDateString("en-IN", {
@@ -66,7 +94,7 @@ export default function PhotoGalleryPage() {
 
   const openLightbox = (item: GalleryItem) => {
     setSelectedImage(item);
-    const index = filteredImages.findIndex((img) => img.id === item.id);
+    const index = gallery.findIndex((img) => img.id === item.id);
     setCurrentIndex(index);
   };
 
@@ -75,16 +103,16 @@ export default function PhotoGalleryPage() {
   };
 
   const showNext = () => {
-    const nextIndex = (currentIndex + 1) % filteredImages.length;
+    const nextIndex = (currentIndex + 1) % gallery.length;
     setCurrentIndex(nextIndex);
-    setSelectedImage(filteredImages[nextIndex]);
+    setSelectedImage(gallery[nextIndex]);
   };
 
   const showPrevious = () => {
     const prevIndex =
-      (currentIndex - 1 + filteredImages.length) % filteredImages.length;
+      (currentIndex - 1 + gallery.length) % gallery.length;
     setCurrentIndex(prevIndex);
-    setSelectedImage(filteredImages[prevIndex]);
+    setSelectedImage(gallery[prevIndex]);
   };
 
   const handleDownload = () => {
@@ -168,12 +196,12 @@ export default function PhotoGalleryPage() {
 
         {/* Results Count */}
         <div className="mb-6 text-gray-600">
-          Showing {filteredImages.length}{" "}
-          {filteredImages.length === 1 ? "photo" : "photos"}
+          Showing {gallery.length} of {total}{" "}
+          {total === 1 ? "photo" : "photos"}
         </div>
 
         {/* Gallery Grid - Enhanced */}
-        {filteredImages.length === 0 ? (
+        {gallery.length === 0 ? (
           <div className="text-center py-20 bg-white rounded-lg shadow-sm">
             <ImageIcon className="w-16 h-16 text-gray-300 mx-auto mb-4" />
             <p className="text-gray-500 text-lg">
@@ -182,7 +210,7 @@ export default function PhotoGalleryPage() {
           </div>
         ) : (
           <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-5">
-            {filteredImages.map((item: GalleryItem) => (
+            {gallery.map((item: GalleryItem) => (
               <div
                 key={item.id}
                 className="group cursor-pointer bg-white rounded-lg overflow-hidden shadow-md hover:shadow-2xl transition-all duration-300"
@@ -216,6 +244,19 @@ export default function PhotoGalleryPage() {
             ))}
           </div>
         )}
+
+        {/* Load More */}
+        {nextCursor && (
+          <div className="mt-8 text-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-6 py-3 rounded-lg bg-green-600 text-white font-medium hover:bg-green-700 disabled:opacity-60 transition-colors"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Enhanced Lightbox Modal */}
@@ -246,7 +287,7 @@ export default function PhotoGalleryPage() {
           </button>
 
           {/* Navigation Buttons */}
-          {filteredImages.length > 1 && (
+          {gallery.length > 1 && (
             <>
               <button
                 onClick={(e) => {
@@ -297,9 +338,9 @@ export default function PhotoGalleryPage() {
                 <Calendar className="w-4 h-4" />
                 <time>{formatDate(selectedImage.date)}</time>
               </div>
-              {filteredImages.length > 1 && (
+              {gallery.length > 1 && (
                 <div className="mt-3 text-sm text-gray-500">
-                  Photo {currentIndex + 1} of {filteredImages.length}
+                  Photo {currentIndex + 1} of {gallery.length}
                 </div>
               )}
             </div>